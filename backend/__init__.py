@@ -1,7 +1,10 @@
 from flask import Flask, jsonify
 from flask_cors import CORS
 from backend.config import Config
-from backend.extensions import init_extensions
+from backend.extensions import init_extensions, init_scheduler
+from backend.utils.instrumentation import instrument_app
+from backend.utils.compression import init_compression
+from backend.utils.fast_json import FastJSONProvider
 from backend.routes.public_routes import public_bp
 from backend.routes.portfolio_routes import portfolio_bp
 
@@ -9,15 +12,21 @@ from backend.routes.portfolio_routes import portfolio_bp
 def create_app(config_class=Config):
     """Creates and configures the Flask application."""
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)
 
     app.config.from_object(config_class)
 
     init_extensions(app)
+    instrument_app(app)
+    init_compression(app)
     CORS(app, resources={r"/api/*": {"origins": "*"}})
 
     app.register_blueprint(public_bp)
     app.register_blueprint(portfolio_bp)
 
+    if app.config["SCHEDULER_ENABLED"]:
+        init_scheduler(app)
+
     @app.errorhandler(404)
     def not_found(error):
         return jsonify({"error": "Endpoint not found"}), 404
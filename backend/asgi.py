@@ -0,0 +1,92 @@
+import ssl
+from typing import Optional
+from hypercorn.middleware import AsyncioWSGIMiddleware
+from quart import Quart, jsonify, request
+from quart.json.provider import DefaultJSONProvider
+from werkzeug.exceptions import MethodNotAllowed, NotFound
+from backend import create_app
+from backend.config import Config
+from backend.async_extensions import init_async_extensions, close_async_extensions
+from backend.extensions import start_background
+from backend.utils.async_instrumentation import instrument_app
+from backend.utils.async_compression import init_compression
+from backend.utils.fast_json import FastJSONMixin
+from backend.routes.async_public_routes import async_public_bp
+from backend.routes.async_portfolio_routes import async_portfolio_bp
+
+
+class FallbackDispatcher:
+    """
+    ASGI app that sends requests matching a route of the async app to it and
+    everything else to the fallback (the Flask app, run on a thread pool).
+    """
+
+    def __init__(self, app: Quart, fallback):
+        self.app = app
+        self.fallback = fallback
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and not self._matches(scope):
+            await self.fallback(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
+
+    def _matches(self, scope) -> bool:
+        adapter = self.app.url_map.bind("")
+        try:
+            adapter.match(scope["path"], method=scope["method"])
+        except (NotFound, MethodNotAllowed):
+            return False
+        except Exception:
+            # Redirects and other routing outcomes are answered by the async app
+            return True
+        return True
+
+
+class FastJSONProvider(FastJSONMixin, DefaultJSONProvider):
+    """Quart flavour of fast_json.FastJSONProvider."""
+
+
+def create_async_app(config_class=Config, ssl_context: Optional[ssl.SSLContext] = None):
+    """
+    Creates the ASGI application. Quote, search, news, stream and portfolio
+    routes run as async views on non-blocking clients; any other route (bulk
+    import, export) falls through to the Flask app, so both modes serve the same API.
+    """
+    flask_app = create_app(config_class)  # also initializes the shared caches in backend.extensions
+
+    app = Quart(__name__)
+    app.json = FastJSONProvider(app)
+    app.config.from_object(config_class)
+    instrument_app(app)
+    init_compression(app)
+
+    app.register_blueprint(async_public_bp)
+    app.register_blueprint(async_portfolio_bp)
+
+    @app.before_serving
+    async def startup():
+        await init_async_extensions(app, ssl_context)
+        start_background()  # async views do not pass through the Flask app's before_request
+
+    @app.after_serving
+    async def shutdown():
+        await close_async_extensions()
+
+    @app.after_request
+    async def add_cors_headers(response):
+        # Mirrors flask_cors with origins="*" on /api/*
+        if request.path.startswith("/api/"):
+            response.headers["Access-Control-Allow-Origin"] = "*"
+            if request.method == "OPTIONS":
+                response.headers["Access-Control-Allow-Methods"] = response.headers.get("Allow", "")
+                if "Access-Control-Request-Headers" in request.headers:
+                    response.headers["Access-Control-Allow-Headers"] = request.headers["Access-Control-Request-Headers"]
+        return response
+
+    @app.errorhandler(500)
+    async def internal_error(error):
+        return jsonify({"error": "Internal server error"}), 500
+
+    return FallbackDispatcher(app, AsyncioWSGIMiddleware(
+        flask_app, max_body_size=config_class.ASYNC_WSGI_MAX_BODY_SIZE))
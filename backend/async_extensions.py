@@ -0,0 +1,52 @@
+import ssl
+from typing import TYPE_CHECKING, Optional
+import httpx
+from quart import Quart
+from backend.utils.http_pool import AsyncTimedTransport
+from backend.utils.singleflight import AsyncSingleFlight
+import backend.extensions as ext
+
+if TYPE_CHECKING:
+    from supabase import AsyncClient
+
+# Non-blocking clients for the ASGI app. Caches, the symbol index and the news
+# store are shared with the Flask app through backend.extensions.
+supabase: "AsyncClient" = None  # type: ignore
+http_client: httpx.AsyncClient = None  # type: ignore
+upstream_flight: AsyncSingleFlight = AsyncSingleFlight()
+call_timeout: float = 10.0
+
+
+async def init_async_extensions(app: Quart, ssl_context: Optional[ssl.SSLContext] = None):
+    """
+    Creates the async Supabase client and the upstream HTTP client.
+    Must run on the serving event loop (from a before_serving hook).
+    """
+    global supabase, http_client, upstream_flight, call_timeout
+    # Imported here, in the serving worker, rather than when the app is created
+    from supabase import acreate_client, AsyncClientOptions
+
+    config = app.config
+    # Keep-alive pools as the sync PoolManager keeps them: up to ASYNC_POOL_SIZE idle
+    # connections per client, and callers past that open one rather than wait
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=config["ASYNC_POOL_SIZE"],
+                          keepalive_expiry=60)
+    # The SDK's client is timed as request phases and keeps its default 120 s timeout
+    supabase = await acreate_client(
+        config["SUPABASE_URL"], config["SUPABASE_KEY"],
+        options=AsyncClientOptions(httpx_client=httpx.AsyncClient(
+            transport=AsyncTimedTransport(httpx.AsyncHTTPTransport(limits=limits), ext.metrics),
+            timeout=httpx.Timeout(120, connect=config["UPSTREAM_CONNECT_TIMEOUT"]))))
+
+    http_client = httpx.AsyncClient(
+        transport=httpx.AsyncHTTPTransport(verify=ssl_context or True, limits=limits),
+        timeout=httpx.Timeout(config["UPSTREAM_READ_TIMEOUT"], connect=config["UPSTREAM_CONNECT_TIMEOUT"]))
+    upstream_flight = AsyncSingleFlight()
+    call_timeout = config["UPSTREAM_CALL_TIMEOUT"]
+
+
+async def close_async_extensions():
+    if http_client is not None:
+        await http_client.aclose()
+    if supabase is not None:
+        await supabase.options.httpx_client.aclose()
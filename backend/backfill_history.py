@@ -0,0 +1,87 @@
+"""
+Backfills the local price history from RapidAPI's /stock-time-series.
+
+    python -m backend.backfill_history --period 1Y
+    python -m backend.backfill_history --period 5D RELIANCE:NSE TCS:NSE
+
+1D and 5D periods fill the intraday series; longer periods fill daily bars.
+The upstream series only has one price per point, so each bar is flat
+(open = high = low = close). Existing bars on the same timestamps are replaced.
+A running server's quote merges wait while a symbol is written, and vice versa.
+Symbols default to the popular stocks shown on the dashboard plus the
+analytics benchmark (ANALYTICS_BENCHMARK).
+"""
+import argparse
+import time
+import numpy as np
+from backend import create_app
+from backend.config import Config
+from backend.routes.public_routes import POPULAR_SYMBOLS
+from backend.utils.api_helpers import make_api_request
+from backend.utils.price_history import DAILY, INTRADAY, downsample, parse_time
+from backend.utils.rate_governor import PRIORITY_BACKGROUND
+import backend.extensions as ext
+
+PERIODS = ("1D", "5D", "1M", "6M", "YTD", "1Y", "5Y", "MAX")
+
+
+class BackfillConfig(Config):
+    # A one-off run should not warm the dashboard datasets alongside the backfill
+    SCHEDULER_ENABLED = False
+
+
+def to_bars(data: dict) -> dict:
+    """Converts a time_series payload ({"YYYY-MM-DD HH:MM:SS": {price, volume}}) to sorted column arrays."""
+    # Keys are exchange-local times; utc_offset_sec shifts them to UTC
+    offset = int(data.get("utc_offset_sec") or 0)
+    points = sorted((parse_time(ts) - offset, point) for ts, point in (data.get("time_series") or {}).items()
+                    if point.get("price") is not None)
+    prices = np.array([float(p["price"]) for _, p in points])
+    return {"timestamp": np.array([ts for ts, _ in points], dtype=np.int64),
+            "open": prices, "high": prices, "low": prices, "close": prices,
+            "volume": np.array([float(p.get("volume") or 0) for _, p in points])}
+
+
+def write_bars(symbol: str, resolution: str, bars: dict) -> int:
+    """write_bars under the history writer lock, waiting out a merge of live quotes."""
+    lock = ext.history_recorder.lock
+    while not lock.try_acquire():
+        time.sleep(0.05)
+    try:
+        return ext.price_history.write_bars(symbol, resolution, bars)
+    finally:
+        lock.release()
+
+
+def backfill(symbol: str, period: str, host: str, key: str) -> int:
+    result = make_api_request(host, key, f"/stock-time-series?symbol={symbol}&period={period}&language=en",
+                              priority=PRIORITY_BACKGROUND, stale_ok=False)
+    if result.get("status") != "OK":
+        print(f"{symbol}: {result.get('message') or result.get('error') or 'request failed'}")
+        return 0
+    bars = to_bars(result.get("data") or {})
+    if period not in ("1D", "5D"):
+        # Longer periods may carry several points a day; fold them into date-keyed daily bars
+        bars = downsample(bars, 86400, sum_volume=True)
+    written = write_bars(symbol, INTRADAY if period in ("1D", "5D") else DAILY, bars)
+    print(f"{symbol}: {written} bars")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("symbols", nargs="*")
+    parser.add_argument("--period", choices=PERIODS, default="1Y")
+    args = parser.parse_args()
+
+    app = create_app(BackfillConfig)
+    if ext.price_history is None:
+        parser.error("HISTORY_DIR is not set")
+    host, key = app.config["RAPIDAPI_STOCK_HOST"], app.config["RAPIDAPI_KEY"]
+    symbols = args.symbols or POPULAR_SYMBOLS + [app.config["ANALYTICS_BENCHMARK"]]
+    total = sum(backfill(symbol.strip().upper(), args.period, host, key) for symbol in symbols)
+    print(f"Backfilled {total} bars for {len(symbols)} symbols into {ext.price_history.root}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Times portfolio analytics for a large portfolio: writes synthetic daily bars
+(geometric random walks with staggered listing dates) for N symbols plus the
+benchmark into a throwaway history directory, then runs portfolio_analytics
+cold (first read of the column files) and warm.
+
+    python -m backend.benchmarks.bench_analytics --holdings 500 --years 10
+"""
+import argparse
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from backend.utils.analytics import portfolio_analytics
+from backend.utils.price_history import DAILY, PriceHistory
+
+BENCHMARK = "NIFTY_50:INDEXNSE"
+
+
+def weekdays(years: int, end: int) -> np.ndarray:
+    days = np.arange(end - years * 365 * 86400, end, 86400, dtype=np.int64)
+    days -= days % 86400
+    # 1970-01-01 was a Thursday: weekday index 0 = Monday
+    return days[((days // 86400) + 3) % 7 < 5]
+
+
+def write_history(history: PriceHistory, symbols, dates: np.ndarray, seed: int = 7) -> None:
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0.0003, 0.01, len(dates))
+    for i, symbol in enumerate(symbols):
+        # A fifth of the symbols list partway through the window
+        first = int(rng.integers(0, len(dates) // 2)) if i % 5 == 0 else 0
+        beta = rng.uniform(0.5, 1.5)
+        returns = beta * market[first:] + rng.normal(0, 0.015, len(dates) - first)
+        close = 100.0 * np.exp(np.cumsum(returns))
+        history.write_bars(symbol, DAILY, {
+            "timestamp": dates[first:], "open": close, "high": close * 1.01,
+            "low": close * 0.99, "close": close, "volume": np.full(len(close), 1e5)})
+    close = 10000.0 * np.exp(np.cumsum(market))
+    history.write_bars(BENCHMARK, DAILY, {
+        "timestamp": dates, "open": close, "high": close, "low": close, "close": close,
+        "volume": np.zeros(len(close))})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--holdings", type=int, default=500)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="bench-history-")
+    try:
+        history = PriceHistory(root)
+        end = int(time.time())
+        dates = weekdays(args.years, end)
+        symbols = [f"SYM{i}:NSE" for i in range(args.holdings)]
+        started = time.perf_counter()
+        write_history(history, symbols, dates)
+        print(f"wrote {len(symbols)} x {len(dates)} daily bars in {time.perf_counter() - started:.2f}s")
+
+        holdings = [{"symbol": s, "quantity": 10 + i % 7} for i, s in enumerate(symbols)]
+        start = int(dates[0])
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            result = portfolio_analytics(history, holdings, start, end, BENCHMARK)
+            timings.append(time.perf_counter() - started)
+        print(f"cold {timings[0] * 1000:.0f} ms, warm median {np.median(timings[1:] or timings) * 1000:.0f} ms "
+              f"({result['observations']} returns, {len(symbols)}x{len(symbols)} correlations)")
+        print({k: result[k] for k in ("time_weighted_return", "annualized_return", "annualized_volatility",
+                                      "max_drawdown", "beta")})
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
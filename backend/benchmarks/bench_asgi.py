@@ -0,0 +1,208 @@
+"""
+Load-tests the WSGI app (create_app behind a fixed pool of sync worker threads)
+against the ASGI app (create_async_app under Hypercorn) on requests per second
+and latency percentiles, using local RapidAPI and Supabase stubs with injected latency.
+
+    python -m backend.benchmarks.bench_asgi --requests 2000 --concurrency 100 --latency 0.05
+
+Each server and the stubs run in their own process so the load generator does
+not compete with them for the GIL.
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import BaseWSGIServer
+
+from backend.benchmarks.bench_auth import JWT_SECRET, mint_token
+from backend.benchmarks.bench_http_pool import insecure_context
+from backend.benchmarks.stub_upstream import StubSupabase, StubUpstream
+from backend.config import Config
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """WSGI server handling requests on a fixed number of threads, like N sync workers."""
+
+    def __init__(self, host, port, app, workers):
+        super().__init__(host, port, app)
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+def bench_config(upstream_host, supabase_url):
+    class Bench(Config):
+        RAPIDAPI_STOCK_HOST = upstream_host
+        RAPIDAPI_NEWS_HOST = upstream_host
+        SUPABASE_URL = supabase_url
+        SUPABASE_JWT_SECRET = JWT_SECRET
+        AUTH_MODE = "local"
+        AUTH_REMOTE_FALLBACK = False
+        # Measure serving throughput, not the upstream budget
+        RATE_LIMIT_PER_SECOND = 0
+        # Only the benchmark's own requests should reach the stubs
+        SCHEDULER_ENABLED = False
+    return Bench
+
+
+def serve_stubs(ready, latency, tables):
+    upstream = StubUpstream(latency=latency).start()
+    supabase = StubSupabase(latency=latency, tables=tables).start()
+    ready.put((upstream.host, supabase.url))
+    while True:
+        time.sleep(3600)
+
+
+def serve_sync(port, upstream_host, supabase_url, workers):
+    from backend import create_app
+    import backend.extensions as ext
+    from backend.utils.http_pool import PoolManager
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    app = create_app(bench_config(upstream_host, supabase_url))
+    ext.http_pools = PoolManager(maxsize=workers, context=insecure_context())
+    PooledWSGIServer("127.0.0.1", port, app, workers).serve_forever()
+
+
+def serve_async(port, upstream_host, supabase_url, workers):
+    from hypercorn.asyncio import serve
+    from hypercorn.config import Config as HypercornConfig
+    from backend.asgi import create_async_app
+    import backend.extensions as ext
+    from backend.utils.http_pool import PoolManager
+
+    app = create_async_app(bench_config(upstream_host, supabase_url), ssl_context=insecure_context())
+    ext.http_pools = PoolManager(context=insecure_context())
+    server_config = HypercornConfig()
+    server_config.bind = [f"127.0.0.1:{port}"]
+    server_config.backlog = 1024
+    asyncio.run(serve(app, server_config))
+
+
+def percentile(sorted_values, pct):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))]
+
+
+async def fetch(conn, host, path, headers):
+    """Sends one GET on a keep-alive connection (reopened when needed); returns (status, conn)."""
+    if conn is None:
+        conn = await asyncio.open_connection(*host)
+    reader, writer = conn
+    head = "".join(f"{k}: {v}\r\n" for k, v in headers.items())
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host[0]}\r\n{head}\r\n".encode("latin-1"))
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("Connection closed by server")
+    length, keep_alive, chunked = 0, status_line.startswith(b"HTTP/1.1"), False
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        name, value = name.strip().lower(), value.strip().lower()
+        if name == "content-length":
+            length = int(value)
+        elif name == "connection":
+            keep_alive = value != "close"
+        elif name == "transfer-encoding":
+            chunked = "chunked" in value
+    if chunked:
+        while size := int((await reader.readline()).split(b";")[0], 16):
+            await reader.readexactly(size + 2)
+        await reader.readline()
+    else:
+        await reader.readexactly(length)
+    if not keep_alive:
+        writer.close()
+        conn = None
+    return int(status_line.split()[1]), conn
+
+
+async def load(host, paths, headers, concurrency):
+    """Replays `paths` over `concurrency` connections; returns (elapsed, sorted latencies, failures)."""
+    latencies, failures = [], 0
+    queue = iter(paths)
+
+    for _ in range(100):
+        try:
+            if (await fetch(None, host, "/api/health", {}))[0] == 200:
+                break
+        except OSError:
+            await asyncio.sleep(0.2)
+
+    async def worker():
+        nonlocal failures
+        conn = None
+        for path in queue:
+            start = time.perf_counter()
+            try:
+                status, conn = await fetch(conn, host, path, headers)
+            except (OSError, asyncio.IncompleteReadError, ValueError):
+                status, conn = 0, None
+            latencies.append(time.perf_counter() - start)
+            failures += status != 200
+        if conn is not None:
+            conn[1].close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start, sorted(latencies), failures
+
+
+def run(label, target, port, stub_addr, args, paths, headers):
+    server = multiprocessing.Process(target=target, args=(port, *stub_addr, args.sync_workers), daemon=True)
+    server.start()
+    try:
+        elapsed, latencies, failures = asyncio.run(
+            load(("127.0.0.1", port), paths, headers, args.concurrency))
+    finally:
+        server.terminate()
+        server.join()
+    print(f"{label:<28} {len(paths) / elapsed:>8.1f} req/s  p50 {percentile(latencies, 50) * 1000:>7.1f} ms"
+          f"  p99 {percentile(latencies, 99) * 1000:>7.1f} ms  failed {failures}")
+    return len(paths) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.05,
+                        help="Injected stub latency per upstream/Supabase request in seconds")
+    parser.add_argument("--sync-workers", type=int, default=8,
+                        help="Worker threads for the WSGI server")
+    args = parser.parse_args()
+
+    user_id = str(uuid.uuid4())
+    tables = {"portfolios": [{"id": str(uuid.uuid4()), "user_id": user_id, "name": "Bench"}]}
+    headers = {"Authorization": f"Bearer {mint_token(user_id)}"}
+    # Half quote lookups on distinct symbols (always a cache miss), half portfolio listings
+    paths = [f"/api/quote?symbols=BENCH{i}:NSE" if i % 2 else "/api/portfolios"
+             for i in range(args.requests)]
+
+    ready = multiprocessing.Queue()
+    stubs = multiprocessing.Process(target=serve_stubs, args=(ready, args.latency, tables), daemon=True)
+    stubs.start()
+    try:
+        stub_addr = ready.get(timeout=30)
+        print(f"{args.requests} requests, concurrency {args.concurrency}, "
+              f"{args.latency * 1000:.0f} ms stub latency, {args.sync_workers} sync workers")
+        sync_rps = run("wsgi (create_app)", serve_sync, 5101, stub_addr, args, paths, headers)
+        async_rps = run("asgi (create_async_app)", serve_async, 5102, stub_addr, args, paths, headers)
+    finally:
+        stubs.terminate()
+    print(f"asgi vs wsgi: {async_rps / sync_rps:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
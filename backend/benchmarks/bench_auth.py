@@ -0,0 +1,86 @@
+"""
+Measures /api/portfolios throughput with remote token checks (the old
+behaviour), remote checks behind the verified-token cache, and local JWT
+verification, against a local Supabase stub with injected auth latency.
+
+    python -m backend.benchmarks.bench_auth --requests 400 --threads 8 --latency 0.03
+"""
+import argparse
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import jwt
+
+from backend import create_app
+from backend.benchmarks.stub_upstream import StubSupabase
+from backend.config import Config
+
+JWT_SECRET = "bench-secret-bench-secret-bench-secret"
+
+
+def mint_token(user_id: str, ttl: int = 3600, secret: str = JWT_SECRET) -> str:
+    now = int(time.time())
+    return jwt.encode({"sub": user_id, "aud": "authenticated", "role": "authenticated",
+                       "email": "bench@example.com", "iat": now, "exp": now + ttl},
+                      secret, algorithm="HS256")
+
+
+def run(label, config_class, tokens, total, threads):
+    app = create_app(config_class)
+
+    def call(i):
+        client = app.test_client()
+        res = client.get("/api/portfolios",
+                         headers={"Authorization": f"Bearer {tokens[i % len(tokens)]}"})
+        assert res.status_code == 200, res.get_data(as_text=True)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(call, range(total)))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {total / elapsed:>9.1f} req/s  {elapsed * 1000 / total:>8.3f} ms/req")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.03,
+                        help="Injected Supabase latency per request in seconds")
+    args = parser.parse_args()
+
+    users = [str(uuid.uuid4()) for _ in range(args.users)]
+    tokens = [mint_token(u) for u in users]
+    portfolios = [{"id": str(uuid.uuid4()), "user_id": u, "name": "Bench",
+                   "holdings_count": [{"count": 3}]} for u in users]
+
+    with StubSupabase(latency=args.latency, tables={"portfolios": portfolios}) as stub:
+        class Bench(Config):
+            SUPABASE_URL = stub.url
+            SUPABASE_JWT_SECRET = JWT_SECRET
+            SCHEDULER_ENABLED = False
+
+        class Remote(Bench):
+            AUTH_MODE = "remote"
+            AUTH_TOKEN_CACHE_SIZE = 0
+
+        class RemoteCached(Bench):
+            AUTH_MODE = "remote"
+
+        class Local(Bench):
+            AUTH_MODE = "local"
+            AUTH_REMOTE_FALLBACK = False
+
+        print(f"{args.requests} requests, {args.threads} threads, {args.users} users, "
+              f"{args.latency * 1000:.0f} ms stub latency")
+        baseline = run("remote get_user", Remote, tokens, args.requests, args.threads)
+        run("remote + token cache", RemoteCached, tokens, args.requests, args.threads)
+        local = run("local JWT verify", Local, tokens, args.requests, args.threads)
+    print(f"local vs remote: {baseline / local:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
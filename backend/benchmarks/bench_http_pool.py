@@ -0,0 +1,68 @@
+"""
+Compares one-connection-per-request (the old make_api_request behaviour) with
+the keep-alive HTTPSConnectionPool against a local stub HTTPS upstream.
+
+    python -m backend.benchmarks.bench_http_pool --requests 500 --threads 8
+"""
+import argparse
+import http.client
+import ssl
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.benchmarks.stub_upstream import StubUpstream
+from backend.utils.http_pool import HTTPSConnectionPool
+
+ENDPOINT = "/stock-quote?symbol=RELIANCE%3ANSE%2CTCS%3ANSE&language=en"
+
+
+def insecure_context() -> ssl.SSLContext:
+    ctx = ssl.create_default_context()
+    ctx.check_hostname = False
+    ctx.verify_mode = ssl.CERT_NONE
+    return ctx
+
+
+def fresh_connection_call(host: str, ctx: ssl.SSLContext) -> None:
+    conn = http.client.HTTPSConnection(host, context=ctx)
+    try:
+        conn.request("GET", ENDPOINT, headers={"x-rapidapi-host": host})
+        conn.getresponse().read()
+    finally:
+        conn.close()
+
+
+def run(label, stub, call, total, threads):
+    stub.reset_counters()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda _: call(), range(total)))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<16} {total / elapsed:>10.1f} req/s  {elapsed * 1000 / total:>8.3f} ms/req  "
+          f"{stub.connections:>6} TCP+TLS handshakes")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Injected upstream latency per request in seconds")
+    args = parser.parse_args()
+
+    ctx = insecure_context()
+    with StubUpstream(latency=args.latency) as stub:
+        pool = HTTPSConnectionPool(stub.host, maxsize=args.threads, context=ctx)
+        print(f"{args.requests} requests, {args.threads} threads, stub at {stub.host}")
+        baseline = run("new connection", stub,
+                       lambda: fresh_connection_call(stub.host, ctx), args.requests, args.threads)
+        pooled = run("keep-alive pool", stub,
+                     lambda: pool.request("GET", ENDPOINT, {"x-rapidapi-host": stub.host}),
+                     args.requests, args.threads)
+        pool.close()
+    print(f"speedup: {baseline / pooled:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
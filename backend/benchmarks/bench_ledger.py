@@ -0,0 +1,92 @@
+"""
+Times the transaction ledger on a synthetic portfolio of 100,000 trades.
+
+Builds the ledger from rows as Supabase returns them, then measures an
+appended trade, a backdated one (replayed from the nearest checkpoint, and
+with checkpoints disabled for comparison), the removal of a trade and the
+realized / unrealized P&L queries, for FIFO and average cost.
+
+    python -m backend.benchmarks.bench_ledger --trades 100000 --symbols 50
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from backend.utils.ledger import AVERAGE, BUY, FIFO, PortfolioLedger, Trade
+
+
+def synthetic_rows(trades, symbols, seed=7):
+    """Buys and sells in traded_at order over about ten years; sells never exceed the position."""
+    rng = random.Random(seed)
+    names = [f"SYM{i}:NSE" for i in range(symbols)]
+    held = dict.fromkeys(names, 0)
+    start = datetime(2015, 1, 1, tzinfo=timezone.utc)
+    step = 10 * 365 * 86400 / trades
+    rows = []
+    for i in range(trades):
+        symbol = rng.choice(names)
+        sell = held[symbol] > 0 and rng.random() < 0.4
+        quantity = rng.randint(1, held[symbol]) if sell else rng.randint(1, 100)
+        held[symbol] += -quantity if sell else quantity
+        rows.append({"id": f"t{i:07d}", "symbol": symbol, "side": "sell" if sell else "buy",
+                     "quantity": quantity, "price": round(rng.uniform(50, 5000), 2),
+                     "fees": round(rng.uniform(0, 20), 2),
+                     "traded_at": (start + timedelta(seconds=i * step)).isoformat()})
+    return rows, names
+
+
+def timed(fn, repeat=1):
+    """(milliseconds per call, last result)."""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - started) / repeat * 1000, result
+
+
+def run(rows, names, method, interval, max_checkpoints, repeat):
+    build_ms, ledger = timed(lambda: PortfolioLedger.load(rows, method, interval, max_checkpoints))
+    symbol = names[0]
+    book = ledger.books[symbol]
+    # Backdated by 2% of the symbol's history: the common "forgot to enter it" case
+    backdated = book.trades[int(len(book.trades) * 0.98)].time - 1
+
+    # PortfolioLedger.add/remove swap in the symbol's new book; time that step alone
+    def add(when):
+        return lambda: book.with_trade(Trade(when, "new", BUY, 5.0, 100.0, 0.0), strict=False)
+
+    append_ms, _ = timed(add(book.trades[-1].time + 1), repeat)
+    backdated_ms, _ = timed(add(backdated), repeat)
+    victim = book.trades[int(len(book.trades) * 0.98)].id
+    remove_ms, _ = timed(lambda: book.without_trade(victim, strict=False), repeat)
+    quotes = {name: {"symbol": name, "price": 1000.0} for name in names}
+    realized_ms, _ = timed(ledger.realized, repeat)
+    window_ms, _ = timed(lambda: ledger.realized(1.5e9, 1.6e9), repeat)
+    unrealized_ms, _ = timed(lambda: ledger.unrealized(quotes), repeat)
+    return {"build": build_ms, "append": append_ms, "backdated": backdated_ms, "remove": remove_ms,
+            "realized": realized_ms, "realized window": window_ms, "unrealized": unrealized_ms,
+            "per symbol": len(book.trades)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--trades", type=int, default=100_000)
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--interval", type=int, default=1000, help="Trades between checkpoints")
+    parser.add_argument("--max-checkpoints", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rows, names = synthetic_rows(args.trades, args.symbols)
+    print(f"{args.trades} trades over {args.symbols} symbols")
+    columns = ("build", "append", "backdated", "remove", "realized", "realized window", "unrealized")
+    print(f"{'variant':<28}" + "".join(f"{c:>17}" for c in columns))
+    for method in (FIFO, AVERAGE):
+        for label, interval in (("checkpoints", args.interval), ("no checkpoints", args.trades + 1)):
+            result = run(rows, names, method, interval, args.max_checkpoints, args.repeat)
+            print(f"{method + ', ' + label:<28}" + "".join(f"{result[c]:>14.2f} ms" for c in columns))
+    print(f"(one symbol holds ~{result['per symbol']} trades; a write replays only that symbol)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+"""
+Replays a realistic traffic mix against the app and records per-endpoint throughput and latency percentiles.
+
+Starts create_app (or the ASGI app with --mode asgi) in its own process
+against local stand-ins for the RapidAPI stock host, the news host and
+Supabase, each with injected latency. Synthetic users with several
+portfolios then refresh their dashboard, open portfolios, search and browse
+the public market pages over keep-alive connections. Throughput and
+p50/p95/p99 latency are reported for every endpoint and saved as JSON;
+--compare checks a run against an earlier result file.
+
+    python -m backend.benchmarks.bench_load --requests 5000 --concurrency 50 --latency 0.05
+    python -m backend.benchmarks.bench_load --compare backend/benchmarks/results/<baseline>.json --max-regression 15
+"""
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.benchmarks.bench_asgi import PooledWSGIServer, bench_config, fetch, percentile
+from backend.benchmarks.bench_auth import mint_token
+from backend.benchmarks.bench_http_pool import insecure_context
+from backend.benchmarks.stub_upstream import StubSupabase, StubUpstream
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+SYMBOLS_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "symbols.csv")
+
+# Relative weight of each user action. Each action is one request, labelled by endpoint.
+TRAFFIC_MIXES = {
+    "default": {"dashboard": 30, "portfolio": 25, "search": 15, "popular": 10,
+                "trends": 8, "news": 7, "quote": 5},
+    "dashboard": {"dashboard": 80, "portfolio": 20},
+    "browse": {"search": 40, "popular": 20, "trends": 20, "news": 15, "quote": 5},
+}
+
+# Search prefixes a user types; the last few miss the local index and go upstream
+SEARCH_TERMS = ["rel", "tata", "infy", "hdfc", "icici", "bajaj", "wipro", "adani", "maruti",
+                "sbi", "itc", "asian", "zzqx", "qwyz", "nonesuch"]
+
+
+def load_symbols() -> List[str]:
+    with open(SYMBOLS_CSV, newline="", encoding="utf-8") as f:
+        return [row["symbol"] for row in csv.DictReader(f)]
+
+
+def make_users(count: int, portfolios: int, holdings: int, seed: int) -> Tuple[List[Dict[str, Any]], Dict[str, list]]:
+    """Synthetic users and the Supabase tables holding their portfolios."""
+    rng = random.Random(seed)
+    symbols = load_symbols()
+    users, rows = [], []
+    for _ in range(count):
+        user_id = str(uuid.uuid4())
+        portfolio_ids = []
+        for p in range(portfolios):
+            portfolio_id = str(uuid.uuid4())
+            portfolio_ids.append(portfolio_id)
+            rows.append({"id": portfolio_id, "user_id": user_id, "name": f"Portfolio {p + 1}",
+                         "description": "", "created_at": f"2026-01-{p % 28 + 1:02d}T00:00:00Z",
+                         "holdings": [{"id": str(uuid.uuid4()), "symbol": s,
+                                       "quantity": rng.randint(1, 100),
+                                       "purchase_price": round(rng.uniform(50, 5000), 2)}
+                                      for s in rng.sample(symbols, min(holdings, len(symbols)))]})
+        users.append({"id": user_id, "token": mint_token(user_id, ttl=24 * 3600),
+                      "portfolios": portfolio_ids})
+    return users, {"portfolios": rows}
+
+
+def make_requests(users: List[Dict[str, Any]], mix: Dict[str, int], total: int,
+                  seed: int) -> List[Tuple[str, str, Optional[str]]]:
+    """(endpoint label, path, bearer token or None) for each request, in replay order."""
+    rng = random.Random(seed)
+    symbols = load_symbols()
+    actions, weights = zip(*mix.items())
+    requests = []
+    for action in rng.choices(actions, weights=weights, k=total):
+        user = rng.choice(users)
+        if action == "dashboard":
+            requests.append(("GET /api/dashboard", "/api/dashboard", user["token"]))
+        elif action == "portfolio":
+            requests.append(("GET /api/portfolios/<id>/valuation",
+                             f"/api/portfolios/{rng.choice(user['portfolios'])}/valuation", user["token"]))
+        elif action == "search":
+            term = rng.choice(SEARCH_TERMS)
+            requests.append(("GET /api/search", f"/api/search?query={term[:rng.randint(2, len(term))]}", None))
+        elif action == "popular":
+            requests.append(("GET /api/popular-stocks", "/api/popular-stocks", None))
+        elif action == "trends":
+            requests.append(("GET /api/market-trends", "/api/market-trends", None))
+        elif action == "news":
+            requests.append(("GET /api/business-news", f"/api/business-news?limit={rng.choice([8, 8, 20])}", None))
+        elif action == "quote":
+            requests.append(("GET /api/quote", f"/api/quote?symbols={','.join(rng.sample(symbols, 3))}", None))
+    return requests
+
+
+def serve_stubs(ready, latency, tables):
+    stock = StubUpstream(latency=latency).start()
+    news = StubUpstream(latency=latency).start()
+    supabase = StubSupabase(latency=latency, tables=tables).start()
+    ready.put((stock.host, news.host, supabase.url))
+    while True:
+        time.sleep(3600)
+
+
+def load_config(stock_host, news_host, supabase_url):
+    class Load(bench_config(stock_host, supabase_url)):
+        RAPIDAPI_NEWS_HOST = news_host
+        RAPIDAPI_NEWS_KEY = "bench"
+        HISTORY_DIR = ""
+    return Load
+
+
+def serve_app(mode, port, stock_host, news_host, supabase_url, workers):
+    import backend.extensions as ext
+    from backend.utils.http_pool import PoolManager
+
+    config_class = load_config(stock_host, news_host, supabase_url)
+    if mode == "wsgi":
+        from backend import create_app
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)
+        app = create_app(config_class)
+        ext.http_pools = PoolManager(maxsize=workers, context=insecure_context())
+        PooledWSGIServer("127.0.0.1", port, app, workers).serve_forever()
+    else:
+        from hypercorn.asyncio import serve
+        from hypercorn.config import Config as HypercornConfig
+        from backend.asgi import create_async_app
+        app = create_async_app(config_class, ssl_context=insecure_context())
+        ext.http_pools = PoolManager(context=insecure_context())
+        server_config = HypercornConfig()
+        server_config.bind = [f"127.0.0.1:{port}"]
+        server_config.backlog = 1024
+        server_config.accesslog = None
+        asyncio.run(serve(app, server_config))
+
+
+async def replay(host, requests, concurrency):
+    """
+    Sends `requests` over `concurrency` keep-alive connections. Returns the
+    elapsed time and, per endpoint label, (latency, status) samples.
+    """
+    samples: Dict[str, List[Tuple[float, int]]] = {}
+    queue = iter(requests)
+
+    for _ in range(100):
+        try:
+            if (await fetch(None, host, "/api/health", {}))[0] == 200:
+                break
+        except OSError:
+            await asyncio.sleep(0.2)
+
+    async def worker():
+        conn = None
+        for label, path, token in queue:
+            headers = {"Authorization": f"Bearer {token}"} if token else {}
+            start = time.perf_counter()
+            try:
+                status, conn = await fetch(conn, host, path, headers)
+            except (OSError, asyncio.IncompleteReadError, ValueError):
+                status, conn = 0, None
+            samples.setdefault(label, []).append((time.perf_counter() - start, status))
+        if conn is not None:
+            conn[1].close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start, samples
+
+
+def summarize(samples: List[Tuple[float, int]], elapsed: float) -> Dict[str, Any]:
+    latencies = sorted(latency for latency, _ in samples)
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for _, status in samples if not 200 <= status < 400),
+        "throughput_rps": round(len(samples) / elapsed, 2),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2),
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(result: Dict[str, Any]) -> None:
+    print(f"{'endpoint':<38} {'req':>6} {'err':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for label, s in list(result["endpoints"].items()) + [("all", result["overall"])]:
+        print(f"{label:<38} {s['requests']:>6} {s['errors']:>5} {s['throughput_rps']:>8.1f} "
+              f"{s['p50_ms']:>8.1f} {s['p95_ms']:>8.1f} {s['p99_ms']:>8.1f}")
+
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """Prints p95 and throughput changes against `baseline`; returns the regressions beyond the threshold."""
+    print(f"\nvs {baseline['meta'].get('revision') or 'baseline'} ({baseline['meta']['started_at']})")
+    regressions = []
+    rows = list(result["endpoints"].items()) + [("all", result["overall"])]
+    for label, current in rows:
+        before = baseline["overall"] if label == "all" else baseline["endpoints"].get(label)
+        if not before:
+            continue
+        p95 = (current["p95_ms"] / before["p95_ms"] - 1) * 100 if before["p95_ms"] else 0.0
+        rps = (current["throughput_rps"] / before["throughput_rps"] - 1) * 100 if before["throughput_rps"] else 0.0
+        flag = ""
+        if p95 > max_regression:
+            regressions.append(f"{label}: p95 {before['p95_ms']} -> {current['p95_ms']} ms ({p95:+.1f}%)")
+            flag = "  REGRESSION"
+        print(f"{label:<38} p95 {p95:>+7.1f}%  throughput {rps:>+7.1f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mode", choices=("wsgi", "asgi"), default="wsgi")
+    parser.add_argument("--mix", choices=sorted(TRAFFIC_MIXES), default="default")
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--warmup", type=int, default=200, help="Requests replayed first and not recorded")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.05,
+                        help="Injected stub latency per RapidAPI/Supabase request in seconds")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--portfolios", type=int, default=3, help="Portfolios per user")
+    parser.add_argument("--holdings", type=int, default=15, help="Holdings per portfolio")
+    parser.add_argument("--sync-workers", type=int, default=16, help="Worker threads for the WSGI server")
+    parser.add_argument("--port", type=int, default=5103)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Result file (default: results/load-<mode>-<timestamp>.json)")
+    parser.add_argument("--compare", help="Earlier result file to compare against")
+    parser.add_argument("--max-regression", type=float, default=10.0,
+                        help="With --compare, exit 1 if any endpoint's p95 grew by more than this percent")
+    args = parser.parse_args()
+
+    users, tables = make_users(args.users, args.portfolios, args.holdings, args.seed)
+    warmup = make_requests(users, TRAFFIC_MIXES[args.mix], args.warmup, args.seed + 1)
+    requests = make_requests(users, TRAFFIC_MIXES[args.mix], args.requests, args.seed)
+
+    ready = multiprocessing.Queue()
+    stubs = multiprocessing.Process(target=serve_stubs, args=(ready, args.latency, tables), daemon=True)
+    stubs.start()
+    try:
+        stock_host, news_host, supabase_url = ready.get(timeout=30)
+        server = multiprocessing.Process(
+            target=serve_app, daemon=True,
+            args=(args.mode, args.port, stock_host, news_host, supabase_url, args.sync_workers))
+        server.start()
+        try:
+            host = ("127.0.0.1", args.port)
+            print(f"{args.mode}: {args.requests} requests ({args.mix} mix), concurrency {args.concurrency}, "
+                  f"{args.latency * 1000:.0f} ms stub latency, {args.users} users x {args.portfolios} "
+                  f"portfolios x {args.holdings} holdings")
+            started_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+            if warmup:
+                asyncio.run(replay(host, warmup, args.concurrency))
+            elapsed, samples = asyncio.run(replay(host, requests, args.concurrency))
+        finally:
+            server.terminate()
+            server.join()
+    finally:
+        stubs.terminate()
+
+    result = {
+        "meta": {"started_at": started_at, "revision": git_revision(), "python": sys.version.split()[0],
+                 "elapsed_s": round(elapsed, 3), **{k: v for k, v in vars(args).items()
+                                                     if k not in ("output", "compare", "max_regression")}},
+        "overall": summarize([s for label_samples in samples.values() for s in label_samples], elapsed),
+        "endpoints": {label: summarize(samples[label], elapsed) for label in sorted(samples)},
+    }
+    print_report(result)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"load-{args.mode}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nSaved {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(result, json.load(f), args.max_regression)
+        if regressions:
+            print("\n".join(["", "p95 regressions:"] + regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
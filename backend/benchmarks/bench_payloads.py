@@ -0,0 +1,140 @@
+"""
+Measures CPU time, peak memory and bytes per request for a 1,000-symbol quote batch.
+
+Compares the response path before response shaping (stdlib json on decoded
+text, full upstream quote objects, sorted keys) with the current one
+(fast_json straight from bytes, QUOTE_FIELDS projection, gzip or brotli),
+then times /api/quote end to end through create_app against the stub
+upstream running in another process, so only the app's CPU is counted.
+
+    python -m backend.benchmarks.bench_payloads --symbols 1000 --repeat 20
+"""
+import argparse
+import json
+import multiprocessing
+import time
+import tracemalloc
+
+from backend.benchmarks.bench_http_pool import insecure_context
+from backend.benchmarks.stub_upstream import StubUpstream, fake_payload
+from backend.utils import fast_json
+from backend.utils.compression import brotli, compress
+from backend.utils.response_shaping import QUOTE_FIELDS, project
+
+
+def upstream_bodies(symbols, batch_size):
+    """Raw /stock-quote response bodies for `symbols`, as the upstream sends them."""
+    return [json.dumps(fake_payload("/stock-quote", {"symbol": ",".join(symbols[i:i + batch_size])})).encode()
+            for i in range(0, len(symbols), batch_size)]
+
+
+def legacy_response(bodies, encoding=None):
+    results = [json.loads(body.decode("utf-8")) for body in bodies]
+    data = [item for result in results for item in result["data"]]
+    # Flask's default provider: sorted keys, ASCII-escaped, compact
+    return json.dumps({"status": "OK", "data": data}, sort_keys=True, separators=(",", ":")).encode() + b"\n"
+
+
+def shaped_response(bodies, encoding=None):
+    results = [fast_json.loads(body) for body in bodies]
+    data = [project(item, QUOTE_FIELDS) for result in results for item in result["data"]]
+    body = fast_json.dumps({"status": "OK", "data": data}) + b"\n"
+    return compress(body, encoding) if encoding else body
+
+
+def measure(fn, bodies, repeat, encoding=None):
+    """(CPU ms per call, peak traced KiB of one call, output bytes)."""
+    fn(bodies, encoding)  # warm up
+    started = time.process_time()
+    for _ in range(repeat):
+        out = fn(bodies, encoding)
+    cpu = (time.process_time() - started) / repeat
+    tracemalloc.start()
+    fn(bodies, encoding)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return cpu * 1000, peak / 1024, len(out)
+
+
+def serve_stub(ready):
+    stub = StubUpstream().start()
+    ready.put(stub.host)
+    while True:
+        time.sleep(3600)
+
+
+def measure_app(symbols, repeat, encoding):
+    """CPU ms, peak KiB and bytes per /api/quote call through create_app, with a cold quote cache."""
+    from backend import create_app
+    from backend.benchmarks.bench_asgi import bench_config
+    import backend.extensions as ext
+    from backend.utils.http_pool import PoolManager
+    from backend.utils.quote_cache import QuoteCache
+
+    ready = multiprocessing.Queue()
+    stub = multiprocessing.Process(target=serve_stub, args=(ready,), daemon=True)
+    stub.start()
+    try:
+        host = ready.get(timeout=30)
+
+        class Bench(bench_config(host, "http://127.0.0.1:9")):
+            HISTORY_DIR = ""
+        app = create_app(Bench)
+        ext.http_pools = PoolManager(context=insecure_context())
+        client = app.test_client()
+        path = f"/api/quote?symbols={','.join(symbols)}"
+        headers = {"Accept-Encoding": encoding} if encoding else {}
+
+        def call():
+            ext.quote_cache = QuoteCache(ttl=30, max_size=len(symbols) * 2)
+            response = client.get(path, headers=headers)
+            assert response.status_code == 200, response.status_code
+            return len(response.get_data())
+
+        call()
+        cpu = 0.0
+        for _ in range(repeat):
+            started = time.process_time()
+            size = call()
+            cpu += time.process_time() - started
+        tracemalloc.start()
+        call()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return cpu / repeat * 1000, peak / 1024, size
+    finally:
+        stub.terminate()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--symbols", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=20, help="Symbols per upstream request")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    symbols = [f"SYM{i}:NSE" for i in range(args.symbols)]
+    bodies = upstream_bodies(symbols, args.batch_size)
+    print(f"{args.symbols} symbols in {len(bodies)} upstream batches "
+          f"({sum(map(len, bodies)) / 1024:.0f} KiB), json encoder: {'orjson' if fast_json.orjson else 'stdlib'}")
+    print(f"{'variant':<34} {'cpu ms':>8} {'peak KiB':>9} {'bytes':>9}")
+    rows = [("before: stdlib, full objects", legacy_response, None),
+            ("shaped: fast json, projected", shaped_response, None),
+            ("shaped + gzip", shaped_response, "gzip")]
+    if brotli is not None:
+        rows.append(("shaped + brotli", shaped_response, "br"))
+    baseline = None
+    for label, fn, encoding in rows:
+        cpu, peak, size = measure(fn, bodies, args.repeat, encoding)
+        baseline = baseline or (cpu, peak, size)
+        print(f"{label:<34} {cpu:>8.2f} {peak:>9.0f} {size:>9}  "
+              f"(cpu {cpu / baseline[0]:.2f}x, memory {peak / baseline[1]:.2f}x, size {size / baseline[2]:.2f}x)")
+
+    print("\n/api/quote end to end (create_app, cold quote cache)")
+    for encoding in (None, "gzip"):
+        cpu, peak, size = measure_app(symbols, max(args.repeat // 4, 3), encoding)
+        print(f"{'identity' if encoding is None else encoding:<34} {cpu:>8.2f} {peak:>9.0f} {size:>9}")
+
+
+if __name__ == "__main__":
+    main()
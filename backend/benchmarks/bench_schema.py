@@ -0,0 +1,159 @@
+"""
+Loads ~1M holdings into a local Postgres and compares query plans and timings
+for the portfolio listing and holdings lookups before and after
+migrations/001_holdings_indexes_and_summaries.sql.
+
+    python -m backend.benchmarks.bench_schema --dsn postgresql://postgres@localhost/bench
+
+Needs `psql` on PATH and a throwaway database: it creates a stub `auth` schema
+(users table, uid() reading request.jwt.claim.sub, `authenticated` role) and
+drops/recreates portfolios, holdings and portfolio_summaries.
+"""
+import argparse
+import os
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+MIGRATION = os.path.join(ROOT, "migrations", "001_holdings_indexes_and_summaries.sql")
+
+# The tables and policies as the original supabase_setup.sql created them.
+BASELINE_SCHEMA = """
+DROP TABLE IF EXISTS portfolio_summaries, holdings, portfolios CASCADE;
+DROP SCHEMA IF EXISTS auth CASCADE;
+CREATE SCHEMA auth;
+CREATE TABLE auth.users (id UUID PRIMARY KEY);
+CREATE FUNCTION auth.uid() RETURNS UUID LANGUAGE sql STABLE AS
+  $$ SELECT NULLIF(current_setting('request.jwt.claim.sub', true), '')::uuid $$;
+DO $$ BEGIN
+  IF NOT EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'authenticated') THEN
+    CREATE ROLE authenticated NOLOGIN;
+  END IF;
+END $$;
+GRANT USAGE ON SCHEMA auth TO authenticated;
+
+CREATE TABLE portfolios (
+  id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+  user_id UUID REFERENCES auth.users(id) ON DELETE CASCADE NOT NULL,
+  name TEXT NOT NULL,
+  description TEXT,
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+CREATE TABLE holdings (
+  id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+  portfolio_id UUID REFERENCES portfolios(id) ON DELETE CASCADE NOT NULL,
+  symbol TEXT NOT NULL,
+  quantity DECIMAL NOT NULL,
+  purchase_price DECIMAL NOT NULL,
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+ALTER TABLE portfolios ENABLE ROW LEVEL SECURITY;
+ALTER TABLE holdings ENABLE ROW LEVEL SECURITY;
+GRANT ALL ON portfolios, holdings TO authenticated;
+CREATE POLICY "Users can insert own portfolios" ON portfolios FOR INSERT TO authenticated
+  WITH CHECK (auth.uid() = user_id);
+CREATE POLICY "Users can view own portfolios" ON portfolios FOR SELECT TO authenticated
+  USING (auth.uid() = user_id);
+CREATE POLICY "Users can update own portfolios" ON portfolios FOR UPDATE TO authenticated
+  USING (auth.uid() = user_id) WITH CHECK (auth.uid() = user_id);
+CREATE POLICY "Users can delete own portfolios" ON portfolios FOR DELETE TO authenticated
+  USING (auth.uid() = user_id);
+CREATE POLICY "Users can insert own holdings" ON holdings FOR INSERT TO authenticated
+  WITH CHECK (EXISTS (SELECT 1 FROM portfolios
+    WHERE portfolios.id = holdings.portfolio_id AND portfolios.user_id = auth.uid()));
+CREATE POLICY "Users can view own holdings" ON holdings FOR SELECT TO authenticated
+  USING (EXISTS (SELECT 1 FROM portfolios
+    WHERE portfolios.id = holdings.portfolio_id AND portfolios.user_id = auth.uid()));
+CREATE POLICY "Users can update own holdings" ON holdings FOR UPDATE TO authenticated
+  USING (EXISTS (SELECT 1 FROM portfolios
+    WHERE portfolios.id = holdings.portfolio_id AND portfolios.user_id = auth.uid()))
+  WITH CHECK (EXISTS (SELECT 1 FROM portfolios
+    WHERE portfolios.id = holdings.portfolio_id AND portfolios.user_id = auth.uid()));
+CREATE POLICY "Users can delete own holdings" ON holdings FOR DELETE TO authenticated
+  USING (EXISTS (SELECT 1 FROM portfolios
+    WHERE portfolios.id = holdings.portfolio_id AND portfolios.user_id = auth.uid()));
+"""
+
+LOAD_DATA = """
+INSERT INTO auth.users (id) SELECT gen_random_uuid() FROM generate_series(1, {users});
+INSERT INTO portfolios (user_id, name)
+SELECT u.id, 'Portfolio ' || n FROM auth.users u, generate_series(1, {portfolios_per_user}) n;
+INSERT INTO holdings (portfolio_id, symbol, quantity, purchase_price)
+SELECT p.id, 'SYM' || (random() * 2000)::int || ':NSE',
+       1 + (random() * 100)::int, round((10 + random() * 3000)::numeric, 2)
+FROM portfolios p, generate_series(1, {holdings_per_portfolio});
+ANALYZE;
+SELECT count(*) AS holdings FROM holdings;
+"""
+
+# One user and one of their portfolios, picked once so both phases query the same rows.
+PICK_TARGETS = """
+SELECT user_id AS uid, id AS pid FROM portfolios ORDER BY id LIMIT 1 \\gset
+"""
+
+QUERIES = {
+    "baseline": {
+        # What PostgREST runs for select('*, holdings_count:holdings(count)')
+        "list portfolios + holdings count": """
+SELECT p.*, (SELECT count(*) FROM holdings h WHERE h.portfolio_id = p.id) AS holdings_count
+FROM portfolios p WHERE p.user_id = :'uid'""",
+    },
+    "migrated": {
+        "list portfolios + summary": """
+SELECT p.*, s.holdings_count, s.total_quantity, s.total_cost
+FROM portfolios p LEFT JOIN portfolio_summaries s ON s.portfolio_id = p.id
+WHERE p.user_id = :'uid'""",
+    },
+    "both": {
+        "holdings of one portfolio": "SELECT * FROM holdings WHERE portfolio_id = :'pid'",
+        "portfolio with embedded holdings": """
+SELECT p.id, (SELECT json_agg(h) FROM holdings h WHERE h.portfolio_id = p.id) AS holdings
+FROM portfolios p WHERE p.id = :'pid' AND p.user_id = :'uid'""",
+    },
+}
+
+
+def timed_section(phase: str, repeat: int) -> str:
+    """psql script running each query under RLS as the picked user, with plan and timings."""
+    sql = ["SET ROLE authenticated;", "SELECT set_config('request.jwt.claim.sub', :'uid', false);",
+           "\\timing on"]
+    for label, query in {**QUERIES[phase], **QUERIES["both"]}.items():
+        sql.append(f"\\echo '--- [{phase}] {label}'")
+        sql.append(f"EXPLAIN (ANALYZE, BUFFERS, COSTS OFF) {query.strip()};")
+        sql.append(f"\\echo '[{phase}] {label}: {repeat} runs'")
+        sql.append("\\o /dev/null")
+        sql.extend([f"{query.strip()};"] * repeat)
+        sql.append("\\o")
+    sql.extend(["\\timing off", "RESET ROLE;"])
+    return "\n".join(sql) + "\n"
+
+
+def psql(dsn: str, script: str) -> None:
+    subprocess.run(["psql", "-X", "-q", "-v", "ON_ERROR_STOP=1", dsn],
+                   input=script, text=True, check=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dsn", default=os.getenv("BENCH_DATABASE_URL", "postgresql://postgres@localhost/postgres"))
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--portfolios-per-user", type=int, default=5)
+    parser.add_argument("--holdings-per-portfolio", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with open(MIGRATION) as f:
+        migration = f.read()
+
+    load = LOAD_DATA.format(users=args.users, portfolios_per_user=args.portfolios_per_user,
+                            holdings_per_portfolio=args.holdings_per_portfolio)
+    script = (BASELINE_SCHEMA + load + PICK_TARGETS + timed_section("baseline", args.repeat)
+              + "\\echo '=== applying migration'\n\\timing on\n" + migration + "\\timing off\nANALYZE;\n"
+              + "GRANT SELECT ON portfolio_summaries TO authenticated;\n"
+              + timed_section("migrated", args.repeat))
+    psql(args.dsn, script)
+
+
+if __name__ == "__main__":
+    main()
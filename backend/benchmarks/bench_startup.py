@@ -0,0 +1,103 @@
+"""
+Measures cold start and forked-worker start of the Flask app factory.
+
+Each run is a fresh interpreter that times `import backend`, create_app, a
+worker forked right after create_app serving its first Supabase-backed
+request (against a local stub), as under a pre-forking server, and then the
+first public and first Supabase-backed requests of the process itself.
+"eager" imports the Supabase SDK with the app and builds the client in
+create_app, as the app did before clients were created on first use;
+"preload" sets SUPABASE_PRELOAD.
+
+    python -m backend.benchmarks.bench_startup --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from backend.benchmarks.stub_upstream import StubSupabase
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Run with -c: `python -m` would import the backend package before the clock starts
+CHILD = r"""
+import json, os, resource, sys, time, uuid
+mode, supabase_url = sys.argv[1], sys.argv[2]
+started = time.perf_counter()
+import backend
+if mode == "eager":
+    import supabase
+imported = time.perf_counter()
+
+from backend.benchmarks.bench_asgi import bench_config
+from backend.benchmarks.bench_auth import mint_token
+import backend.extensions as ext
+
+class Bench(bench_config("127.0.0.1:9", supabase_url)):
+    HISTORY_DIR = ""
+
+t = time.perf_counter()
+app = backend.create_app(Bench)
+if mode == "eager":
+    ext.supabase.get()
+created = time.perf_counter()
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+client = app.test_client()
+
+def timed_get(path, token=None):
+    t = time.perf_counter()
+    res = client.get(path, headers={"Authorization": f"Bearer {token}"} if token else {})
+    assert res.status_code == 200, (path, res.status_code, res.get_data(as_text=True))
+    return (time.perf_counter() - t) * 1000
+
+# A worker forked straight after create_app, as a pre-forking server's master does
+read_end, write_end = os.pipe()
+forked = time.perf_counter()
+pid = os.fork()
+if pid == 0:
+    timed_get("/api/portfolios", mint_token(str(uuid.uuid4())))
+    os.write(write_end, str((time.perf_counter() - forked) * 1000).encode())
+    os._exit(0)
+os.close(write_end)
+fork_first = float(os.read(read_end, 64))
+os.waitpid(pid, 0)
+
+health = timed_get("/api/health")
+first_db = timed_get("/api/portfolios", mint_token(str(uuid.uuid4())))
+
+print(json.dumps({"import": (imported - started) * 1000, "create_app": (created - t) * 1000,
+                  "first health": health, "first db": first_db, "fork + first db": fork_first,
+                  "rss MiB": rss}))
+"""
+
+COLUMNS = ("import", "create_app", "fork + first db", "first health", "first db", "rss MiB")
+
+
+def run_child(mode, supabase_url):
+    env = dict(os.environ, PYTHONPATH=PROJECT_ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""),
+               SCHEDULER_ENABLED="false", SUPABASE_PRELOAD=str(mode == "preload").lower())
+    out = subprocess.run([sys.executable, "-c", CHILD, mode, supabase_url], cwd=PROJECT_ROOT, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    with StubSupabase() as stub:
+        print(f"median of {args.runs} fresh interpreters (ms unless noted)")
+        print(f"{'mode':<8}" + "".join(f"{c:>17}" for c in COLUMNS))
+        for mode in ("eager", "lazy", "preload"):
+            runs = [run_child(mode, stub.url) for _ in range(args.runs)]
+            medians = [statistics.median(r[c] for r in runs) for c in COLUMNS]
+            print(f"{mode:<8}" + "".join(f"{m:>17.1f}" for m in medians))
+    print("(an eager worker shares the client it inherited from the parent)")
+
+
+if __name__ == "__main__":
+    main()
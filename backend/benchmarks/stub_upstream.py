@@ -0,0 +1,211 @@
+"""
+Local stand-ins for the RapidAPI stock and news hosts and for Supabase, used by
+the benchmarks. Serve canned JSON over HTTPS (self-signed cert) or plain HTTP
+with optional injected latency, and count TCP connections and requests per path.
+"""
+import base64
+import json
+import os
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+
+def make_self_signed_cert(directory: str) -> Tuple[str, str]:
+    """Creates a throwaway localhost certificate with the openssl CLI."""
+    cert, key = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+                    "-subj", "/CN=localhost", "-keyout", key, "-out", cert],
+                   check=True, capture_output=True)
+    return cert, key
+
+
+def fake_quote(symbol: str) -> Dict[str, Any]:
+    seed = sum(map(ord, symbol)) % 1000
+    price = 100.0 + seed
+    return {"symbol": symbol, "name": symbol.split(":")[0].title(), "type": "stock",
+            "price": price, "open": price - 1.5, "high": price + 3.0, "low": price - 4.0,
+            "volume": 100000 + seed * 37, "previous_close": price - 2.0, "change": 2.0,
+            "change_percent": round(200.0 / price, 4), "currency": "INR",
+            "exchange": symbol.split(":")[-1], "last_update_utc": "2026-01-01 10:00:00",
+            # Returned by RapidAPI as well, though nothing downstream reads them
+            "pre_or_post_market": None, "pre_or_post_market_change": None,
+            "pre_or_post_market_change_percent": None, "exchange_open": "2026-01-01 09:15:00",
+            "exchange_close": "2026-01-01 15:30:00", "timezone": "Asia/Kolkata", "utc_offset_sec": 19800,
+            "country_code": "IN", "google_mid": f"/g/11{seed:07d}bq", "fifty_two_week_high": price * 1.3,
+            "fifty_two_week_low": price * 0.7, "year_change_percent": 12.5}
+
+
+def fake_payload(path: str, params: Dict[str, str]) -> Dict[str, Any]:
+    if path == "/stock-quote":
+        symbols = [s for s in params.get("symbol", "").split(",") if s]
+        return {"status": "OK", "data": [fake_quote(s) for s in symbols]}
+    if path == "/market-trends":
+        trends = [fake_quote(f"STOCK{i}:NSE") for i in range(20)]
+        return {"status": "OK", "data": {"trends": trends}}
+    if path == "/search":
+        q = params.get("query", "").upper()
+        return {"status": "OK", "data": {"stock": [fake_quote(f"{q}{i}:NSE") for i in range(5)]}}
+    if path == "/stock-time-series":
+        base = fake_quote(params.get("symbol", ""))["price"]
+        series = {f"2025-{1 + i // 28:02d}-{1 + i % 28:02d} 15:30:00": {"price": base + i % 7, "volume": 1000 + i}
+                  for i in range(250)}
+        return {"status": "OK", "data": {"utc_offset_sec": 19800, "time_series": series}}
+    if path == "/topic-headlines":
+        limit = int(params.get("limit", 100))
+        return {"status": "OK", "data": [
+            {"title": f"Headline {i}", "link": f"https://news.example/{i}",
+             "photo_url": None, "source_name": "Stub", "published_datetime_utc": "2026-01-01T00:00:00Z"}
+            for i in range(limit)]}
+    return {"status": "error", "message": f"Unknown endpoint {path}"}
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops SYNs (multi-second retransmits) under concurrent load
+    request_queue_size = 1024
+
+
+class StubServer:
+    """Threaded keep-alive HTTP(S) server; subclasses implement `handle`."""
+
+    def __init__(self, latency: float = 0.0, use_tls: bool = True, port: int = 0):
+        self.latency = latency
+        self.connections = 0
+        self.requests = 0
+        self.paths: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._tmpdir: Optional[tempfile.TemporaryDirectory] = None
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+
+            def _dispatch(self):
+                url = urlparse(self.path)
+                with stub._lock:
+                    stub.requests += 1
+                    stub.paths[url.path] = stub.paths.get(url.path, 0) + 1
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                if stub.latency:
+                    time.sleep(stub.latency)
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                status, payload = stub.handle(self.command, url.path, params, self.headers, body)
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PATCH = do_DELETE = _dispatch
+
+            def log_message(self, *args):
+                pass
+
+        self.server = _Server(("127.0.0.1", port), Handler)
+        if use_tls:
+            self._tmpdir = tempfile.TemporaryDirectory()
+            cert, key = make_self_signed_cert(self._tmpdir.name)
+            ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            ctx.load_cert_chain(cert, key)
+            # Handshake lazily in the per-connection thread rather than in accept()
+            self.server.socket = ctx.wrap_socket(self.server.socket, server_side=True,
+                                                 do_handshake_on_connect=False)
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def handle(self, method: str, path: str, params: Dict[str, str], headers: Any,
+               body: bytes) -> Tuple[int, Any]:
+        raise NotImplementedError
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.connections = self.requests = 0
+            self.paths = {}
+
+    @property
+    def host(self) -> str:
+        return f"127.0.0.1:{self.server.server_address[1]}"
+
+    @property
+    def url(self) -> str:
+        return f"{'https' if self._tmpdir else 'http'}://{self.host}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        if self._tmpdir:
+            self._tmpdir.cleanup()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+class StubUpstream(StubServer):
+    """Answers like the RapidAPI stock and news hosts."""
+
+    def handle(self, method, path, params, headers, body):
+        return 200, fake_payload(path, params)
+
+
+class StubSupabase(StubServer):
+    """
+    Minimal Supabase stand-in: /auth/v1/user echoes the bearer token's claims
+    (without checking the signature) and /rest/v1/<table> serves rows from
+    `tables`, honouring only `eq.` filters and offset/limit. Plain HTTP by default.
+    """
+
+    def __init__(self, latency: float = 0.0, use_tls: bool = False, port: int = 0,
+                 tables: Optional[Dict[str, list]] = None):
+        super().__init__(latency=latency, use_tls=use_tls, port=port)
+        self.tables: Dict[str, list] = tables if tables is not None else {}
+
+    def handle(self, method, path, params, headers, body):
+        if path == "/auth/v1/user":
+            token = (headers.get("Authorization") or "").replace("Bearer ", "")
+            try:
+                claims = json.loads(base64.urlsafe_b64decode(token.split(".")[1] + "=="))
+            except Exception:
+                return 401, {"msg": "invalid JWT"}
+            return 200, {"id": claims.get("sub"), "aud": claims.get("aud", "authenticated"),
+                         "role": claims.get("role"), "email": claims.get("email"),
+                         "app_metadata": {}, "user_metadata": {},
+                         "created_at": "2026-01-01T00:00:00Z"}
+        if path.startswith("/rest/v1/"):
+            rows = self.tables.setdefault(path[len("/rest/v1/"):], [])
+            filters = {k: v[3:] for k, v in params.items() if v.startswith("eq.")}
+            matched = [r for r in rows if all(str(r.get(k)) == v for k, v in filters.items())]
+            if method == "POST":
+                new = json.loads(body or b"[]")
+                new = new if isinstance(new, list) else [new]
+                for row in new:
+                    row.setdefault("id", str(uuid.uuid4()))
+                rows.extend(new)
+                return 201, new
+            if method == "DELETE":
+                for r in matched:
+                    rows.remove(r)
+            offset = int(params.get("offset", 0))
+            limit = int(params["limit"]) if "limit" in params else None
+            return 200, matched[offset:offset + limit if limit is not None else None]
+        return 404, {"message": f"Unknown endpoint {path}"}
@@ -23,6 +23,140 @@ class Config:
     SUPABASE_URL = os.getenv("VITE_SUPABASE_URL")
     SUPABASE_KEY = os.getenv("VITE_SUPABASE_KEY")
     SUPABASE_SERVICE_ROLE_KEY = os.getenv("VITE_SUPABASE_SERVICE_ROLE_KEY")
+    # Clients are built on first use in each process. SUPABASE_PRELOAD builds them in
+    # create_app, so a pre-forking server imports the SDK once, before workers fork
+    SUPABASE_PRELOAD = os.getenv("SUPABASE_PRELOAD", "false").lower() == "true"
+
+    # Per-symbol quote cache shared by /api/quote and /api/popular-stocks
+    QUOTE_CACHE_TTL = float(os.getenv("QUOTE_CACHE_TTL", "30"))
+    QUOTE_CACHE_MAX_SIZE = int(os.getenv("QUOTE_CACHE_MAX_SIZE", "1024"))
+    # How long expired quotes are kept to answer with when upstream is unavailable or over budget
+    QUOTE_CACHE_STALE_TTL = float(os.getenv("QUOTE_CACHE_STALE_TTL", "900"))
+
+    # Keep-alive connection pools for RapidAPI hosts (timeouts in seconds)
+    UPSTREAM_POOL_SIZE = int(os.getenv("UPSTREAM_POOL_SIZE", "10"))
+    UPSTREAM_CONNECT_TIMEOUT = float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", "5"))
+    UPSTREAM_READ_TIMEOUT = float(os.getenv("UPSTREAM_READ_TIMEOUT", "15"))
+
+    # Concurrent fan-out of independent upstream calls
+    UPSTREAM_FANOUT_WORKERS = int(os.getenv("UPSTREAM_FANOUT_WORKERS", "16"))
+    UPSTREAM_CALL_TIMEOUT = float(os.getenv("UPSTREAM_CALL_TIMEOUT", "10"))
+    QUOTE_BATCH_SIZE = int(os.getenv("QUOTE_BATCH_SIZE", "20"))
+
+    # Upstream budget per RapidAPI host/key (RATE_LIMIT_PER_SECOND=0 disables it). Lower
+    # priority classes leave RATE_LIMIT_RESERVE tokens per class for higher ones; calls
+    # that cannot get a token within RATE_LIMIT_MAX_WAIT seconds are answered from stale
+    # data. RATE_LIMIT_STATE_PATH shares the bucket across workers through SQLite.
+    RATE_LIMIT_PER_SECOND = float(os.getenv("RATE_LIMIT_PER_SECOND", "5"))
+    RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "10"))
+    RATE_LIMIT_RESERVE = float(os.getenv("RATE_LIMIT_RESERVE", "2"))
+    RATE_LIMIT_MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "2"))
+    RATE_LIMIT_COOLDOWN = float(os.getenv("RATE_LIMIT_COOLDOWN", "30"))
+    RATE_LIMIT_STATE_PATH = os.getenv("RATE_LIMIT_STATE_PATH", "")
+
+    # Token verification: "remote" asks Supabase on every cache miss, "local"
+    # checks signature and expiry against the JWT secret / JWKS
+    AUTH_MODE = os.getenv("AUTH_MODE", "remote").lower()
+    SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
+    SUPABASE_JWKS_URL = os.getenv("SUPABASE_JWKS_URL") or (
+        f"{SUPABASE_URL.rstrip('/')}/auth/v1/.well-known/jwks.json" if SUPABASE_URL else None)
+    AUTH_REMOTE_FALLBACK = os.getenv("AUTH_REMOTE_FALLBACK", "true").lower() == "true"
+    AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+
+    # Bulk holdings import/export
+    HOLDINGS_BATCH_SIZE = int(os.getenv("HOLDINGS_BATCH_SIZE", "500"))
+    HOLDINGS_IMPORT_MAX_ROWS = int(os.getenv("HOLDINGS_IMPORT_MAX_ROWS", "50000"))
+    HOLDINGS_EXPORT_PAGE_SIZE = int(os.getenv("HOLDINGS_EXPORT_PAGE_SIZE", "1000"))
+
+    # Business-news store refreshed in the background (interval in seconds)
+    NEWS_REFRESH_INTERVAL = float(os.getenv("NEWS_REFRESH_INTERVAL", "300"))
+    NEWS_FETCH_LIMIT = int(os.getenv("NEWS_FETCH_LIMIT", "500"))
+    NEWS_MAX_ITEMS = int(os.getenv("NEWS_MAX_ITEMS", "1000"))
+
+    # Local symbol autocomplete; RapidAPI /search is used only without a confident match
+    SYMBOL_INDEX_PATH = os.getenv("SYMBOL_INDEX_PATH", os.path.join(current_dir, "data", "symbols.csv"))
+    SYMBOL_SEARCH_MIN_SCORE = float(os.getenv("SYMBOL_SEARCH_MIN_SCORE", "0.5"))
+    SYMBOL_SEARCH_CONFIDENT_SCORE = float(os.getenv("SYMBOL_SEARCH_CONFIDENT_SCORE", "0.8"))
+
+    # Server-Sent Events quote stream: one poll per worker of every subscribed symbol,
+    # bypassing the quote cache (whose TTL may be longer than STREAM_POLL_INTERVAL)
+    STREAM_POLL_INTERVAL = float(os.getenv("STREAM_POLL_INTERVAL", "15"))
+    STREAM_HEARTBEAT_INTERVAL = float(os.getenv("STREAM_HEARTBEAT_INTERVAL", "20"))
+    STREAM_MAX_SUBSCRIBERS = int(os.getenv("STREAM_MAX_SUBSCRIBERS", "200"))
+    STREAM_MAX_SYMBOLS = int(os.getenv("STREAM_MAX_SYMBOLS", "50"))
+
+    # HTTP caching of public routes: max-age and stale-while-revalidate windows (seconds).
+    # Stale payloads are served at once while the route refreshes in the background.
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512"))
+    CACHE_MARKET_TRENDS_MAX_AGE = int(os.getenv("CACHE_MARKET_TRENDS_MAX_AGE", "60"))
+    CACHE_MARKET_TRENDS_SWR = int(os.getenv("CACHE_MARKET_TRENDS_SWR", "300"))
+    CACHE_POPULAR_STOCKS_MAX_AGE = int(os.getenv("CACHE_POPULAR_STOCKS_MAX_AGE", "15"))
+    CACHE_POPULAR_STOCKS_SWR = int(os.getenv("CACHE_POPULAR_STOCKS_SWR", "60"))
+    CACHE_BUSINESS_NEWS_MAX_AGE = int(os.getenv("CACHE_BUSINESS_NEWS_MAX_AGE", "60"))
+    CACHE_BUSINESS_NEWS_SWR = int(os.getenv("CACHE_BUSINESS_NEWS_SWR", "600"))
+    CACHE_SEARCH_MAX_AGE = int(os.getenv("CACHE_SEARCH_MAX_AGE", "300"))
+    CACHE_SEARCH_SWR = int(os.getenv("CACHE_SEARCH_SWR", "3600"))
+
+    # Compression of buffered responses of at least COMPRESSION_MIN_SIZE bytes
+    # (brotli when the brotli package is installed, otherwise gzip)
+    COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+    COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+    COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+    # Background warming of market trends, popular stocks and business news. One
+    # process per host (the holder of SCHEDULER_LOCK_PATH) fetches them; the other
+    # workers load its payloads from SCHEDULER_SNAPSHOT_DIR
+    SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+    SCHEDULER_OPEN_INTERVAL = float(os.getenv("SCHEDULER_OPEN_INTERVAL", "30"))
+    SCHEDULER_CLOSED_INTERVAL = float(os.getenv("SCHEDULER_CLOSED_INTERVAL", "1800"))
+    SCHEDULER_TICK = float(os.getenv("SCHEDULER_TICK", "5"))
+    SCHEDULER_LOCK_PATH = os.getenv("SCHEDULER_LOCK_PATH", os.path.join(current_dir, "data", "scheduler.lock"))
+    SCHEDULER_SNAPSHOT_DIR = os.getenv("SCHEDULER_SNAPSHOT_DIR", os.path.join(current_dir, "data", "warm"))
+
+    # Local OHLC history recorded from fetched quotes (empty HISTORY_DIR disables it).
+    # Workers buffer quotes and flush them every HISTORY_FLUSH_INTERVAL seconds; one
+    # process per host writes the series and keeps HISTORY_INTRADAY_DAYS of minute bars
+    HISTORY_DIR = os.getenv("HISTORY_DIR", os.path.join(current_dir, "data", "history"))
+    HISTORY_FLUSH_INTERVAL = float(os.getenv("HISTORY_FLUSH_INTERVAL", "5"))
+    HISTORY_INTRADAY_DAYS = float(os.getenv("HISTORY_INTRADAY_DAYS", "30"))
+    HISTORY_MAX_POINTS = int(os.getenv("HISTORY_MAX_POINTS", "1000"))
+    HISTORY_DEFAULT_DAYS = int(os.getenv("HISTORY_DEFAULT_DAYS", "30"))
+
+    # Portfolio analytics over the stored daily history
+    ANALYTICS_BENCHMARK = os.getenv("ANALYTICS_BENCHMARK", "NIFTY_50:INDEXNSE")
+    ANALYTICS_DEFAULT_DAYS = int(os.getenv("ANALYTICS_DEFAULT_DAYS", "365"))
+    ANALYTICS_CACHE_TTL = float(os.getenv("ANALYTICS_CACHE_TTL", "300"))
+    ANALYTICS_CACHE_MAX_SIZE = int(os.getenv("ANALYTICS_CACHE_MAX_SIZE", "256"))
+
+    # Per-user portfolios and holdings, kept current by the write routes. Workers on
+    # this host signal writes through per-user files in PORTFOLIO_CACHE_SIGNAL_DIR, so
+    # other workers reload on their next read; the TTL bounds how long writes through
+    # other hosts go unseen (0 disables the cache; an empty signal dir leaves only the TTL)
+    PORTFOLIO_CACHE_TTL = float(os.getenv("PORTFOLIO_CACHE_TTL", "60"))
+    PORTFOLIO_CACHE_SIGNAL_DIR = os.getenv("PORTFOLIO_CACHE_SIGNAL_DIR",
+                                           os.path.join(current_dir, "data", "portfolio-signals"))
+    PORTFOLIO_CACHE_MAX_USERS = int(os.getenv("PORTFOLIO_CACHE_MAX_USERS", "1024"))
+
+    # Transaction ledger: cost method for P&L (fifo or average), a replay checkpoint
+    # every LEDGER_CHECKPOINT_INTERVAL trades of a symbol, and built ledgers kept
+    # for LEDGER_CACHE_TTL seconds or until another worker on this host writes to the
+    # portfolio (signalled through per-portfolio files in LEDGER_CACHE_SIGNAL_DIR)
+    LEDGER_METHOD = os.getenv("LEDGER_METHOD", "fifo").lower()
+    LEDGER_CHECKPOINT_INTERVAL = int(os.getenv("LEDGER_CHECKPOINT_INTERVAL", "1000"))
+    LEDGER_MAX_CHECKPOINTS = int(os.getenv("LEDGER_MAX_CHECKPOINTS", "8"))
+    LEDGER_PAGE_SIZE = int(os.getenv("LEDGER_PAGE_SIZE", "1000"))
+    LEDGER_CACHE_TTL = float(os.getenv("LEDGER_CACHE_TTL", "300"))
+    LEDGER_CACHE_MAX_SIZE = int(os.getenv("LEDGER_CACHE_MAX_SIZE", "64"))
+    LEDGER_CACHE_SIGNAL_DIR = os.getenv("LEDGER_CACHE_SIGNAL_DIR", os.path.join(current_dir, "data", "ledger-signals"))
+
+    # Request timing: latency histograms and cache counters are served at /api/metrics;
+    # SERVER_TIMING_ENABLED also reports each request's phases in a Server-Timing header
+    SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "false").lower() == "true"
+
+    # ASGI mode (backend/run_async.py): keep-alive connections per host and the WSGI fallback
+    ASYNC_POOL_SIZE = int(os.getenv("ASYNC_POOL_SIZE", "100"))
+    ASYNC_WSGI_MAX_BODY_SIZE = int(os.getenv("ASYNC_WSGI_MAX_BODY_SIZE", str(16 * 1024 * 1024)))
 
     # Check for placeholder values and treat them as missing
     if SUPABASE_URL and SUPABASE_URL.startswith("YOUR_"):
@@ -1,20 +1,201 @@
-from supabase import create_client, Client
+import os
+from typing import TYPE_CHECKING, Optional
 from flask import Flask
+from backend.utils.quote_cache import QuoteCache
+from backend.utils.http_pool import PoolManager, TimedTransport
+from backend.utils.fanout import FanOut
+from backend.utils.singleflight import SingleFlight
+from backend.utils.jwt_verifier import JWTVerifier, TokenCache
+from backend.utils.news_store import NewsStore
+from backend.utils.symbol_index import SymbolIndex
+from backend.utils.quote_stream import QuoteBroadcaster
+from backend.utils.price_history import HistoryRecorder, PriceHistory
+from backend.utils.analytics import AnalyticsCache
+from backend.utils.portfolio_cache import PortfolioCache
+from backend.utils.ledger import LedgerCache
+from backend.utils.response_cache import CompressedCache, ResponseCache
+from backend.utils.metrics import Metrics
+from backend.utils.scheduler import MarketScheduler
+from backend.utils.rate_governor import RateGovernor, PRIORITY_MARKET, PRIORITY_BACKGROUND
+from backend.utils.lazy import LazyClient
 
-supabase: Client = None  # type: ignore
-supabase_service: Client = None  # type: ignore
+if TYPE_CHECKING:
+    from supabase import Client, ClientOptions
+
+# Supabase clients are built on first use (see LazyClient): importing the SDK
+# is most of the app's import time, and each worker process needs its own
+supabase: "Client" = None  # type: ignore
+supabase_service: "Client" = None  # type: ignore
+quote_cache: QuoteCache = QuoteCache()
+http_pools: PoolManager = PoolManager()
+fanout: FanOut = FanOut()
+upstream_flight: SingleFlight = SingleFlight()
+jwt_verifier: Optional[JWTVerifier] = None
+auth_remote_fallback: bool = True
+token_cache: TokenCache = TokenCache()
+news_store: Optional[NewsStore] = None
+symbol_index: SymbolIndex = SymbolIndex()
+quote_stream: Optional[QuoteBroadcaster] = None
+price_history: Optional[PriceHistory] = None
+history_recorder: Optional[HistoryRecorder] = None
+analytics_cache: AnalyticsCache = AnalyticsCache()
+portfolio_cache: PortfolioCache = PortfolioCache()
+ledger_cache: LedgerCache = LedgerCache()
+rate_governor: Optional[RateGovernor] = None
+response_cache: ResponseCache = ResponseCache()
+compressed_cache: CompressedCache = CompressedCache()
+metrics: Metrics = Metrics()
+scheduler: Optional[MarketScheduler] = None
+
+
+def timed_client_options() -> "ClientOptions":
+    """Supabase client options whose HTTP calls are timed as request phases."""
+    import httpx
+    from supabase import ClientOptions
+    return ClientOptions(httpx_client=httpx.Client(
+        transport=TimedTransport(httpx.HTTPTransport(http2=True), metrics),
+        timeout=120, follow_redirects=True))  # the SDK's default PostgREST settings
+
+
+def supabase_client(url: str, key: str) -> LazyClient:
+    def create():
+        from supabase import create_client
+        return create_client(url, key, options=timed_client_options())
+    return LazyClient(create)
 
 
 def init_extensions(app: Flask):
-    """Initializes Supabase clients using the app's configuration."""
-    global supabase, supabase_service
+    """
+    Initializes Supabase clients (built on first use), token verification,
+    HTTP pools and shared caches using the app's configuration.
+    """
+    global supabase, supabase_service, quote_cache, http_pools, fanout
+    global jwt_verifier, auth_remote_fallback, token_cache, news_store, symbol_index
+    global quote_stream, price_history, history_recorder, analytics_cache, rate_governor, response_cache
+    global compressed_cache, portfolio_cache, ledger_cache
 
     config = app.config
-    supabase = create_client(config["SUPABASE_URL"], config["SUPABASE_KEY"])
-
+    supabase = supabase_client(config["SUPABASE_URL"], config["SUPABASE_KEY"])
     if config.get("SUPABASE_SERVICE_ROLE_KEY"):
-        supabase_service = create_client(
-            config["SUPABASE_URL"], config["SUPABASE_SERVICE_ROLE_KEY"]
-        )
+        supabase_service = supabase_client(config["SUPABASE_URL"], config["SUPABASE_SERVICE_ROLE_KEY"])
     else:
         supabase_service = supabase
+    if config["SUPABASE_PRELOAD"]:
+        # Pays the SDK and transport imports now; forked workers rebuild only the clients
+        supabase.get()
+        supabase_service.get()
+
+    quote_cache = QuoteCache(
+        ttl=config["QUOTE_CACHE_TTL"], max_size=config["QUOTE_CACHE_MAX_SIZE"],
+        stale_ttl=config["QUOTE_CACHE_STALE_TTL"])
+
+    rate_governor = RateGovernor(
+        rate=config["RATE_LIMIT_PER_SECOND"], burst=config["RATE_LIMIT_BURST"],
+        reserve=config["RATE_LIMIT_RESERVE"], max_wait=config["RATE_LIMIT_MAX_WAIT"],
+        cooldown=config["RATE_LIMIT_COOLDOWN"],
+        state_path=config["RATE_LIMIT_STATE_PATH"] or None) if config["RATE_LIMIT_PER_SECOND"] > 0 else None
+
+    http_pools.close()
+    http_pools = PoolManager(
+        maxsize=config["UPSTREAM_POOL_SIZE"],
+        connect_timeout=config["UPSTREAM_CONNECT_TIMEOUT"],
+        read_timeout=config["UPSTREAM_READ_TIMEOUT"])
+
+    response_cache.shutdown()
+    response_cache = ResponseCache(max_entries=config["RESPONSE_CACHE_MAX_ENTRIES"])
+    compressed_cache = CompressedCache(max_entries=config["RESPONSE_CACHE_MAX_ENTRIES"])
+
+    fanout.shutdown()
+    fanout = FanOut(max_workers=config["UPSTREAM_FANOUT_WORKERS"],
+                    timeout=config["UPSTREAM_CALL_TIMEOUT"])
+
+    jwt_verifier = JWTVerifier(
+        secret=config.get("SUPABASE_JWT_SECRET"),
+        jwks_url=config.get("SUPABASE_JWKS_URL")) if config["AUTH_MODE"] == "local" else None
+    auth_remote_fallback = config["AUTH_REMOTE_FALLBACK"]
+    token_cache = TokenCache(max_size=config["AUTH_TOKEN_CACHE_SIZE"])
+
+    price_history = PriceHistory(config["HISTORY_DIR"]) if config.get("HISTORY_DIR") else None
+    if history_recorder is not None:
+        history_recorder.stop()
+    history_recorder = HistoryRecorder(
+        price_history, flush_interval=config["HISTORY_FLUSH_INTERVAL"],
+        intraday_days=config["HISTORY_INTRADAY_DAYS"]) if price_history is not None else None
+    analytics_cache = AnalyticsCache(ttl=config["ANALYTICS_CACHE_TTL"],
+                                     max_size=config["ANALYTICS_CACHE_MAX_SIZE"])
+    portfolio_cache = PortfolioCache(ttl=config["PORTFOLIO_CACHE_TTL"],
+                                     max_users=config["PORTFOLIO_CACHE_MAX_USERS"],
+                                     signal_dir=config["PORTFOLIO_CACHE_SIGNAL_DIR"] or None)
+    ledger_cache = LedgerCache(ttl=config["LEDGER_CACHE_TTL"], max_size=config["LEDGER_CACHE_MAX_SIZE"],
+                               signal_dir=config["LEDGER_CACHE_SIGNAL_DIR"] or None)
+
+    symbol_index = SymbolIndex(min_score=config["SYMBOL_SEARCH_MIN_SCORE"],
+                               confident_score=config["SYMBOL_SEARCH_CONFIDENT_SCORE"])
+    if config.get("SYMBOL_INDEX_PATH"):
+        symbol_index.load_csv(config["SYMBOL_INDEX_PATH"])
+
+    # Deferred import: api_helpers imports this module
+    from backend.utils.api_helpers import make_api_request, fetch_quotes
+    if news_store is not None:
+        news_store.stop()
+    news_endpoint = f"/topic-headlines?topic=BUSINESS&limit={config['NEWS_FETCH_LIMIT']}&country=IN&lang=en"
+    news_store = NewsStore(
+        lambda: make_api_request(config["RAPIDAPI_NEWS_HOST"], config["RAPIDAPI_NEWS_KEY"], news_endpoint,
+                                 priority=PRIORITY_BACKGROUND),
+        refresh_interval=config["NEWS_REFRESH_INTERVAL"], max_items=config["NEWS_MAX_ITEMS"])
+
+    quote_stream = QuoteBroadcaster(
+        lambda symbols: fetch_quotes(config["RAPIDAPI_STOCK_HOST"], config["RAPIDAPI_KEY"],
+                                     symbols, config["QUOTE_BATCH_SIZE"], priority=PRIORITY_MARKET,
+                                     use_cache=False),
+        interval=config["STREAM_POLL_INTERVAL"], max_subscribers=config["STREAM_MAX_SUBSCRIBERS"])
+
+
+def init_scheduler(app: Flask):
+    """
+    Sets up warming of the public market datasets; needs the app's routes
+    registered. The thread starts with the first request each process serves
+    (see start_background), not here: a pre-forking server that creates the app
+    in its master (gunicorn --preload) must not fork with it running.
+    """
+    global scheduler
+
+    # Deferred imports: both import this module
+    from backend.utils.http_cache import render_uncached
+    from backend.routes.public_routes import WARM_JOBS
+    if scheduler is not None:
+        scheduler.stop()
+    config = app.config
+    scheduler = MarketScheduler(
+        lambda path: render_uncached(app, path), response_cache, WARM_JOBS,
+        lock_path=config["SCHEDULER_LOCK_PATH"], snapshot_dir=config["SCHEDULER_SNAPSHOT_DIR"],
+        open_interval=config["SCHEDULER_OPEN_INTERVAL"], closed_interval=config["SCHEDULER_CLOSED_INTERVAL"],
+        tick=config["SCHEDULER_TICK"])
+    app.before_request(start_background)
+
+
+def start_background():
+    """Starts this process's market scheduler, if enabled; a no-op once it runs."""
+    if scheduler is not None:
+        scheduler.start()
+
+
+def _after_fork_in_child():
+    # Idle upstream connections belong to the parent; the child opens its own
+    http_pools.discard()
+    # So do background threads and executors: only the thread calling fork() exists
+    # in the child, so each is dropped and started again on first use
+    fanout.discard()
+    response_cache.discard()
+    if news_store is not None:
+        news_store.discard()
+    if scheduler is not None:
+        scheduler.discard()
+    if history_recorder is not None:
+        history_recorder.discard()
+    if quote_stream is not None:
+        quote_stream.discard()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
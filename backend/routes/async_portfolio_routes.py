@@ -0,0 +1,63 @@
+from quart import Blueprint, jsonify, request, g, current_app
+from backend.routes.portfolio_routes import (
+    add_holding_flow, create_portfolio_flow, dashboard_flow, delete_holding_flow, delete_portfolio_flow,
+    holdings_flow, list_portfolios_flow, valuation_flow)
+from backend.utils.async_auth import auth_required
+from backend.utils.async_api_helpers import run_flow
+import backend.async_extensions as aext
+
+# Route logic lives in the flows of portfolio_routes; these views drive them on
+# the async Supabase client. Bulk import and export stream large bodies, and
+# analytics and the transaction ledger are CPU-bound; they stay on the Flask app
+# (see backend/asgi.py).
+async_portfolio_bp = Blueprint('async_portfolio_routes', __name__, url_prefix='/api')
+
+
+@async_portfolio_bp.route("/portfolios", methods=["GET", "POST"])
+@auth_required
+async def handle_portfolios():
+    if request.method == "GET":
+        payload, status = await run_flow(list_portfolios_flow(aext.supabase, g.user.id))
+    else:
+        payload, status = await run_flow(create_portfolio_flow(
+            aext.supabase, g.user.id, await request.get_json() or {}))
+    return jsonify(payload), status
+
+
+@async_portfolio_bp.route("/portfolios/<portfolio_id>", methods=["DELETE"])
+@auth_required
+async def delete_portfolio(portfolio_id: str):
+    payload, status = await run_flow(delete_portfolio_flow(aext.supabase, g.user.id, portfolio_id))
+    return jsonify(payload), status
+
+
+@async_portfolio_bp.route("/portfolios/<portfolio_id>/valuation", methods=["GET"])
+@auth_required
+async def get_portfolio_valuation(portfolio_id: str):
+    payload, status = await run_flow(valuation_flow(aext.supabase, current_app.config, g.user.id, portfolio_id))
+    return jsonify(payload), status
+
+
+@async_portfolio_bp.route("/dashboard", methods=["GET"])
+@auth_required
+async def get_dashboard():
+    payload, status = await run_flow(dashboard_flow(aext.supabase, current_app.config, g.user.id))
+    return jsonify(payload), status
+
+
+@async_portfolio_bp.route("/holdings/<portfolio_id>", methods=["GET", "POST"])
+@auth_required
+async def handle_holdings(portfolio_id: str):
+    if request.method == "GET":
+        payload, status = await run_flow(holdings_flow(aext.supabase, g.user.id, portfolio_id))
+    else:
+        payload, status = await run_flow(add_holding_flow(
+            aext.supabase, g.user.id, portfolio_id, await request.get_json() or {}))
+    return jsonify(payload), status
+
+
+@async_portfolio_bp.route("/holdings/<holding_id>", methods=["DELETE"])
+@auth_required
+async def delete_holding(holding_id: str):
+    payload, status = await run_flow(delete_holding_flow(aext.supabase, g.user.id, holding_id))
+    return jsonify(payload), status
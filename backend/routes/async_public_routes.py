@@ -0,0 +1,100 @@
+import asyncio
+from quart import Blueprint, Response, jsonify, request, current_app
+from backend.routes.public_routes import (
+    POPULAR_SYMBOLS, STREAM_HEADERS, business_news_flow, health_status, market_trends_flow,
+    open_quote_stream, quotes_flow, render_metrics, search_flow, split_symbols)
+from backend.utils.async_api_helpers import run_flow
+from backend.utils.async_http_cache import cached_response
+from backend.utils.metrics import PROMETHEUS_CONTENT_TYPE
+from backend.utils.quote_stream import format_event
+import backend.async_extensions as aext
+import backend.extensions as ext
+
+# Route logic lives in the flows of public_routes; these views only drive them
+# on the event loop.
+async_public_bp = Blueprint('async_public_routes', __name__, url_prefix='/api')
+
+
+@async_public_bp.route("/search", methods=["GET"])
+@cached_response("SEARCH")
+async def search_stocks():
+    payload, status = await run_flow(search_flow(current_app.config, request.args))
+    return jsonify(payload), status
+
+
+@async_public_bp.route("/quote", methods=["GET"])
+async def get_quotes():
+    payload, status = await run_flow(quotes_flow(current_app.config, split_symbols(request.args.get('symbols'))))
+    return jsonify(payload), status
+
+
+@async_public_bp.route("/stream/quotes", methods=["GET"])
+async def stream_quotes():
+    """
+    Same feed as public_routes.stream_quotes, but an idle stream waits on the
+    event loop instead of holding a worker thread.
+    """
+    loop = asyncio.get_running_loop()
+    wake = asyncio.Event()
+    subscriber, refusal = open_quote_stream(current_app.config, request.args,
+                                            notify=lambda: loop.call_soon_threadsafe(wake.set))
+    if refusal:
+        payload, status, headers = refusal
+        return jsonify(payload), status, headers
+
+    heartbeat = current_app.config["STREAM_HEARTBEAT_INTERVAL"]
+    retry_ms = int(current_app.config["STREAM_POLL_INTERVAL"] * 1000)
+
+    async def events():
+        event_id = 0
+        try:
+            yield f"retry: {retry_ms}\n\n".encode("utf-8")
+            while True:
+                try:
+                    await asyncio.wait_for(wake.wait(), heartbeat)
+                except asyncio.TimeoutError:
+                    pass
+                wake.clear()
+                quotes = subscriber.take(0)
+                if quotes:
+                    event_id += 1
+                    yield format_event("quotes", quotes, event_id).encode("utf-8")
+                else:
+                    yield b": keep-alive\n\n"
+        finally:
+            ext.quote_stream.unsubscribe(subscriber)
+
+    response = Response(events(), mimetype="text/event-stream", headers=STREAM_HEADERS)
+    response.timeout = None
+    return response
+
+
+@async_public_bp.route("/market-trends", methods=["GET"])
+@cached_response("MARKET_TRENDS")
+async def get_market_trends():
+    payload, status = await run_flow(market_trends_flow(current_app.config))
+    return jsonify(payload), status
+
+
+@async_public_bp.route("/popular-stocks", methods=["GET"])
+@cached_response("POPULAR_STOCKS")
+async def get_popular_stocks():
+    payload, status = await run_flow(quotes_flow(current_app.config, POPULAR_SYMBOLS))
+    return jsonify(payload), status
+
+
+@async_public_bp.route("/business-news", methods=["GET"])
+@cached_response("BUSINESS_NEWS")
+async def get_business_news():
+    payload, status = await run_flow(business_news_flow(request.args))
+    return jsonify(payload), status
+
+
+@async_public_bp.route("/metrics", methods=["GET"])
+async def metrics():
+    return Response(render_metrics(aext.upstream_flight), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@async_public_bp.route("/health", methods=["GET"])
+async def health_check():
+    return jsonify(dict(health_status(aext.upstream_flight), mode="asgi")), 200
@@ -1,9 +1,247 @@
-from flask import Blueprint, jsonify, request, g
+import csv
+import time
+from collections import Counter
+from flask import Blueprint, Response, jsonify, request, g, current_app, stream_with_context
 from backend.utils.auth import auth_required
+from backend.utils.api_helpers import Quotes, run_flow
+from backend.utils.valuation import value_holdings, value_portfolios
+from backend.utils.response_shaping import HOLDING_FIELDS, project, select_columns
+from backend.utils.analytics import portfolio_analytics
+from backend.utils.price_history import parse_time
+from backend.utils.ledger import METHODS, OversoldError, PortfolioLedger, validate_transaction
+from backend.utils.holdings_io import (
+    EXPORT_FIELDS, validate_holding, iter_import_rows, chunked, export_csv, export_ndjson)
 import backend.extensions as ext
 
 portfolio_bp = Blueprint('portfolio_routes', __name__, url_prefix='/api')
 
+# Portfolio rows with their holdings, as the portfolio cache keeps them
+PORTFOLIO_WITH_HOLDINGS = f'*, holdings({select_columns(HOLDING_FIELDS)})'
+DASHBOARD_FIELDS = ("id", "name", "description", "created_at")
+
+
+def summary_fields(summary) -> dict:
+    """Flattens an embedded portfolio_summaries row (object or one-element list)."""
+    if isinstance(summary, list):
+        summary = summary[0] if summary else None
+    summary = summary or {}
+    return {"holdings_count": summary.get("holdings_count", 0),
+            "total_quantity": summary.get("total_quantity", 0),
+            "total_cost": summary.get("total_cost", 0)}
+
+
+def dashboard_symbols(portfolios) -> list:
+    """Distinct symbols across cached (row, holdings, symbols) portfolios, from their running symbol sets."""
+    return list(dict.fromkeys(s for _, _, symbols in portfolios for s in symbols))
+
+
+def portfolio_flow(db, user_id: str, portfolio_id: str):
+    """
+    Flow (see api_helpers.run_flow) for (row, holdings) of one of the user's
+    portfolios, from the portfolio cache or, on a miss, from Supabase through
+    the client `db`. The row is None if the user has no such portfolio.
+    """
+    cached = ext.portfolio_cache.portfolio(user_id, portfolio_id)
+    if cached is not None:
+        return cached
+    token = ext.portfolio_cache.token(user_id)
+    res = yield db.table('portfolios').select(PORTFOLIO_WITH_HOLDINGS).match(
+        {'id': portfolio_id, 'user_id': user_id})
+    if not res.data:
+        return None, []
+    row = dict(res.data[0])
+    holdings = row.pop('holdings') or []
+    ext.portfolio_cache.load_portfolio(user_id, token, row, holdings)
+    return row, holdings
+
+
+def portfolios_flow(db, user_id: str):
+    """Flow for (row, holdings, symbols) of every portfolio of the user, oldest first."""
+    cached = ext.portfolio_cache.portfolios(user_id)
+    if cached is not None:
+        return cached
+    token = ext.portfolio_cache.token(user_id)
+    rows = (yield db.table('portfolios').select(PORTFOLIO_WITH_HOLDINGS).eq(
+        'user_id', user_id).order('created_at')).data or []
+    ext.portfolio_cache.load_all(user_id, token, rows)
+    return [({k: v for k, v in row.items() if k != 'holdings'}, row.get('holdings') or [],
+             Counter(h["symbol"].upper() for h in row.get('holdings') or [])) for row in rows]
+
+
+def live_quotes_flow(config, symbols: list):
+    """Flow for live quotes of `symbols`, keyed by upper-case symbol."""
+    if not symbols:
+        return {}
+    result = yield Quotes(config["RAPIDAPI_STOCK_HOST"], config["RAPIDAPI_KEY"], symbols,
+                          config["QUOTE_BATCH_SIZE"])
+    return {q["symbol"].upper(): q for q in result.get("data") or [] if q.get("symbol")}
+
+
+def load_portfolio(user_id: str, portfolio_id: str):
+    """portfolio_flow on the Flask app's Supabase client."""
+    return run_flow(portfolio_flow(ext.supabase, user_id, portfolio_id))
+
+
+def list_portfolios_flow(db, user_id: str):
+    """Flow behind GET /api/portfolios."""
+    try:
+        portfolios = ext.portfolio_cache.listing(user_id)
+        if portfolios is None:
+            # Aggregates come from the trigger-maintained portfolio_summaries row;
+            # the cache keeps them current from here on
+            token = ext.portfolio_cache.token(user_id)
+            res = yield db.table('portfolios').select(
+                '*, summary:portfolio_summaries(holdings_count, total_quantity, total_cost)'
+            ).eq('user_id', user_id)
+            portfolios = [dict(p, **summary_fields(p.pop('summary', None))) for p in res.data]
+            ext.portfolio_cache.load_listing(user_id, token, portfolios)
+        return portfolios, 200
+    except Exception as e:
+        return {"error": f"Failed to fetch portfolios: {e}"}, 500
+
+
+def create_portfolio_flow(db, user_id: str, data: dict):
+    """Flow behind POST /api/portfolios."""
+    if not (name := data.get("name", "").strip()):
+        return {"error": "Portfolio name is required"}, 400
+    try:
+        new_p = {"name": name, "description": data.get(
+            "description", "").strip(), "user_id": user_id}
+        res = yield db.table('portfolios').insert(new_p)
+        ext.portfolio_cache.add_portfolio(user_id, res.data[0])
+        return res.data[0], 201
+    except Exception as e:
+        return {"error": f"Failed to create portfolio: {e}"}, 500
+
+
+def dashboard_flow(db, config, user_id: str):
+    """Flow behind /api/dashboard."""
+    try:
+        cached = yield from portfolios_flow(db, user_id)
+        portfolios = [dict(project(row, DASHBOARD_FIELDS), holdings=holdings) for row, holdings, _ in cached]
+        quotes = yield from live_quotes_flow(config, dashboard_symbols(cached))
+        return value_portfolios(portfolios, quotes), 200
+    except Exception as e:
+        return {"error": f"Failed to load dashboard: {e}"}, 500
+
+
+def delete_portfolio_flow(db, user_id: str, portfolio_id: str):
+    """Flow behind DELETE /api/portfolios/<portfolio_id>."""
+    try:
+        res = yield db.table('portfolios').delete().match({'id': portfolio_id, 'user_id': user_id})
+        if not res.data:
+            return {"error": "Portfolio not found or access denied"}, 404
+        ext.portfolio_cache.remove_portfolio(user_id, portfolio_id)
+        ext.analytics_cache.invalidate(portfolio_id)
+        ext.ledger_cache.invalidate(portfolio_id)
+        return {"message": "Portfolio deleted successfully"}, 200
+    except Exception as e:
+        return {"error": f"Failed to delete portfolio: {e}"}, 500
+
+
+def valuation_flow(db, config, user_id: str, portfolio_id: str):
+    """Flow behind /api/portfolios/<portfolio_id>/valuation."""
+    try:
+        row, holdings = yield from portfolio_flow(db, user_id, portfolio_id)
+        if row is None:
+            return {"error": "Portfolio not found or access denied"}, 403
+        portfolio = project(row, ("id", "name", "description"))
+        quotes = yield from live_quotes_flow(config, list(dict.fromkeys(h["symbol"].upper() for h in holdings)))
+        return {"portfolio": portfolio, **value_holdings(holdings, quotes)}, 200
+    except Exception as e:
+        return {"error": f"Failed to value portfolio: {e}"}, 500
+
+
+def holdings_flow(db, user_id: str, portfolio_id: str):
+    """Flow behind GET /api/holdings/<portfolio_id>."""
+    try:
+        row, holdings = yield from portfolio_flow(db, user_id, portfolio_id)
+        if row is None:
+            return {"error": "Portfolio not found or access denied"}, 403
+        return holdings, 200
+    except Exception as e:
+        return {"error": f"Internal server error: {e}"}, 500
+
+
+def add_holding_flow(db, user_id: str, portfolio_id: str, data: dict):
+    """
+    Flow behind POST /api/holdings/<portfolio_id>. The ownership predicate
+    travels in the RPC, so this is one round trip to Supabase.
+    """
+    fields, error = validate_holding(data)
+    if error:
+        return {"error": error}, 400
+    try:
+        res = yield db.rpc('add_holding_for_user', {
+            "p_user_id": user_id, "p_portfolio_id": portfolio_id, "p_symbol": fields["symbol"],
+            "p_quantity": fields["quantity"], "p_purchase_price": fields["purchase_price"]})
+        if not res.data:
+            return {"error": "Portfolio not found or access denied"}, 403
+        ext.portfolio_cache.add_holdings(user_id, portfolio_id, res.data)
+        ext.analytics_cache.invalidate(portfolio_id)
+        return res.data[0], 201
+    except Exception as e:
+        return {"error": f"Internal server error: {e}"}, 500
+
+
+def delete_holding_flow(db, user_id: str, holding_id: str):
+    """Flow behind DELETE /api/holdings/<holding_id>; the ownership join and the delete run as one statement."""
+    try:
+        res = yield db.rpc('delete_holding_for_user', {"p_user_id": user_id, "p_holding_id": holding_id})
+        if not res.data:
+            return {"error": "Holding not found or access denied"}, 404
+        ext.portfolio_cache.remove_holding(user_id, res.data[0])
+        ext.analytics_cache.invalidate(res.data[0]["portfolio_id"])
+        return {"message": "Holding deleted successfully"}, 200
+    except Exception as e:
+        return {"error": f"Failed to delete holding: {e}"}, 500
+
+
+def owns_portfolio(user_id: str, portfolio_id: str) -> bool:
+    owned = ext.portfolio_cache.owns(user_id, portfolio_id)
+    if owned is None:
+        owned = bool(ext.supabase.table('portfolios').select('id').match(
+            {'id': portfolio_id, 'user_id': user_id}).execute().data)
+    return owned
+
+
+def ledger_method() -> str:
+    return (request.args.get('method') or current_app.config["LEDGER_METHOD"]).lower()
+
+
+def load_ledger(portfolio_id: str, method: str) -> PortfolioLedger:
+    """
+    The portfolio's transaction ledger for `method`, from the ledger cache or,
+    on a miss, replayed from every transaction read in LEDGER_PAGE_SIZE pages.
+    Callers check ownership first. Loads hold the portfolio's write lock, so a
+    concurrent trade in this process is either in the rows read or applied
+    after the load; one in another process moves the version taken before the
+    read and keeps the ledger out of the cache.
+    """
+    ledger = ext.ledger_cache.get(portfolio_id, method)
+    if ledger is not None:
+        return ledger
+    with ext.ledger_cache.write_lock(portfolio_id):
+        ledger = ext.ledger_cache.get(portfolio_id, method)
+        if ledger is not None:
+            return ledger
+        version = ext.ledger_cache.version(portfolio_id)
+        page_size = current_app.config["LEDGER_PAGE_SIZE"]
+        rows, start = [], 0
+        while True:
+            page = ext.supabase.table('transactions').select(
+                'id, symbol, side, quantity, price, fees, traded_at').eq(
+                'portfolio_id', portfolio_id).order('traded_at').order('id').range(
+                start, start + page_size - 1).execute().data or []
+            rows.extend(page)
+            if len(page) < page_size:
+                break
+            start += page_size
+        ledger = PortfolioLedger.load(rows, method, current_app.config["LEDGER_CHECKPOINT_INTERVAL"],
+                                      current_app.config["LEDGER_MAX_CHECKPOINTS"])
+        ext.ledger_cache.set(portfolio_id, method, ledger, version)
+        return ledger
+
 
 @portfolio_bp.route("/portfolios", methods=["GET", "POST"])
 @auth_required
@@ -11,29 +249,24 @@ def handle_portfolios():
     """
     Handles fetching all portfolios for a user (GET) and creating a new one (POST).
     """
-    user = g.user
     if request.method == "GET":
-        try:
-            res = ext.supabase.table('portfolios').select(
-                '*, holdings_count:holdings(count)').eq('user_id', user.id).execute()
-            portfolios = [dict(p, holdings_count=p['holdings_count'][0]['count'] if p.get(
-                'holdings_count') else 0) for p in res.data]
-            return jsonify(portfolios), 200
-        except Exception as e:
-            return jsonify({"error": f"Failed to fetch portfolios: {e}"}), 500
-
-    if request.method == "POST":
-        data = request.get_json() or {}
-        if not (name := data.get("name", "").strip()):
-            return jsonify({"error": "Portfolio name is required"}), 400
-        try:
-            new_p = {"name": name, "description": data.get(
-                "description", "").strip(), "user_id": user.id}
-            res = ext.supabase.table('portfolios').insert(new_p).execute()
-            return jsonify(res.data[0]), 201
-        except Exception as e:
-            return jsonify({"error": f"Failed to create portfolio: {e}"}), 500
-    return jsonify({"error": "Method not allowed"}), 405
+        payload, status = run_flow(list_portfolios_flow(ext.supabase, g.user.id))
+    else:
+        payload, status = run_flow(create_portfolio_flow(ext.supabase, g.user.id, request.get_json() or {}))
+    return jsonify(payload), status
+
+
+@portfolio_bp.route("/dashboard", methods=["GET"])
+@auth_required
+def get_dashboard():
+    """
+    Returns every portfolio of the user with its holdings valued against live
+    quotes, plus net-worth totals. Holdings of all portfolios come from the
+    portfolio cache (one embedded query on a miss), and the union of their
+    symbols is quoted in one batched lookup.
+    """
+    payload, status = run_flow(dashboard_flow(ext.supabase, current_app.config, g.user.id))
+    return jsonify(payload), status
 
 
 @portfolio_bp.route("/portfolios/<portfolio_id>", methods=["DELETE"])
@@ -43,14 +276,196 @@ def delete_portfolio(portfolio_id: str):
     Deletes a specific portfolio belonging to the authenticated user.
     Accepts a UUID string for portfolio_id.
     """
+    payload, status = run_flow(delete_portfolio_flow(ext.supabase, g.user.id, portfolio_id))
+    return jsonify(payload), status
+
+
+@portfolio_bp.route("/portfolios/<portfolio_id>/valuation", methods=["GET"])
+@auth_required
+def get_portfolio_valuation(portfolio_id: str):
+    """
+    Values every holding in a portfolio against (cached) live quotes and returns
+    per-holding rows plus portfolio totals in a single response.
+    """
+    payload, status = run_flow(valuation_flow(ext.supabase, current_app.config, g.user.id, portfolio_id))
+    return jsonify(payload), status
+
+
+@portfolio_bp.route("/portfolios/<portfolio_id>/analytics", methods=["GET"])
+@auth_required
+def get_portfolio_analytics(portfolio_id: str):
+    """
+    Returns time-weighted return, annualized volatility, max drawdown, beta
+    against ANALYTICS_BENCHMARK and the holding correlation matrix, computed
+    from stored daily bars between `from` and `to` (default: the last
+    ANALYTICS_DEFAULT_DAYS days). Results are cached per portfolio until its
+    holdings change in any worker or ANALYTICS_CACHE_TTL expires.
+    """
+    if ext.price_history is None:
+        return jsonify({"error": "Price history is disabled"}), 503
     try:
-        res = ext.supabase.table('portfolios').delete().match(
-            {'id': portfolio_id, 'user_id': g.user.id}).execute()
-        if not res.data:
-            return jsonify({"error": "Portfolio not found or access denied"}), 404
-        return jsonify({"message": "Portfolio deleted successfully"}), 200
+        end = parse_time(request.args.get('to')) or int(time.time())
+        start = parse_time(request.args.get('from'))
+    except ValueError:
+        return jsonify({"error": "from and to must be epoch seconds or ISO-8601 dates"}), 400
+    if start is None:
+        start = end - current_app.config["ANALYTICS_DEFAULT_DAYS"] * 86400
+    # Whole days, so requests within the same day share a cache entry
+    start, end = start - start % 86400, end - end % 86400 + 86399
+
+    # The user id is part of the key: a hit only serves what this user was allowed to compute.
+    # So is the user's portfolio cache version, which moves with writes made by other workers.
+    version = ext.portfolio_cache.version(g.user.id)
+    key = (g.user.id, version, start, end)
+    cached = ext.analytics_cache.get(portfolio_id, key) if version >= 0 else None
+    if cached is not None:
+        return jsonify(cached), 200
+    try:
+        row, holdings = load_portfolio(g.user.id, portfolio_id)
+        if row is None:
+            return jsonify({"error": "Portfolio not found or access denied"}), 403
+
+        portfolio = project(row, ("id", "name"))
+        analytics = portfolio_analytics(ext.price_history, holdings, start, end,
+                                        current_app.config["ANALYTICS_BENCHMARK"])
+        result = {"portfolio": portfolio, **analytics}
+        if version >= 0:
+            ext.analytics_cache.set(portfolio_id, key, result)
+        return jsonify(result), 200
+    except Exception as e:
+        return jsonify({"error": f"Failed to compute analytics: {e}"}), 500
+
+
+@portfolio_bp.route("/portfolios/<portfolio_id>/transactions", methods=["GET", "POST"])
+@auth_required
+def handle_transactions(portfolio_id: str):
+    """
+    Lists a portfolio's trades, newest first (GET, paged with limit and offset),
+    or records a buy or sell (POST). A sell larger than the position held at its
+    trade time is rejected, including a backdated one. The cached ledger answers
+    that first; add_transaction_for_user checks again under a lock on the
+    portfolio row, which also covers trades written by other workers.
+    """
+    user = g.user
+    try:
+        if not owns_portfolio(user.id, portfolio_id):
+            return jsonify({"error": "Portfolio not found or access denied"}), 403
+
+        if request.method == "GET":
+            try:
+                limit = min(int(request.args.get('limit', 100)), current_app.config["LEDGER_PAGE_SIZE"])
+                offset = int(request.args.get('offset', 0))
+            except ValueError:
+                return jsonify({"error": "limit and offset must be integers"}), 400
+            if limit < 1 or offset < 0:
+                return jsonify({"error": "limit must be positive and offset not negative"}), 400
+            res = ext.supabase.table('transactions').select('*').eq('portfolio_id', portfolio_id).order(
+                'traded_at', desc=True).order('id', desc=True).range(offset, offset + limit - 1).execute()
+            return jsonify({"data": res.data, "limit": limit, "offset": offset}), 200
+
+        fields, error = validate_transaction(request.get_json() or {})
+        if error:
+            return jsonify({"error": error}), 400
+        with ext.ledger_cache.write_lock(portfolio_id):
+            try:
+                load_ledger(portfolio_id, current_app.config["LEDGER_METHOD"]).check(fields)
+            except OversoldError as e:
+                return jsonify({"error": str(e)}), 400
+            try:
+                res = ext.supabase.rpc('add_transaction_for_user', {
+                    'p_user_id': user.id, 'p_portfolio_id': portfolio_id, 'p_symbol': fields["symbol"],
+                    'p_side': fields["side"], 'p_quantity': fields["quantity"], 'p_price': fields["price"],
+                    'p_fees': fields["fees"], 'p_traded_at': fields["traded_at"]}).execute()
+            except Exception as e:
+                if (oversold := OversoldError.from_database(e)) is None:
+                    raise
+                # The ledger checked above had missed a trade; reload it next time
+                ext.ledger_cache.invalidate(portfolio_id)
+                return jsonify({"error": str(oversold)}), 400
+            if not res.data:
+                return jsonify({"error": "Portfolio not found or access denied"}), 403
+            ext.ledger_cache.wrote(portfolio_id, lambda ledger: ledger.add(res.data[0]))
+        return jsonify(res.data[0]), 201
     except Exception as e:
-        return jsonify({"error": f"Failed to delete portfolio: {e}"}), 500
+        return jsonify({"error": f"Failed to process transactions: {e}"}), 500
+
+
+@portfolio_bp.route("/portfolios/<portfolio_id>/transactions/<transaction_id>", methods=["DELETE"])
+@auth_required
+def delete_transaction(portfolio_id: str, transaction_id: str):
+    """
+    Deletes a trade, unless a later sell of the same symbol depends on it
+    (checked by the cached ledger, then again by delete_transaction_for_user).
+    """
+    try:
+        if not owns_portfolio(g.user.id, portfolio_id):
+            return jsonify({"error": "Portfolio not found or access denied"}), 403
+        with ext.ledger_cache.write_lock(portfolio_id):
+            try:
+                load_ledger(portfolio_id, current_app.config["LEDGER_METHOD"]).check_removal(transaction_id)
+            except OversoldError as e:
+                return jsonify({"error": str(e)}), 409
+            try:
+                res = ext.supabase.rpc('delete_transaction_for_user', {
+                    'p_user_id': g.user.id, 'p_portfolio_id': portfolio_id,
+                    'p_transaction_id': transaction_id}).execute()
+            except Exception as e:
+                if (oversold := OversoldError.from_database(e)) is None:
+                    raise
+                ext.ledger_cache.invalidate(portfolio_id)
+                return jsonify({"error": str(oversold)}), 409
+            if not res.data:
+                return jsonify({"error": "Transaction not found or access denied"}), 404
+            ext.ledger_cache.wrote(portfolio_id, lambda ledger: ledger.remove(transaction_id))
+        return jsonify({"message": "Transaction deleted successfully"}), 200
+    except Exception as e:
+        return jsonify({"error": f"Failed to delete transaction: {e}"}), 500
+
+
+@portfolio_bp.route("/portfolios/<portfolio_id>/pnl/realized", methods=["GET"])
+@auth_required
+def get_realized_pnl(portfolio_id: str):
+    """
+    Realized P&L per symbol and in total, matched FIFO or at average cost
+    (`method`, default LEDGER_METHOD). With `from`/`to`, only sells in that
+    window count; FIFO results are split into short and long term.
+    """
+    method = ledger_method()
+    if method not in METHODS:
+        return jsonify({"error": f"method must be one of {', '.join(METHODS)}"}), 400
+    try:
+        start = parse_time(request.args.get('from'))
+        end = parse_time(request.args.get('to'))
+    except ValueError:
+        return jsonify({"error": "from and to must be epoch seconds or ISO-8601 dates"}), 400
+    try:
+        if not owns_portfolio(g.user.id, portfolio_id):
+            return jsonify({"error": "Portfolio not found or access denied"}), 403
+        realized = load_ledger(portfolio_id, method).realized(start, end)
+        return jsonify({"portfolio_id": portfolio_id, "from": start, "to": end, **realized}), 200
+    except Exception as e:
+        return jsonify({"error": f"Failed to compute realized P&L: {e}"}), 500
+
+
+@portfolio_bp.route("/portfolios/<portfolio_id>/pnl/unrealized", methods=["GET"])
+@auth_required
+def get_unrealized_pnl(portfolio_id: str):
+    """
+    Open positions from the transaction ledger valued against live quotes.
+    `lots=true` lists the remaining FIFO lots of each position.
+    """
+    method = ledger_method()
+    if method not in METHODS:
+        return jsonify({"error": f"method must be one of {', '.join(METHODS)}"}), 400
+    try:
+        if not owns_portfolio(g.user.id, portfolio_id):
+            return jsonify({"error": "Portfolio not found or access denied"}), 403
+        ledger = load_ledger(portfolio_id, method)
+        quotes = run_flow(live_quotes_flow(current_app.config, ledger.open_symbols()))
+        include_lots = request.args.get('lots', 'false').lower() == 'true'
+        return jsonify({"portfolio_id": portfolio_id, **ledger.unrealized(quotes, include_lots)}), 200
+    except Exception as e:
+        return jsonify({"error": f"Failed to compute unrealized P&L: {e}"}), 500
 
 
 @portfolio_bp.route("/holdings/<portfolio_id>", methods=["GET", "POST"])
@@ -60,36 +475,110 @@ def handle_holdings(portfolio_id: str):
     Handles fetching holdings for a portfolio (GET) and adding a new holding (POST).
     Accepts a UUID string for portfolio_id.
     """
-    user = g.user
+    # Each branch carries the ownership predicate in its own statement, so
+    # every request is at most one round trip to Supabase.
+    if request.method == "GET":
+        payload, status = run_flow(holdings_flow(ext.supabase, g.user.id, portfolio_id))
+    else:
+        payload, status = run_flow(add_holding_flow(ext.supabase, g.user.id, portfolio_id,
+                                                    request.get_json() or {}))
+    return jsonify(payload), status
+
+
+@portfolio_bp.route("/holdings/<portfolio_id>/bulk", methods=["POST"])
+@auth_required
+def bulk_import_holdings(portfolio_id: str):
+    """
+    Imports many holdings from a CSV, NDJSON or JSON-array body. Rows are
+    validated as they are read and written in multi-row inserts of
+    HOLDINGS_BATCH_SIZE; invalid rows are reported without aborting the import.
+    A body that turns unreadable part way stops the import; batches already
+    written stay, and the response says from which row nothing was imported.
+    """
     try:
-        # Verify the user owns the portfolio first
-        if not ext.supabase.table('portfolios').select('id').match({'id': portfolio_id, 'user_id': user.id}).execute().data:
+        if not owns_portfolio(g.user.id, portfolio_id):
             return jsonify({"error": "Portfolio not found or access denied"}), 403
 
-        if request.method == "GET":
-            holdings = ext.supabase.table('holdings').select(
-                '*').eq('portfolio_id', portfolio_id).execute()
-            return jsonify(holdings.data), 200
+        errors, inserted = [], 0
+        read, written = 0, 0  # last row read, last row of an inserted batch
+        max_rows = current_app.config["HOLDINGS_IMPORT_MAX_ROWS"]
 
-        if request.method == "POST":
-            data = request.get_json() or {}
-            symbol = data.get("symbol", "").strip().upper()
-            try:
-                quantity, price = float(data["quantity"]), float(
-                    data["purchase_price"])
-            except (TypeError, ValueError, KeyError):
-                return jsonify({"error": "Quantity and purchase_price must be valid numbers"}), 400
-            if not symbol or quantity <= 0 or price <= 0:
-                return jsonify({"error": "Symbol, positive quantity, and positive price are required"}), 400
-
-            new_h = {"portfolio_id": portfolio_id, "symbol": symbol,
-                     "quantity": quantity, "purchase_price": price}
-            res = ext.supabase.table('holdings').insert(new_h).execute()
-            return jsonify(res.data[0]), 201
+        def valid_rows():
+            nonlocal read
+            for number, payload in iter_import_rows(request.stream, request.content_type):
+                read = number
+                if number > max_rows:
+                    errors.append({"row": number, "error": f"Import is limited to {max_rows} rows"})
+                    return
+                if not isinstance(payload, dict):
+                    errors.append({"row": number, "error": "Row must be a JSON object"})
+                    continue
+                fields, error = validate_holding(payload)
+                if error:
+                    errors.append({"row": number, "error": error})
+                    continue
+                yield number, {"portfolio_id": portfolio_id, **fields}
+
+        try:
+            for batch in chunked(valid_rows(), current_app.config["HOLDINGS_BATCH_SIZE"]):
+                try:
+                    ext.supabase.table('holdings').insert(
+                        [row for _, row in batch], returning="minimal").execute()
+                    ext.portfolio_cache.add_holdings(g.user.id, portfolio_id, [row for _, row in batch],
+                                                     known=False)
+                    inserted += len(batch)
+                except Exception as e:
+                    errors.extend({"row": number, "error": f"Insert failed: {e}"} for number, _ in batch)
+                written = batch[-1][0]
+        except (ValueError, csv.Error) as e:
+            if not inserted:
+                return jsonify({"error": str(e)}), 400
+            errors = [err for err in errors if err["row"] <= written]
+            errors.append({"row": written + 1, "error": f"Import stopped after row {read}, "
+                                                       f"no rows from {written + 1} on were imported: {e}"})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Failed to import holdings: {e}"}), 500
+
+    if inserted:
+        ext.analytics_cache.invalidate(portfolio_id)
+    errors.sort(key=lambda err: err["row"])
+    return jsonify({"inserted": inserted, "failed": len(errors), "errors": errors}), 201 if inserted else 400
 
+
+@portfolio_bp.route("/holdings/<portfolio_id>/export", methods=["GET"])
+@auth_required
+def export_holdings(portfolio_id: str):
+    """
+    Streams a portfolio's holdings as CSV (default) or NDJSON, paging through
+    Supabase so the full list is never held in memory.
+    """
+    fmt = request.args.get("format", "csv").lower()
+    if fmt not in ("csv", "ndjson"):
+        return jsonify({"error": "format must be csv or ndjson"}), 400
+    try:
+        if not owns_portfolio(g.user.id, portfolio_id):
+            return jsonify({"error": "Portfolio not found or access denied"}), 403
     except Exception as e:
-        return jsonify({"error": f"Internal server error: {e}"}), 500
-    return jsonify({"error": "Method not allowed"}), 405
+        return jsonify({"error": f"Failed to export holdings: {e}"}), 500
+
+    page_size = current_app.config["HOLDINGS_EXPORT_PAGE_SIZE"]
+
+    def rows():
+        start = 0
+        while True:
+            page = ext.supabase.table('holdings').select(", ".join(EXPORT_FIELDS)).eq(
+                'portfolio_id', portfolio_id).order('id').range(start, start + page_size - 1).execute().data
+            yield from page
+            if len(page) < page_size:
+                return
+            start += page_size
+
+    body = export_csv(rows()) if fmt == "csv" else export_ndjson(rows())
+    mimetype = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    return Response(stream_with_context(body), mimetype=mimetype, headers={
+        "Content-Disposition": f"attachment; filename=holdings-{portfolio_id}.{fmt}"})
 
 
 @portfolio_bp.route("/holdings/<holding_id>", methods=["DELETE"])
@@ -99,20 +588,5 @@ def delete_holding(holding_id: str):
     Deletes a specific holding belonging to the authenticated user.
     Accepts a UUID string for holding_id.
     """
-    try:
-        # This complex query ensures a user can only delete holdings from their own portfolios.
-        check = ext.supabase.table('holdings').select(
-            'id, portfolios!inner(user_id)'
-        ).match({
-            'id': holding_id,
-            'portfolios.user_id': g.user.id
-        }).execute()
-
-        if not check.data:
-            return jsonify({"error": "Holding not found or access denied"}), 404
-
-        # If the check passes, proceed with deletion.
-        ext.supabase.table('holdings').delete().eq('id', holding_id).execute()
-        return jsonify({"message": "Holding deleted successfully"}), 200
-    except Exception as e:
-        return jsonify({"error": f"Failed to delete holding: {e}"}), 500
+    payload, status = run_flow(delete_holding_flow(ext.supabase, g.user.id, holding_id))
+    return jsonify(payload), status
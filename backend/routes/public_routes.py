@@ -1,81 +1,266 @@
+import time
+from typing import Any, Callable, List, Optional
 from urllib.parse import quote
-from flask import Blueprint, jsonify, request, current_app
-from backend.utils.api_helpers import make_api_request
+from flask import Blueprint, Response, jsonify, request, current_app, stream_with_context
+from backend.utils.api_helpers import Blocking, Quotes, Upstream, run_flow
+from backend.utils.quote_stream import SubscriberLimitReached, format_event
+from backend.utils.price_history import INTERVALS, parse_time
+from backend.utils.rate_governor import PRIORITY_MARKET, PRIORITY_BACKGROUND
+from backend.utils.http_cache import cached_response
+from backend.utils.response_shaping import QUOTE_FIELDS, SEARCH_FIELDS, project_all
+from backend.utils.metrics import PROMETHEUS_CONTENT_TYPE, cache_samples
+from backend.utils.scheduler import WarmJob
+import backend.extensions as ext
 
 public_bp = Blueprint('public_routes', __name__, url_prefix='/api')
 
+POPULAR_SYMBOLS = ["RELIANCE:NSE", "TCS:NSE", "HDFCBANK:NSE", "ICICIBANK:NSE",
+                   "INFY:NSE", "SBIN:NSE", "BHARTIARTL:NSE", "LT:NSE", "CIPLA:NSE"]
+STREAM_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+SEARCH_LIMIT = 10
+# Datasets the market scheduler keeps warm; news is the dashboard's first page
+WARM_JOBS = [WarmJob("market_trends", "/api/market-trends", market_hours=True),
+             WarmJob("popular_stocks", "/api/popular-stocks", market_hours=True),
+             WarmJob("business_news", "/api/business-news?limit=10&offset=0", market_hours=False)]
+
+
+def search_flow(config: Any, args: Any):
+    """Flow (see api_helpers.run_flow) behind /api/search."""
+    query = args.get('query')
+    if not query:
+        return {"error": "Query parameter is required"}, 400
+    local = ext.symbol_index.search(query, SEARCH_LIMIT)
+    if ext.symbol_index.is_confident(query, local):
+        return {"status": "OK", "data": {"stock": local}, "source": "index"}, 200
+
+    result = yield Upstream(config["RAPIDAPI_STOCK_HOST"], config["RAPIDAPI_KEY"],
+                            f"/search?query={quote(query)}&language=en", PRIORITY_BACKGROUND)
+    if result.get("status") != "OK":
+        if local:
+            return {"status": "OK", "data": {"stock": local}, "source": "index"}, 200
+        return result, 200
+    stocks = project_all((result.get("data") or {}).get("stock") or [], SEARCH_FIELDS)
+    if stocks:
+        ext.symbol_index.add(stocks)
+    elif local:
+        return {"status": "OK", "data": {"stock": local}, "source": "index"}, 200
+    return {"status": "OK", "data": {"stock": stocks}, "source": "upstream"}, 200
+
+
+def quotes_flow(config: Any, symbols: List[str]):
+    """Flow behind /api/quote and /api/popular-stocks."""
+    if not symbols:
+        return {"error": "Symbols parameter is required"}, 400
+    result = yield Quotes(config["RAPIDAPI_STOCK_HOST"], config["RAPIDAPI_KEY"], symbols,
+                          config["QUOTE_BATCH_SIZE"], PRIORITY_MARKET)
+    return result, 200
+
+
+def market_trends_flow(config: Any):
+    """Flow behind /api/market-trends: gainers and losers fetched concurrently."""
+    host, key = config["RAPIDAPI_STOCK_HOST"], config["RAPIDAPI_KEY"]
+    results = yield {trend: Upstream(host, key, f"/market-trends?trend_type={trend}&country=in&language=en")
+                     for trend in ("GAINERS", "LOSERS")}
+    response = {
+        "gainers": project_all((results["GAINERS"].get("data") or {}).get("trends", [])[:5], QUOTE_FIELDS),
+        "losers": project_all((results["LOSERS"].get("data") or {}).get("trends", [])[:5], QUOTE_FIELDS)
+    }
+    failed = [t.lower() for t, r in results.items() if r.get("status") != "OK"]
+    if failed:
+        response["errors"] = failed
+    return response, 200
+
+
+def business_news_flow(args: Any):
+    """
+    Flow behind /api/business-news. start() is a no-op once this process's
+    refresher runs; before that it loads the first page inline, so it is a
+    blocking step.
+    """
+    limit = max(1, min(args.get('limit', 8, type=int), 100))
+    offset = args.get('offset', 0, type=int)
+    cursor = args.get('cursor')
+
+    store = ext.news_store
+    yield Blocking(store.start)
+    if not store.last_refresh and not (yield Blocking(store.refresh)):
+        return {"status": "error", "message": "Failed to fetch news"}, 500
+
+    try:
+        return store.page(limit, cursor=cursor, offset=offset), 200
+    except (ValueError, UnicodeDecodeError):
+        return {"status": "error", "message": "Invalid cursor"}, 400
+
+
+def split_symbols(value: Optional[str]) -> List[str]:
+    return [s.strip() for s in (value or "").split(",") if s.strip()]
+
+
+def open_quote_stream(config: Any, args: Any, notify: Optional[Callable[[], None]] = None):
+    """
+    Subscribes to the quote stream for the `symbols` argument. Returns
+    (subscriber, None), or (None, (payload, status, headers)) when the stream is refused.
+    """
+    symbols = [s.upper() for s in split_symbols(args.get('symbols'))]
+    if not symbols:
+        return None, ({"error": "Symbols parameter is required"}, 400, {})
+    if len(symbols) > config["STREAM_MAX_SYMBOLS"]:
+        return None, ({"error": f"At most {config['STREAM_MAX_SYMBOLS']} symbols per stream"}, 400, {})
+    try:
+        return ext.quote_stream.subscribe(symbols, notify=notify), None
+    except SubscriberLimitReached as e:
+        print(f"Rejecting quote stream: {e}")
+        return None, ({"error": "Too many live streams, please retry shortly"}, 503, {"Retry-After": "30"})
+
 
 @public_bp.route("/search", methods=["GET"])
+@cached_response("SEARCH")
 def search_stocks():
-    query = request.args.get('query')
-    if not query:
-        return jsonify({"error": "Query parameter is required"}), 400
-    result = make_api_request(
-        current_app.config["RAPIDAPI_STOCK_HOST"],
-        current_app.config["RAPIDAPI_KEY"],
-        f"/search?query={quote(query)}&language=en"
-    )
-    return jsonify(result)
+    """
+    Autocompletes tickers and company names from the local symbol index,
+    falling back to RapidAPI when the index has no confident match. Upstream
+    results are added to the index so later queries stay local.
+    """
+    payload, status = run_flow(search_flow(current_app.config, request.args))
+    return jsonify(payload), status
 
 
 @public_bp.route("/quote", methods=["GET"])
 def get_quotes():
-    symbols = request.args.get('symbols')
-    if not symbols:
-        return jsonify({"error": "Symbols parameter is required"}), 400
-    result = make_api_request(
-        current_app.config["RAPIDAPI_STOCK_HOST"],
-        current_app.config["RAPIDAPI_KEY"],
-        f"/stock-quote?symbol={quote(symbols)}&language=en"
-    )
-    return jsonify(result)
+    payload, status = run_flow(quotes_flow(current_app.config, split_symbols(request.args.get('symbols'))))
+    return jsonify(payload), status
+
+
+@public_bp.route("/stream/quotes", methods=["GET"])
+def stream_quotes():
+    """
+    Server-Sent Events feed of live quotes for `symbols`. All clients of a worker
+    share one upstream poll of the symbols they watch; only changed quotes are
+    pushed, and a slow client receives the latest quote per symbol rather than a backlog.
+    """
+    subscriber, refusal = open_quote_stream(current_app.config, request.args)
+    if refusal:
+        payload, status, headers = refusal
+        return jsonify(payload), status, headers
+
+    heartbeat = current_app.config["STREAM_HEARTBEAT_INTERVAL"]
+    retry_ms = int(current_app.config["STREAM_POLL_INTERVAL"] * 1000)
+
+    def events():
+        event_id = 0
+        try:
+            yield f"retry: {retry_ms}\n\n"
+            while True:
+                quotes = subscriber.take(heartbeat)
+                if quotes:
+                    event_id += 1
+                    yield format_event("quotes", quotes, event_id)
+                else:
+                    yield ": keep-alive\n\n"
+        finally:
+            ext.quote_stream.unsubscribe(subscriber)
+
+    return Response(stream_with_context(events()), mimetype="text/event-stream", headers=STREAM_HEADERS)
+
+
+@public_bp.route("/history/<symbol>", methods=["GET"])
+def get_price_history(symbol):
+    """
+    OHLC bars for `symbol` from the local price history, between `from` and `to`
+    (epoch seconds or ISO-8601; default the last HISTORY_DEFAULT_DAYS days).
+    `interval` is one of 1m, 5m, 15m, 30m, 1h, 1d, 1w; without it the finest
+    interval that fits in HISTORY_MAX_POINTS bars is used.
+    """
+    if ext.price_history is None:
+        return jsonify({"error": "Price history is disabled"}), 503
+    interval = request.args.get('interval') or None
+    if interval is not None and interval not in INTERVALS:
+        return jsonify({"error": f"interval must be one of {', '.join(INTERVALS)}"}), 400
+    try:
+        end = parse_time(request.args.get('to')) or int(time.time())
+        start = parse_time(request.args.get('from'))
+    except ValueError:
+        return jsonify({"error": "from and to must be epoch seconds or ISO-8601 dates"}), 400
+    if start is None:
+        start = end - current_app.config["HISTORY_DEFAULT_DAYS"] * 86400
+    if start > end:
+        return jsonify({"error": "from must not be after to"}), 400
+
+    interval, bars = ext.price_history.query(
+        symbol, start, end, interval, current_app.config["HISTORY_MAX_POINTS"])
+    columns = {name: values.tolist() for name, values in bars.items()}
+    data = [dict(zip(columns, row)) for row in zip(*columns.values())]
+    return jsonify({"status": "OK", "symbol": symbol.upper(), "interval": interval,
+                    "from": start, "to": end, "data": data})
 
 
 @public_bp.route("/market-trends", methods=["GET"])
+@cached_response("MARKET_TRENDS")
 def get_market_trends():
-    gainers = make_api_request(
-        current_app.config["RAPIDAPI_STOCK_HOST"], current_app.config["RAPIDAPI_KEY"],
-        "/market-trends?trend_type=GAINERS&country=in&language=en"
-    )
-    losers = make_api_request(
-        current_app.config["RAPIDAPI_STOCK_HOST"], current_app.config["RAPIDAPI_KEY"],
-        "/market-trends?trend_type=LOSERS&country=in&language=en"
-    )
-    response = {
-        "gainers": gainers.get("data", {}).get("trends", [])[:5],
-        "losers": losers.get("data", {}).get("trends", [])[:5]
-    }
-    return jsonify(response)
+    payload, status = run_flow(market_trends_flow(current_app.config))
+    return jsonify(payload), status
 
 
 @public_bp.route("/popular-stocks", methods=["GET"])
+@cached_response("POPULAR_STOCKS")
 def get_popular_stocks():
-    symbols = "RELIANCE:NSE,TCS:NSE,HDFCBANK:NSE,ICICIBANK:NSE,INFY:NSE,SBIN:NSE,BHARTIARTL:NSE,LT:NSE,CIPLA:NSE"
-    result = make_api_request(
-        current_app.config["RAPIDAPI_STOCK_HOST"],
-        current_app.config["RAPIDAPI_KEY"],
-        f"/stock-quote?symbol={quote(symbols)}&language=en"
-    )
-    return jsonify(result)
+    payload, status = run_flow(quotes_flow(current_app.config, POPULAR_SYMBOLS))
+    return jsonify(payload), status
 
 
 @public_bp.route("/business-news", methods=["GET"])
+@cached_response("BUSINESS_NEWS")
 def get_business_news():
-    limit = request.args.get('limit', 8, type=int)
-    offset = request.args.get('offset', 0, type=int)
-    result = make_api_request(
-        current_app.config["RAPIDAPI_NEWS_HOST"],
-        current_app.config["RAPIDAPI_NEWS_KEY"],
-        f"/topic-headlines?topic=BUSINESS&limit=500&country=IN&lang=en"
-    )
-    if result.get("status") != "OK" or not isinstance(result.get("data"), list):
-        return jsonify({"status": "error", "message": "Failed to fetch news"}), 500
-    formatted_news = [{"article_title": i.get("title"), "article_url": i.get("link"), "article_photo_url": i.get(
-        "photo_url"), "source": i.get("source_name"), "post_time_utc": i.get("published_datetime_utc")} for i in result["data"]]
-    paginated = formatted_news[offset:offset + limit]
-    return jsonify({"status": "OK", "data": paginated, "has_more": len(formatted_news) > offset + limit, "total": len(formatted_news)})
+    """
+    Serves a page of business news from the background-refreshed news store.
+    Pass `cursor` (from `next_cursor`) to page forward; `offset` is still accepted.
+    """
+    payload, status = run_flow(business_news_flow(request.args))
+    return jsonify(payload), status
+
+
+def render_metrics(*flights: Any) -> str:
+    """
+    Request and phase latencies plus cache, coalescing and rate-governor counters.
+    `flights` are extra SingleFlight groups to count besides ext.upstream_flight.
+    """
+    samples = cache_samples({
+        "quote": ext.quote_cache.stats(),
+        "response": ext.response_cache.stats(),
+        "analytics": ext.analytics_cache.stats(),
+        "portfolio": ext.portfolio_cache.stats(),
+        "ledger": ext.ledger_cache.stats(),
+        "token": ext.token_cache.stats(),
+    })
+    samples.append(("tradefolio_upstream_coalesced_total", "counter", (),
+                    float(sum(f.stats()["coalesced"] for f in (ext.upstream_flight, *flights)))))
+    if ext.rate_governor is not None:
+        governor = ext.rate_governor.stats()
+        samples += [("tradefolio_rate_governor_total", "counter", (("outcome", outcome),), float(governor[outcome]))
+                    for outcome in ("admitted", "rejected", "stale_served", "throttled")]
+    return ext.metrics.render(samples)
+
+
+@public_bp.route("/metrics", methods=["GET"])
+def metrics():
+    """Prometheus scrape endpoint (numbers are per worker process)."""
+    return Response(render_metrics(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+def health_status(flight: Any) -> dict:
+    """Cache, coalescing (of `flight`), stream and background-job stats for /api/health."""
+    return {"status": "OK", "message": "API is healthy", "quote_cache": ext.quote_cache.stats(),
+            "upstream_coalescing": flight.stats(),
+            "quote_stream": ext.quote_stream.stats(),
+            "analytics_cache": ext.analytics_cache.stats(),
+            "portfolio_cache": ext.portfolio_cache.stats(),
+            "ledger_cache": ext.ledger_cache.stats(),
+            "response_cache": ext.response_cache.stats(),
+            "scheduler": ext.scheduler.stats() if ext.scheduler else None,
+            "price_history": ext.history_recorder.stats() if ext.history_recorder else None,
+            "rate_governor": ext.rate_governor.stats() if ext.rate_governor else None}
 
 
 @public_bp.route("/health", methods=["GET"])
 def health_check():
-    return jsonify({"status": "OK", "message": "API is healthy"}), 200
+    return jsonify(health_status(ext.upstream_flight)), 200
@@ -0,0 +1,17 @@
+"""
+Async entry point: serves the API over ASGI with Hypercorn.
+
+    python -m backend.run_async
+    hypercorn backend.run_async:app --bind 0.0.0.0:5001
+"""
+import asyncio
+from hypercorn.asyncio import serve
+from hypercorn.config import Config as HypercornConfig
+from backend.asgi import create_async_app
+
+app = create_async_app()
+
+if __name__ == "__main__":
+    server_config = HypercornConfig()
+    server_config.bind = ["localhost:5001"]
+    asyncio.run(serve(app, server_config))
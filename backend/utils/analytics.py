@@ -0,0 +1,200 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.utils.price_history import DAILY, PriceHistory
+
+TRADING_DAYS = 252
+
+
+def forward_fill(prices: np.ndarray) -> np.ndarray:
+    """Carries the last known price down each column; leading gaps stay NaN."""
+    rows = np.arange(len(prices))[:, None]
+    last = np.where(np.isnan(prices), 0, rows)
+    np.maximum.accumulate(last, axis=0, out=last)
+    return prices[last, np.arange(prices.shape[1])]
+
+
+def align_closes(history: PriceHistory, symbols: Sequence[str], start: int,
+                 end: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reads daily closes for `symbols` and aligns them on the union of their dates.
+    Returns (dates, prices) with prices shaped (dates, symbols), forward-filled
+    over gaps and NaN before a symbol's first bar.
+    """
+    series = [history.read(s, DAILY, start, end, columns=("close",)) for s in symbols]
+    # Daily bars sit on UTC midnights, so the union is a bitmap over day numbers
+    # and each bar's row is the running count of marked days before it.
+    day_numbers = [np.asarray(s["timestamp"]) // 86400 for s in series]
+    nonempty = [d for d in day_numbers if len(d)]
+    if not nonempty:
+        return np.empty(0, dtype=np.int64), np.full((0, len(symbols)), np.nan)
+    first = min(int(d[0]) for d in nonempty)
+    marked = np.zeros(max(int(d[-1]) for d in nonempty) - first + 1, dtype=bool)
+    for d in nonempty:
+        marked[d - first] = True
+    row_of_day = np.cumsum(marked) - 1
+    dates = (np.flatnonzero(marked) + first) * 86400
+
+    prices = np.full((len(dates), len(symbols)), np.nan, order="F")
+    for j, (s, d) in enumerate(zip(series, day_numbers)):
+        if len(d):
+            prices[row_of_day[d - first], j] = s["close"]
+    return dates, forward_fill(prices)
+
+
+def pairwise_correlation(returns: np.ndarray) -> np.ndarray:
+    """
+    Pearson correlation between columns, each pair over the rows where both
+    have a value (NaN marks a missing return), computed with matrix products.
+    """
+    present = (~np.isnan(returns)).astype(np.float64)
+    x = np.nan_to_num(returns)
+    n = present.T @ present
+    sum_x = x.T @ present            # [i, j]: sum of column i over rows where j is present
+    sum_xx = (x * x).T @ present
+    sum_xy = x.T @ x
+    with np.errstate(divide="ignore", invalid="ignore"):
+        spread = n * sum_xx - sum_x ** 2
+        corr = (n * sum_xy - sum_x * sum_x.T) / np.sqrt(spread * spread.T)
+    corr[(n < 2) | ~np.isfinite(corr)] = np.nan
+    return np.clip(corr, -1.0, 1.0)
+
+
+def _number(value: float, digits: int = 6) -> Optional[float]:
+    return round(float(value), digits) if np.isfinite(value) else None
+
+
+def compute_analytics(dates: np.ndarray, prices: np.ndarray, quantities: np.ndarray,
+                      benchmark: Optional[np.ndarray] = None) -> Dict[str, Any]:
+    """
+    Buy-and-hold analytics for the current quantities over aligned daily closes.
+
+    Daily portfolio returns weight each holding's return by its value the day
+    before, counting only holdings priced on both days, so a symbol entering
+    the history mid-window does not register as a gain. Chaining them gives the
+    time-weighted return. `benchmark` is a closes vector on the same dates.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        asset_returns = prices[1:] / prices[:-1] - 1.0
+    priced = np.isfinite(asset_returns)
+    weights = np.where(priced, prices[:-1] * quantities, 0.0)
+    total = weights.sum(axis=1)
+    active = total > 0
+    portfolio_returns = (weights * np.where(priced, asset_returns, 0.0)).sum(axis=1)[active] / total[active]
+    # Date of each point on the wealth curve: the day before the first return, then each return's day
+    days = dates[np.r_[np.flatnonzero(active)[:1], np.flatnonzero(active) + 1]]
+
+    result: Dict[str, Any] = {"start": int(dates[0]) if len(dates) else None,
+                              "end": int(dates[-1]) if len(dates) else None,
+                              "observations": int(len(portfolio_returns)),
+                              "time_weighted_return": None, "annualized_return": None,
+                              "annualized_volatility": None, "max_drawdown": None,
+                              "beta": None}
+    if len(portfolio_returns):
+        growth = np.cumprod(1.0 + portfolio_returns)
+        twr = growth[-1] - 1.0
+        result["time_weighted_return"] = _number(twr)
+        result["annualized_return"] = _number((1.0 + twr) ** (TRADING_DAYS / len(portfolio_returns)) - 1.0)
+
+        wealth = np.r_[1.0, growth]
+        peaks = np.maximum.accumulate(wealth)
+        drawdowns = wealth / peaks - 1.0
+        trough = int(np.argmin(drawdowns))
+        peak = int(np.argmax(wealth[:trough + 1]))
+        result["max_drawdown"] = {"value": _number(drawdowns[trough]),
+                                  "peak": int(days[peak]), "trough": int(days[trough])}
+    if len(portfolio_returns) > 1:
+        result["annualized_volatility"] = _number(np.std(portfolio_returns, ddof=1) * np.sqrt(TRADING_DAYS))
+
+    if benchmark is not None and len(portfolio_returns) > 1:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            bench_returns = (benchmark[1:] / benchmark[:-1] - 1.0)[active]
+        both = np.isfinite(bench_returns)
+        if both.sum() > 1:
+            cov = np.cov(portfolio_returns[both], bench_returns[both])
+            result["beta"] = _number(cov[0, 1] / cov[1, 1]) if cov[1, 1] > 0 else None
+    return result
+
+
+def portfolio_analytics(history: PriceHistory, holdings: List[Dict[str, Any]], start: int, end: int,
+                        benchmark_symbol: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Aggregates lots by symbol and computes returns, risk, beta against
+    `benchmark_symbol` and the holding correlation matrix from stored daily bars.
+    """
+    quantity_by_symbol: Dict[str, float] = {}
+    for h in holdings:
+        symbol = h["symbol"].upper()
+        quantity_by_symbol[symbol] = quantity_by_symbol.get(symbol, 0.0) + float(h["quantity"])
+    symbols = list(quantity_by_symbol)
+    quantities = np.array([quantity_by_symbol[s] for s in symbols], dtype=np.float64)
+
+    dates, prices = align_closes(history, symbols, start, end)
+    benchmark = None
+    if benchmark_symbol and len(dates):
+        bench = history.read(benchmark_symbol, DAILY, start, end, columns=("close",))
+        if len(bench["timestamp"]):
+            # Benchmark close on or before each portfolio date
+            idx = np.searchsorted(bench["timestamp"], dates, side="right") - 1
+            benchmark = np.where(idx >= 0, np.asarray(bench["close"])[np.maximum(idx, 0)], np.nan)
+
+    result = compute_analytics(dates, prices, quantities, benchmark)
+    result["benchmark"] = benchmark_symbol if benchmark is not None else None
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = pairwise_correlation(prices[1:] / prices[:-1] - 1.0) if len(dates) > 1 else \
+            np.full((len(symbols), len(symbols)), np.nan)
+    corr = corr.round(4)
+    result["correlation"] = {
+        "symbols": symbols,
+        "matrix": [[None if v != v else v for v in row] for row in corr.tolist()],
+    }
+    result["missing_history"] = [s for s, seen in zip(symbols, np.isfinite(prices).any(axis=0)) if not seen]
+    return result
+
+
+class AnalyticsCache:
+    """
+    TTL/LRU cache of computed analytics, grouped by portfolio so writes to a
+    portfolio's holdings can drop every cached variant of it at once.
+    """
+
+    def __init__(self, ttl: float = 300.0, max_size: int = 1024):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, portfolio_id: str, key: Hashable) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get((portfolio_id, key))
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[(portfolio_id, key)]
+                self.misses += 1
+                return None
+            self._entries.move_to_end((portfolio_id, key))
+            self.hits += 1
+            return entry[1]
+
+    def set(self, portfolio_id: str, key: Hashable, value: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[(portfolio_id, key)] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end((portfolio_id, key))
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, portfolio_id: str) -> None:
+        with self._lock:
+            for entry_key in [k for k in self._entries if k[0] == portfolio_id]:
+                del self._entries[entry_key]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -1,19 +1,190 @@
-import http.client
-import json
-from typing import Any, Dict
+from urllib.parse import quote
+from typing import Any, Callable, Dict, Generator, List, NamedTuple
+import backend.extensions as ext
+from backend.utils import fast_json
+from backend.utils.rate_governor import PRIORITY_MARKET, PRIORITY_PORTFOLIO
+from backend.utils.response_shaping import QUOTE_FIELDS, project
 
 
-def make_api_request(host: str, api_key: str, endpoint: str) -> Dict[str, Any]:
-    """Generic function to make requests to a RapidAPI endpoint."""
-    conn = http.client.HTTPSConnection(host)
+def make_api_request(host: str, api_key: str, endpoint: str, priority: int = PRIORITY_MARKET,
+                     stale_ok: bool = True) -> Dict[str, Any]:
+    """
+    Generic function to make requests to a RapidAPI endpoint.
+    Identical concurrent requests share one upstream call and its parsed result.
+    Calls wait for the rate governor's budget in their `priority` class; when it
+    runs out, the last good response (if `stale_ok`) is returned marked `stale`.
+    """
+    return ext.upstream_flight.do(
+        (host, endpoint), lambda: _request_upstream(host, api_key, endpoint, priority, stale_ok))
+
+
+def _request_upstream(host: str, api_key: str, endpoint: str, priority: int = PRIORITY_MARKET,
+                      stale_ok: bool = True) -> Dict[str, Any]:
+    """Performs the upstream request over a pooled keep-alive connection."""
+    governor = ext.rate_governor
+    if governor is not None and not governor.acquire(host, api_key, priority):
+        ext.metrics.inc("tradefolio_upstream_requests_total", host=host, outcome="over_budget")
+        return over_budget(host, endpoint, stale_ok, "Upstream rate limit budget exhausted")
     headers = {'x-rapidapi-key': api_key, 'x-rapidapi-host': host}
     try:
-        conn.request("GET", endpoint, headers=headers)
-        res = conn.getresponse()
-        data = res.read()
-        return json.loads(data.decode("utf-8"))
+        with ext.metrics.timed("upstream"):
+            status, data = ext.http_pools.get(host).request("GET", endpoint, headers=headers)
+        if status == 429:
+            return upstream_throttled(host, api_key, endpoint, stale_ok)
+        result = fast_json.loads(data)
     except Exception as e:
         print(f"API request error to {host}: {e}")
+        ext.metrics.inc("tradefolio_upstream_requests_total", host=host, outcome="error")
         return {"status": "error", "message": str(e)}
-    finally:
-        conn.close()
+    ext.metrics.inc("tradefolio_upstream_requests_total", host=host,
+                    outcome="ok" if result.get("status") == "OK" else "error")
+    if governor is not None and stale_ok and result.get("status") == "OK":
+        governor.remember(host, endpoint, result)
+    return result
+
+
+def upstream_throttled(host: str, api_key: str, endpoint: str, stale_ok: bool) -> Dict[str, Any]:
+    """Handles a 429: pauses the host's budget and falls back like an exhausted budget."""
+    print(f"API rate limit hit on {host}, pausing upstream calls")
+    ext.metrics.inc("tradefolio_upstream_requests_total", host=host, outcome="throttled")
+    if ext.rate_governor is not None:
+        ext.rate_governor.throttle(host, api_key)
+    return over_budget(host, endpoint, stale_ok, "Upstream rate limit exceeded")
+
+
+def over_budget(host: str, endpoint: str, stale_ok: bool, message: str) -> Dict[str, Any]:
+    """The last good response for the endpoint marked stale, or a rate-limited error."""
+    stale = ext.rate_governor.stale(host, endpoint) if ext.rate_governor is not None and stale_ok else None
+    if stale is not None:
+        return dict(stale, stale=True)
+    return {"status": "error", "message": message, "rate_limited": True}
+
+
+def fetch_quotes(host: str, api_key: str, symbols: List[str], batch_size: int = 20,
+                 priority: int = PRIORITY_PORTFOLIO, use_cache: bool = True) -> Dict[str, Any]:
+    """
+    Returns quotes for the given symbols, going upstream only for cache misses
+    (or for all of them without `use_cache`; fetched quotes are cached either way).
+    Misses are split into batches of `batch_size` that are fetched concurrently;
+    quotes are merged back in request order and unknown symbols are omitted.
+    """
+    if use_cache:
+        cached, missing = ext.quote_cache.get_many(symbols)
+    else:
+        cached, missing = {}, list(dict.fromkeys(ext.quote_cache.normalize(s) for s in symbols))
+    results = ext.fanout.run({
+        i: (lambda e=endpoint: make_api_request(host, api_key, e, priority, stale_ok=False))
+        for i, endpoint in enumerate(quote_endpoints(missing, batch_size))
+    }) if missing else {}
+    return merge_quote_results(symbols, cached, results)
+
+
+def quote_endpoints(symbols: List[str], batch_size: int) -> List[str]:
+    """Upstream /stock-quote endpoints covering `symbols` in batches of `batch_size`."""
+    return [f"/stock-quote?symbol={quote(','.join(symbols[i:i + batch_size]))}&language=en"
+            for i in range(0, len(symbols), batch_size)]
+
+
+def merge_quote_results(symbols: List[str], cached: Dict[str, Any],
+                        results: Dict[Any, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Caches and records freshly fetched quotes, projected to QUOTE_FIELDS, and
+    returns all quotes in request order.
+    If a batch failed, its symbols are answered from expired cache entries still in
+    the stale window and listed under `stale`. Returns the first upstream error only
+    when every batch failed and there is nothing to answer with.
+    """
+    failed = [r for r in results.values() if r.get("status") != "OK"]
+    fresh = []
+    for result in results.values():
+        if result.get("status") != "OK":
+            continue
+        fetched = result.get("data") or []
+        for item in fetched if isinstance(fetched, list) else [fetched]:
+            if isinstance(item, dict) and item.get("symbol"):
+                item = project(item, QUOTE_FIELDS)
+                ext.quote_cache.set(item["symbol"], item)
+                cached[ext.quote_cache.normalize(item["symbol"])] = item
+                fresh.append(item)
+
+    if fresh and ext.history_recorder is not None:
+        ext.history_recorder.record(fresh)
+
+    ordered, stale, seen = [], [], set()
+    for symbol in symbols:
+        key = ext.quote_cache.normalize(symbol)
+        if key in seen:
+            continue
+        seen.add(key)
+        item = cached.pop(key, None)
+        if item is None and failed:
+            item = ext.quote_cache.get_stale(key)
+            if item is not None:
+                stale.append(key)
+        if item is not None:
+            ordered.append(item)
+    if results and len(failed) == len(results) and not ordered:
+        return failed[0]
+    response = {"status": "OK", "data": ordered}
+    if stale:
+        response["stale"] = stale
+    return response
+
+
+class Upstream(NamedTuple):
+    """Flow step: one RapidAPI call through make_api_request."""
+    host: str
+    api_key: str
+    endpoint: str
+    priority: int = PRIORITY_MARKET
+
+
+class Quotes(NamedTuple):
+    """Flow step: quotes for `symbols` through fetch_quotes."""
+    host: str
+    api_key: str
+    symbols: List[str]
+    batch_size: int = 20
+    priority: int = PRIORITY_PORTFOLIO
+
+
+class Blocking(NamedTuple):
+    """Flow step: a blocking call, run off the event loop by the async driver."""
+    fn: Callable[..., Any]
+    args: tuple = ()
+
+
+def run_flow(flow: Generator) -> Any:
+    """
+    Drives a route flow on this thread and returns what it returns.
+
+    A flow is a generator holding a route's logic for both the Flask and the
+    async app. It yields the I/O it needs and is sent the result: an Upstream,
+    Quotes or Blocking step, a Supabase query builder (executed), or a dict of
+    steps run concurrently under the fan-out deadline (sent back keyed alike).
+    Exceptions are thrown into the flow where the step was yielded.
+    async_api_helpers.run_flow drives the same flows on the event loop.
+    """
+    try:
+        step = next(flow)
+        while True:
+            try:
+                result = _perform(step)
+            except Exception as e:
+                step = flow.throw(e)
+            else:
+                step = flow.send(result)
+    except StopIteration as done:
+        return done.value
+
+
+def _perform(step: Any) -> Any:
+    if isinstance(step, dict):
+        return ext.fanout.run({key: (lambda s=s: _perform(s)) for key, s in step.items()})
+    if isinstance(step, Upstream):
+        return make_api_request(step.host, step.api_key, step.endpoint, step.priority)
+    if isinstance(step, Quotes):
+        return fetch_quotes(step.host, step.api_key, step.symbols, step.batch_size, step.priority)
+    if isinstance(step, Blocking):
+        return step.fn(*step.args)
+    return step.execute()
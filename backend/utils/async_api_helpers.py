@@ -0,0 +1,107 @@
+import asyncio
+from typing import Any, Awaitable, Dict, Generator, Hashable, List, Mapping, Optional
+import backend.async_extensions as aext
+import backend.extensions as ext
+from backend.utils import fast_json
+from backend.utils.api_helpers import (
+    Blocking, Quotes, Upstream, quote_endpoints, merge_quote_results, over_budget, upstream_throttled)
+from backend.utils.rate_governor import PRIORITY_MARKET, PRIORITY_PORTFOLIO
+
+
+async def make_api_request(host: str, api_key: str, endpoint: str, priority: int = PRIORITY_MARKET,
+                           stale_ok: bool = True) -> Dict[str, Any]:
+    """
+    Async counterpart of api_helpers.make_api_request. Identical concurrent
+    requests on this event loop share one upstream call.
+    """
+    return await aext.upstream_flight.do(
+        (host, endpoint), lambda: _request_upstream(host, api_key, endpoint, priority, stale_ok))
+
+
+async def _request_upstream(host: str, api_key: str, endpoint: str, priority: int = PRIORITY_MARKET,
+                            stale_ok: bool = True) -> Dict[str, Any]:
+    governor = ext.rate_governor
+    if governor is not None and not await governor.acquire_async(host, api_key, priority):
+        ext.metrics.inc("tradefolio_upstream_requests_total", host=host, outcome="over_budget")
+        return over_budget(host, endpoint, stale_ok, "Upstream rate limit budget exhausted")
+    headers = {'x-rapidapi-key': api_key, 'x-rapidapi-host': host}
+    try:
+        with ext.metrics.timed("upstream"):
+            response = await aext.http_client.get(f"https://{host}{endpoint}", headers=headers)
+        if response.status_code == 429:
+            return upstream_throttled(host, api_key, endpoint, stale_ok)
+        result = fast_json.loads(response.content)
+    except Exception as e:
+        # Timeouts stringify to "", so report the exception type as well
+        print(f"API request error to {host}: {e!r}")
+        ext.metrics.inc("tradefolio_upstream_requests_total", host=host, outcome="error")
+        return {"status": "error", "message": str(e) or type(e).__name__}
+    ext.metrics.inc("tradefolio_upstream_requests_total", host=host,
+                    outcome="ok" if result.get("status") == "OK" else "error")
+    if governor is not None and stale_ok and result.get("status") == "OK":
+        governor.remember(host, endpoint, result)
+    return result
+
+
+async def gather_calls(calls: Mapping[Hashable, Awaitable[Dict[str, Any]]],
+                       timeout: Optional[float] = None) -> Dict[Hashable, Dict[str, Any]]:
+    """
+    Runs the coroutines concurrently under one shared deadline, like FanOut.run.
+    Calls that fail or miss the deadline yield an error dict instead of raising.
+    """
+    tasks = {key: asyncio.ensure_future(call) for key, call in calls.items()}
+    if not tasks:
+        return {}
+    await asyncio.wait(tasks.values(), timeout=timeout if timeout is not None else aext.call_timeout)
+    results = {}
+    for key, task in tasks.items():
+        if not task.done():
+            task.cancel()
+            results[key] = {"status": "error", "message": "Upstream call timed out"}
+        elif task.exception() is not None:
+            print(f"Upstream call {key!r} failed: {task.exception()}")
+            results[key] = {"status": "error", "message": str(task.exception())}
+        else:
+            results[key] = task.result()
+    return results
+
+
+async def fetch_quotes(host: str, api_key: str, symbols: List[str], batch_size: int = 20,
+                       priority: int = PRIORITY_PORTFOLIO, use_cache: bool = True) -> Dict[str, Any]:
+    """Async counterpart of api_helpers.fetch_quotes, sharing its quote cache."""
+    if use_cache:
+        cached, missing = ext.quote_cache.get_many(symbols)
+    else:
+        cached, missing = {}, list(dict.fromkeys(ext.quote_cache.normalize(s) for s in symbols))
+    results = await gather_calls({
+        i: make_api_request(host, api_key, endpoint, priority, stale_ok=False)
+        for i, endpoint in enumerate(quote_endpoints(missing, batch_size))
+    }) if missing else {}
+    return merge_quote_results(symbols, cached, results)
+
+
+async def run_flow(flow: Generator) -> Any:
+    """Async counterpart of api_helpers.run_flow: steps are awaited, blocking ones on a thread."""
+    try:
+        step = next(flow)
+        while True:
+            try:
+                result = await _perform(step)
+            except Exception as e:
+                step = flow.throw(e)
+            else:
+                step = flow.send(result)
+    except StopIteration as done:
+        return done.value
+
+
+async def _perform(step: Any) -> Any:
+    if isinstance(step, dict):
+        return await gather_calls({key: _perform(s) for key, s in step.items()})
+    if isinstance(step, Upstream):
+        return await make_api_request(step.host, step.api_key, step.endpoint, step.priority)
+    if isinstance(step, Quotes):
+        return await fetch_quotes(step.host, step.api_key, step.symbols, step.batch_size, step.priority)
+    if isinstance(step, Blocking):
+        return await asyncio.to_thread(step.fn, *step.args)
+    return await step.execute()
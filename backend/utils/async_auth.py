@@ -0,0 +1,37 @@
+from functools import wraps
+from typing import Any, Callable
+from quart import request, jsonify, g
+import backend.async_extensions as aext
+import backend.extensions as ext
+from backend.utils.auth import authenticate_locally, remember_remote_user
+
+
+async def authenticate_token(token: str) -> Any:
+    """
+    Async counterpart of auth.authenticate_token: same token cache and local
+    verification, with the Supabase fallback awaited on the async client.
+    """
+    user = authenticate_locally(token)
+    if user is not None:
+        return user
+    return remember_remote_user(token, await aext.supabase.auth.get_user(token))
+
+
+def auth_required(f: Callable) -> Callable:
+    """Decorator to protect async routes that require user authentication."""
+    @wraps(f)
+    async def decorated_function(*args, **kwargs):
+        auth_header = request.headers.get("Authorization")
+        if not auth_header or not auth_header.startswith("Bearer "):
+            return jsonify({"error": "Unauthorized: Missing or invalid token"}), 401
+
+        jwt = auth_header.split(" ")[1]
+        try:
+            with ext.metrics.timed("auth"):
+                g.user = await authenticate_token(jwt)
+        except Exception as e:
+            print(f"Token validation error: {e}")
+            return jsonify({"error": "Unauthorized: Invalid or expired token"}), 401
+
+        return await f(*args, **kwargs)
+    return decorated_function
@@ -0,0 +1,18 @@
+from quart import Quart, request
+from quart.wrappers.response import DataBody
+from backend.utils.compression import compress_body, is_compressible
+
+
+def init_compression(app: Quart) -> None:
+    """Async counterpart of compression.init_compression; streamed and file bodies are left alone."""
+    if not app.config["COMPRESSION_ENABLED"]:
+        return
+
+    @app.after_request
+    async def compress_response(response):
+        if not isinstance(response.response, DataBody) or not is_compressible(response):
+            return response
+        encoded = compress_body(app.config, response, await response.get_data(), request.accept_encodings)
+        if encoded is not None:
+            response.set_data(encoded)
+        return response
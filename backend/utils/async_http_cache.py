@@ -0,0 +1,46 @@
+import asyncio
+from functools import wraps
+from typing import Any, Callable
+from quart import current_app, request
+import backend.extensions as ext
+from backend.utils.http_cache import cache_policy, set_cache_headers
+from backend.utils.response_cache import ResponseCache
+
+# Background refresh tasks, kept referenced until they finish
+_refresh_tasks = set()
+
+
+def cached_response(policy: str) -> Callable:
+    """Async counterpart of http_cache.cached_response, sharing its cache; refreshes run as tasks."""
+    def decorator(view: Callable) -> Callable:
+        @wraps(view)
+        async def wrapper(*args, **kwargs):
+            max_age, swr = cache_policy(current_app.config, policy)
+            cache, key, app = ext.response_cache, request.full_path, current_app._get_current_object()
+            payload, needs_refresh = cache.lookup(key, max_age, swr)
+            if needs_refresh:
+                task = asyncio.ensure_future(_refresh(app, cache, key, request.path,
+                                                      request.args.to_dict(flat=False), view, args, kwargs))
+                _refresh_tasks.add(task)
+                task.add_done_callback(_refresh_tasks.discard)
+            if payload is not None:
+                response = app.response_class(payload.body, mimetype=payload.mimetype)
+            else:
+                response = await app.make_response(await view(*args, **kwargs))
+                payload = cache.store(key, response.status_code, response.mimetype, await response.get_data())
+            set_cache_headers(response, payload, max_age, swr)
+            return await response.make_conditional(request)
+        return wrapper
+    return decorator
+
+
+async def _refresh(app: Any, cache: ResponseCache, key: str, path: str, query: dict,
+                   view: Callable, args: tuple, kwargs: dict) -> None:
+    try:
+        async with app.test_request_context(path, query_string=query):
+            response = await app.make_response(await view(*args, **kwargs))
+            cache.store(key, response.status_code, response.mimetype, await response.get_data())
+    except Exception as e:
+        print(f"Background refresh of {key} failed: {e}")
+    finally:
+        cache.refresh_done(key)
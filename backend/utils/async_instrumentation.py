@@ -0,0 +1,25 @@
+from quart import Quart, g, request
+import backend.extensions as ext
+
+
+def instrument_app(app: Quart) -> None:
+    """Async counterpart of instrumentation.instrument_app, recording into the same ext.metrics."""
+    server_timing = app.config["SERVER_TIMING_ENABLED"]
+
+    @app.before_request
+    async def start_timing():
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        g.metrics_token = ext.metrics.begin_request(route)
+
+    @app.after_request
+    async def record_timing(response):
+        timings = ext.metrics.end_request(request.method, response.status_code)
+        if server_timing and timings is not None:
+            response.headers["Server-Timing"] = timings.server_timing()
+        return response
+
+    @app.teardown_request
+    async def stop_timing(error=None):
+        token = g.pop("metrics_token", None)
+        if token is not None:
+            ext.metrics.reset_request(token)
@@ -1,7 +1,60 @@
 from functools import wraps
-from typing import Callable
+from typing import Any, Callable, Optional
+import jwt as pyjwt
 from flask import request, jsonify, g
 import backend.extensions as ext
+from backend.utils.jwt_verifier import LocalVerificationUnavailable, user_from_claims
+
+
+def authenticate_token(token: str, client: Any = None) -> Any:
+    """
+    Resolves a bearer token to a user. Previously verified tokens are served from
+    the token cache; otherwise the token is checked locally when a verifier is
+    configured, falling back to Supabase's /auth/v1/user if allowed.
+    Raises on invalid tokens.
+    """
+    user = authenticate_locally(token)
+    if user is not None:
+        return user
+    return remember_remote_user(token, (client or ext.supabase).auth.get_user(token))
+
+
+def authenticate_locally(token: str) -> Any:
+    """
+    Returns the user from the token cache or local verification, or None when
+    the token has to be checked with Supabase. Raises on invalid tokens.
+    """
+    user = ext.token_cache.get(token)
+    if user is not None:
+        return user
+
+    if ext.jwt_verifier is not None:
+        try:
+            claims = ext.jwt_verifier.verify(token)
+            user = user_from_claims(claims)
+            ext.token_cache.set(token, user, claims["exp"])
+            return user
+        except LocalVerificationUnavailable as e:
+            if not ext.auth_remote_fallback:
+                raise ValueError(f"Token cannot be verified locally: {e}")
+    return None
+
+
+def remember_remote_user(token: str, user_response: Any) -> Any:
+    """Validates a Supabase get_user response and caches the user until the token expires."""
+    if not user_response or not getattr(user_response, "user", None):
+        raise ValueError("Invalid user response")
+    expires_at = _unverified_expiry(token)
+    if expires_at:
+        ext.token_cache.set(token, user_response.user, expires_at)
+    return user_response.user
+
+
+def _unverified_expiry(token: str) -> Optional[float]:
+    try:
+        return pyjwt.decode(token, options={"verify_signature": False}).get("exp")
+    except pyjwt.InvalidTokenError:
+        return None
 
 
 def auth_required(f: Callable) -> Callable:
@@ -14,11 +67,8 @@ def auth_required(f: Callable) -> Callable:
 
         jwt = auth_header.split(" ")[1]
         try:
-            user_response = ext.supabase.auth.get_user(jwt)
-            # ------------------------
-            if not user_response or not hasattr(user_response, "user"):
-                raise ValueError("Invalid user response")
-            g.user = user_response.user
+            with ext.metrics.timed("auth"):
+                g.user = authenticate_token(jwt)
         except Exception as e:
             print(f"Token validation error: {e}")
             return jsonify({"error": "Unauthorized: Invalid or expired token"}), 401
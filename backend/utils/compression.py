@@ -0,0 +1,72 @@
+import gzip
+from typing import Any, Optional
+from flask import Flask, request
+import backend.extensions as ext
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only without it
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {"application/json", "text/csv", "text/plain", "text/html"}
+
+
+def negotiate(accept_encodings: Any) -> Optional[str]:
+    """Best supported encoding the client accepts (brotli over gzip), or None."""
+    if brotli is not None and accept_encodings.quality("br") > 0:
+        return "br"
+    if accept_encodings.quality("gzip") > 0:
+        return "gzip"
+    return None
+
+
+def compress(data: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 4) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=brotli_quality)
+    return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+
+
+def compress_body(config: Any, response: Any, data: bytes, accept_encodings: Any) -> Optional[bytes]:
+    """
+    Shared by the Flask and Quart hooks: the encoded body for `response`, or
+    None to send it as is. Sets Vary, Content-Encoding and a weak ETag (the
+    encoded bytes differ, the representation does not) when it compresses.
+    """
+    if len(data) < config["COMPRESSION_MIN_SIZE"]:
+        return None
+    response.vary.add("Accept-Encoding")
+    encoding = negotiate(accept_encodings)
+    if encoding is None:
+        return None
+    etag, weak = response.get_etag()
+    encoded = ext.compressed_cache.get(etag, encoding) if etag and not weak else None
+    if encoded is None:
+        encoded = compress(data, encoding, config["COMPRESSION_GZIP_LEVEL"], config["COMPRESSION_BROTLI_QUALITY"])
+        if etag and not weak:
+            ext.compressed_cache.set(etag, encoding, encoded)
+    if len(encoded) >= len(data):
+        return None
+    response.headers["Content-Encoding"] = encoding
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return encoded
+
+
+def is_compressible(response: Any) -> bool:
+    return (response.status_code == 200 and response.mimetype in COMPRESSIBLE_MIMETYPES
+            and "Content-Encoding" not in response.headers)
+
+
+def init_compression(app: Flask) -> None:
+    """Compresses buffered text responses of at least COMPRESSION_MIN_SIZE bytes with brotli or gzip."""
+    if not app.config["COMPRESSION_ENABLED"]:
+        return
+
+    @app.after_request
+    def compress_response(response):
+        if response.is_streamed or response.direct_passthrough or not is_compressible(response):
+            return response
+        encoded = compress_body(app.config, response, response.get_data(), request.accept_encodings)
+        if encoded is not None:
+            response.set_data(encoded)
+        return response
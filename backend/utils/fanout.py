@@ -0,0 +1,69 @@
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from typing import Any, Callable, Dict, Hashable, Mapping, Optional
+
+
+class FanOut:
+    """
+    Runs independent upstream calls concurrently on a shared thread pool.
+    Each call gets its own deadline; a call that raises or times out yields an
+    error dict in the same shape make_api_request uses, so callers can keep
+    whatever succeeded.
+    """
+
+    def __init__(self, max_workers: int = 16, timeout: float = 10.0):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix="upstream")
+        return self._executor
+
+    def run(self, calls: Mapping[Hashable, Callable[[], Dict[str, Any]]],
+            timeout: Optional[float] = None) -> Dict[Hashable, Dict[str, Any]]:
+        """
+        Executes all calls concurrently and returns their results keyed like `calls`.
+        A single call runs on the pool too: inline, nothing could hold it to the deadline.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        # Each call runs in a copy of the caller's context, so request-scoped timings follow it
+        futures = {key: self.executor.submit(contextvars.copy_context().run, self._guard, key, call)
+                   for key, call in calls.items()}
+        deadline = time.monotonic() + timeout
+        results: Dict[Hashable, Dict[str, Any]] = {}
+        for key, future in futures.items():
+            try:
+                results[key] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except TimeoutError:
+                future.cancel()
+                print(f"Upstream call {key!r} timed out after {timeout}s")
+                results[key] = {"status": "error", "message": "Upstream request timed out"}
+        return results
+
+    @staticmethod
+    def _guard(key: Hashable, call: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        try:
+            return call()
+        except Exception as e:
+            print(f"Upstream call {key!r} failed: {e}")
+            return {"status": "error", "message": str(e)}
+
+    def discard(self) -> None:
+        """Forgets the pool without shutting it down, for a forked child that has none of its threads."""
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,63 @@
+import json
+from typing import Any, Callable, Optional, Union
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional: the stdlib encoder is used without it
+    orjson = None
+
+
+def dumps(obj: Any, default: Optional[Callable[[Any], Any]] = None, sort_keys: bool = False,
+          indent: bool = False) -> bytes:
+    """Serializes to compact UTF-8 JSON bytes, with orjson when it is installed."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, default=default, option=option)
+        except orjson.JSONEncodeError:
+            pass  # e.g. integers beyond 64 bits; the stdlib encoder handles them
+    return json.dumps(obj, default=default, sort_keys=sort_keys, ensure_ascii=False,
+                      indent=2 if indent else None,
+                      separators=None if indent else (",", ":")).encode("utf-8")
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Parses JSON straight from the bytes read off the socket, without decoding to str first."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONMixin:
+    """
+    JSON provider methods for Flask and Quart apps: jsonify writes bytes from
+    the fast encoder directly into the response. Keys keep their insertion
+    order (the projection schemas in response_shaping define it) rather than
+    being sorted.
+    """
+
+    sort_keys = False
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return dumps(obj, default=kwargs.get("default", self.default),
+                     sort_keys=kwargs.get("sort_keys", self.sort_keys),
+                     indent=bool(kwargs.get("indent"))).decode("utf-8")
+
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        return loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(
+            dumps(obj, default=self.default, sort_keys=self.sort_keys, indent=indent) + b"\n",
+            mimetype=self.mimetype)
+
+
+class FastJSONProvider(FastJSONMixin, DefaultJSONProvider):
+    pass
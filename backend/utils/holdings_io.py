@@ -0,0 +1,87 @@
+import csv
+import io
+import json
+import math
+from typing import Any, Dict, IO, Iterable, Iterator, List, Optional, Tuple
+
+EXPORT_FIELDS = ["id", "symbol", "quantity", "purchase_price", "created_at", "updated_at"]
+
+
+def validate_holding(data: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Returns (fields, None) for a valid holding payload, or (None, error message)."""
+    symbol = str(data.get("symbol") or "").strip().upper()
+    try:
+        quantity, price = float(data["quantity"]), float(data["purchase_price"])
+    except (TypeError, ValueError, KeyError):
+        return None, "Quantity and purchase_price must be valid numbers"
+    if not symbol or not (math.isfinite(quantity) and math.isfinite(price)) or quantity <= 0 or price <= 0:
+        return None, "Symbol, positive quantity, and positive price are required"
+    return {"symbol": symbol, "quantity": quantity, "purchase_price": price}, None
+
+
+def iter_import_rows(stream: IO[bytes], content_type: str) -> Iterator[Tuple[int, Any]]:
+    """
+    Yields (row_number, payload) from a CSV, NDJSON or JSON-array request body.
+    CSV and NDJSON are read incrementally; a JSON array has to be parsed whole.
+    Row numbers are 1-based data rows (the CSV header is not counted).
+    """
+    mimetype = (content_type or "").split(";")[0].strip().lower()
+    if mimetype in ("text/csv", "application/csv"):
+        reader = csv.DictReader(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
+        for number, row in enumerate(reader, start=1):
+            yield number, row
+    elif mimetype in ("application/x-ndjson", "application/ndjson"):
+        number = 0
+        for line in io.TextIOWrapper(stream, encoding="utf-8"):
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                yield number, json.loads(line)
+            except ValueError:
+                yield number, None
+    elif mimetype == "application/json":
+        rows = json.load(stream)
+        if not isinstance(rows, list):
+            raise ValueError("JSON body must be an array of holdings")
+        yield from enumerate(rows, start=1)
+    else:
+        raise ValueError("Unsupported content type; use text/csv, application/x-ndjson or application/json")
+
+
+def chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    chunk: List[Any] = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def export_csv(rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= 64 * 1024:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def export_ndjson(rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    lines: List[str] = []
+    size = 0
+    for row in rows:
+        line = json.dumps({k: row.get(k) for k in EXPORT_FIELDS}) + "\n"
+        lines.append(line)
+        size += len(line)
+        if size >= 64 * 1024:
+            yield "".join(lines)
+            lines, size = [], 0
+    if lines:
+        yield "".join(lines)
@@ -0,0 +1,76 @@
+from email.utils import formatdate
+from functools import wraps
+from typing import Any, Callable, Optional, Tuple
+from flask import current_app, request
+import backend.extensions as ext
+from backend.utils.response_cache import CachedPayload, ResponseCache
+
+
+def cache_policy(config: Any, policy: str) -> Tuple[int, int]:
+    """(max-age, stale-while-revalidate) for a route from CACHE_<policy>_MAX_AGE / _SWR."""
+    return config[f"CACHE_{policy}_MAX_AGE"], config[f"CACHE_{policy}_SWR"]
+
+
+def set_cache_headers(response: Any, payload: Optional[CachedPayload], max_age: int, swr: int) -> None:
+    """Freshness and validator headers; works on Flask and Quart responses alike."""
+    if payload is None:
+        response.headers["Cache-Control"] = "no-cache"
+        return
+    age = int(payload.age)
+    response.headers["Cache-Control"] = (f"public, max-age={max(max_age - age, 0)}, "
+                                         f"stale-while-revalidate={swr}")
+    response.headers["Age"] = str(age)
+    response.headers["Last-Modified"] = formatdate(payload.stored_at, usegmt=True)
+    response.set_etag(payload.etag)
+
+
+def cached_response(policy: str) -> Callable:
+    """
+    Caches a public GET route's JSON per URL under the CACHE_<policy>_* settings.
+    Fresh entries are served as-is; stale ones are served immediately while the
+    view re-runs in the background. Responses carry Cache-Control, a strong ETag
+    and Last-Modified, and matching conditional requests get a 304.
+    """
+    def decorator(view: Callable) -> Callable:
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            max_age, swr = cache_policy(current_app.config, policy)
+            cache, key, app = ext.response_cache, request.full_path, current_app._get_current_object()
+            payload, needs_refresh = cache.lookup(key, max_age, swr)
+            if needs_refresh:
+                cache.submit(lambda: _refresh(app, cache, key, view, args, kwargs))
+            if payload is not None:
+                response = app.response_class(payload.body, mimetype=payload.mimetype)
+            else:
+                response = app.make_response(view(*args, **kwargs))
+                if not response.is_streamed:
+                    payload = cache.store(key, response.status_code, response.mimetype, response.get_data())
+            set_cache_headers(response, payload, max_age, swr)
+            return response.make_conditional(request)
+        return wrapper
+    return decorator
+
+
+def render_uncached(app: Any, path: str) -> Tuple[int, str, bytes]:
+    """
+    Runs the view behind `path` (path and query string) past its response cache
+    and returns (status, mimetype, body), for warming the cache before anyone asks.
+    """
+    with app.test_request_context(path):
+        if request.routing_exception is not None:
+            raise request.routing_exception
+        view = app.view_functions[request.url_rule.endpoint]
+        view = getattr(view, "__wrapped__", view)
+        response = app.make_response(view(**request.view_args))
+        return response.status_code, response.mimetype, response.get_data()
+
+
+def _refresh(app: Any, cache: ResponseCache, key: str, view: Callable, args: tuple, kwargs: dict) -> None:
+    try:
+        with app.test_request_context(key):
+            response = app.make_response(view(*args, **kwargs))
+            cache.store(key, response.status_code, response.mimetype, response.get_data())
+    except Exception as e:
+        print(f"Background refresh of {key} failed: {e}")
+    finally:
+        cache.refresh_done(key)
@@ -0,0 +1,170 @@
+import http.client
+import ssl
+import threading
+import time
+from typing import Dict, List, Mapping, Optional, Tuple
+import httpx
+from backend.utils.metrics import Metrics
+
+# Errors raised when a pooled keep-alive socket was closed by the server while idle.
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, http.client.BadStatusLine,
+                           ConnectionResetError, BrokenPipeError, ConnectionAbortedError)
+
+
+class HTTPSConnectionPool:
+    """
+    Thread-safe pool of keep-alive HTTPS connections to a single host.
+    At most `maxsize` idle connections are kept; extra concurrent callers get a
+    throwaway connection instead of blocking.
+    """
+
+    def __init__(self, host: str, maxsize: int = 10, connect_timeout: float = 5.0,
+                 read_timeout: float = 15.0, idle_timeout: float = 60.0,
+                 context: Optional[ssl.SSLContext] = None):
+        self.host = host
+        self.maxsize = maxsize
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.idle_timeout = idle_timeout
+        self.context = context
+        self._idle: List[Tuple[float, http.client.HTTPSConnection]] = []
+        self._lock = threading.Lock()
+        self.connections_created = 0
+        self.connections_reused = 0
+
+    def _new_conn(self) -> http.client.HTTPSConnection:
+        conn = http.client.HTTPSConnection(
+            self.host, timeout=self.connect_timeout, context=self.context)
+        conn.connect()
+        conn.sock.settimeout(self.read_timeout)
+        with self._lock:
+            self.connections_created += 1
+        return conn
+
+    def _get_conn(self) -> Tuple[http.client.HTTPSConnection, bool]:
+        """Returns an idle connection if a fresh one is available, else opens a new one."""
+        now = time.monotonic()
+        with self._lock:
+            while self._idle:
+                last_used, conn = self._idle.pop()
+                if now - last_used < self.idle_timeout:
+                    self.connections_reused += 1
+                    return conn, True
+                conn.close()
+        return self._new_conn(), False
+
+    def _put_conn(self, conn: http.client.HTTPSConnection) -> None:
+        with self._lock:
+            if len(self._idle) < self.maxsize:
+                self._idle.append((time.monotonic(), conn))
+                return
+        conn.close()
+
+    def request(self, method: str, url: str, headers: Optional[Mapping[str, str]] = None,
+                body: Optional[bytes] = None) -> Tuple[int, bytes]:
+        """Performs a request and returns (status, body), retrying once on a stale connection."""
+        headers = dict(headers or {})
+        headers.setdefault("Connection", "keep-alive")
+        for attempt in range(2):
+            conn, reused = self._get_conn()
+            try:
+                conn.request(method, url, body=body, headers=headers)
+                res = conn.getresponse()
+                data = res.read()
+            except STALE_CONNECTION_ERRORS:
+                conn.close()
+                if reused and attempt == 0:
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+            if res.will_close:
+                conn.close()
+            else:
+                self._put_conn(conn)
+            return res.status, data
+        raise http.client.HTTPException(f"Could not reach {self.host}")
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for _, conn in idle:
+            conn.close()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"idle": len(self._idle), "created": self.connections_created,
+                    "reused": self.connections_reused}
+
+
+class PoolManager:
+    """Hands out one shared HTTPSConnectionPool per upstream host."""
+
+    def __init__(self, maxsize: int = 10, connect_timeout: float = 5.0,
+                 read_timeout: float = 15.0, context: Optional[ssl.SSLContext] = None):
+        self.pool_kwargs = {"maxsize": maxsize, "connect_timeout": connect_timeout,
+                            "read_timeout": read_timeout, "context": context}
+        self._pools: Dict[str, HTTPSConnectionPool] = {}
+        self._lock = threading.Lock()
+
+    def get(self, host: str) -> HTTPSConnectionPool:
+        pool = self._pools.get(host)
+        if pool is None:
+            with self._lock:
+                pool = self._pools.setdefault(
+                    host, HTTPSConnectionPool(host, **self.pool_kwargs))
+        return pool
+
+    def close(self) -> None:
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            pool.close()
+
+    def discard(self) -> None:
+        """Forgets every pool without closing it, for a forked child whose sockets are the parent's."""
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {host: pool.stats() for host, pool in list(self._pools.items())}
+
+
+def supabase_phase(request: httpx.Request) -> str:
+    """Request phase for a Supabase SDK call: auth API calls apart from PostgREST queries."""
+    return "supabase_auth" if request.url.path.startswith("/auth/") else "supabase"
+
+
+class TimedTransport(httpx.BaseTransport):
+    """Wraps an httpx transport so each call, body included, is timed by `metrics` as a request phase."""
+
+    def __init__(self, transport: httpx.BaseTransport, metrics: Metrics):
+        self.transport = transport
+        self.metrics = metrics
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        with self.metrics.timed(supabase_phase(request)):
+            response = self.transport.handle_request(request)
+            response.read()
+        return response
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class AsyncTimedTransport(httpx.AsyncBaseTransport):
+    """Async counterpart of TimedTransport."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, metrics: Metrics):
+        self.transport = transport
+        self.metrics = metrics
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        with self.metrics.timed(supabase_phase(request)):
+            response = await self.transport.handle_async_request(request)
+            await response.aread()
+        return response
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
@@ -0,0 +1,33 @@
+from flask import Flask, g, request
+import backend.extensions as ext
+
+
+def route_label() -> str:
+    """The matched URL rule (not the raw path) so metrics stay low-cardinality."""
+    return request.url_rule.rule if request.url_rule is not None else "unmatched"
+
+
+def instrument_app(app: Flask) -> None:
+    """
+    Times every request into ext.metrics. Phases timed inside the request (auth,
+    upstream and Supabase calls) are labelled with its route and, when
+    SERVER_TIMING_ENABLED is set, reported back in a Server-Timing header.
+    """
+    server_timing = app.config["SERVER_TIMING_ENABLED"]
+
+    @app.before_request
+    def start_timing():
+        g.metrics_token = ext.metrics.begin_request(route_label())
+
+    @app.after_request
+    def record_timing(response):
+        timings = ext.metrics.end_request(request.method, response.status_code)
+        if server_timing and timings is not None:
+            response.headers["Server-Timing"] = timings.server_timing()
+        return response
+
+    @app.teardown_request
+    def stop_timing(error=None):
+        token = g.pop("metrics_token", None)
+        if token is not None:
+            ext.metrics.reset_request(token)
@@ -0,0 +1,99 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from types import SimpleNamespace
+from typing import Any, Dict, Optional, Tuple
+
+import jwt
+
+HMAC_ALGORITHMS = ["HS256", "HS384", "HS512"]
+ASYMMETRIC_ALGORITHMS = ["RS256", "ES256", "EdDSA"]
+
+
+class LocalVerificationUnavailable(Exception):
+    """Raised when a token cannot be checked locally (no key for it), as opposed to being invalid."""
+
+
+class JWTVerifier:
+    """
+    Verifies Supabase access tokens locally, using the project's JWT secret for
+    HS* tokens and the project's JWKS endpoint for asymmetric ones.
+    """
+
+    def __init__(self, secret: Optional[str] = None, jwks_url: Optional[str] = None,
+                 audience: str = "authenticated", leeway: float = 0.0):
+        self.secret = secret
+        self.audience = audience
+        self.leeway = leeway
+        self._jwks = jwt.PyJWKClient(jwks_url, cache_keys=True) if jwks_url else None
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        """Returns the token's claims; raises jwt.InvalidTokenError if it is not valid."""
+        alg = jwt.get_unverified_header(token).get("alg")
+        if alg in HMAC_ALGORITHMS:
+            if not self.secret:
+                raise LocalVerificationUnavailable("No JWT secret configured")
+            key: Any = self.secret
+        elif alg in ASYMMETRIC_ALGORITHMS:
+            if not self._jwks:
+                raise LocalVerificationUnavailable("No JWKS URL configured")
+            try:
+                key = self._jwks.get_signing_key_from_jwt(token)
+            except jwt.PyJWKClientError as e:
+                raise LocalVerificationUnavailable(str(e)) from e
+        else:
+            raise jwt.InvalidAlgorithmError(f"Unsupported token algorithm: {alg}")
+
+        return jwt.decode(token, key, algorithms=[alg], audience=self.audience,
+                          leeway=self.leeway, options={"require": ["exp", "sub"]})
+
+
+def user_from_claims(claims: Dict[str, Any]) -> SimpleNamespace:
+    """Builds a user object exposing the attributes routes read from Supabase's User."""
+    return SimpleNamespace(
+        id=claims["sub"], email=claims.get("email"), role=claims.get("role"),
+        aud=claims.get("aud"), app_metadata=claims.get("app_metadata", {}),
+        user_metadata=claims.get("user_metadata", {}))
+
+
+class TokenCache:
+    """LRU cache of verified users keyed by token digest, each entry valid until the token expires."""
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token: str) -> Any:
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, token: str, user: Any, expires_at: float) -> None:
+        if expires_at <= time.time():
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (expires_at, user)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
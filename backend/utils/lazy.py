@@ -0,0 +1,54 @@
+import os
+import threading
+import weakref
+from typing import Any, Callable, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Every LazyClient, so a forked child can drop what it inherited from the parent
+_instances: "weakref.WeakSet[LazyClient]" = weakref.WeakSet()
+
+
+class LazyClient(Generic[T]):
+    """
+    Stands in for a client that is built by `factory` on first use and then
+    shared by every thread of the process. Nothing is imported or connected
+    while the app is created, and a forked worker builds its own client
+    instead of reusing the parent's sockets.
+    """
+
+    def __init__(self, factory: Callable[[], T]):
+        self._factory = factory
+        self._client: Optional[T] = None
+        self._lock = threading.Lock()
+        _instances.add(self)
+
+    @property
+    def created(self) -> bool:
+        return self._client is not None
+
+    def get(self) -> T:
+        client = self._client
+        if client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._factory()
+                client = self._client
+        return client
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.get(), name)
+
+    def _reset(self) -> None:
+        # Not closed: the connections still belong to the parent
+        self._client = None
+        self._lock = threading.Lock()
+
+
+def _after_fork_in_child() -> None:
+    for instance in list(_instances):
+        instance._reset()
+
+
+if hasattr(os, "register_at_fork"):  # not on Windows, which does not fork
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,539 @@
+import bisect
+import math
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+from backend.utils.write_signal import WriteSignals
+
+FIFO, AVERAGE = "fifo", "average"
+METHODS = (FIFO, AVERAGE)
+BUY, SELL = 1, -1
+# Listed Indian equity held for more than twelve months counts as long term
+LONG_TERM_SECONDS = 365 * 86400
+EPSILON = 1e-9
+# SQLSTATE the transaction RPCs raise when a write would oversell; PostgREST answers it with a 409
+OVERSOLD_SQLSTATE = "PT409"
+
+
+class OversoldError(ValueError):
+    """A sell (or the removal of a buy) would leave sells without lots to match."""
+
+    @classmethod
+    def from_database(cls, error: Exception) -> Optional["OversoldError"]:
+        """The OversoldError behind a failed transaction RPC, or None if it failed for another reason."""
+        if getattr(error, "code", None) != OVERSOLD_SQLSTATE:
+            return None
+        return cls(getattr(error, "message", None) or str(error))
+
+
+def parse_traded_at(value: Any) -> float:
+    """Epoch seconds from an ISO-8601 timestamp (naive means UTC) or epoch number."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def validate_transaction(payload: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Cleans a POSTed trade; returns (fields, None) or (None, error)."""
+    symbol = str(payload.get("symbol") or "").strip().upper()
+    side = str(payload.get("side") or "").strip().lower()
+    try:
+        quantity = float(payload.get("quantity", 0))
+        price = float(payload.get("price", 0))
+        fees = float(payload.get("fees") or 0)
+    except (TypeError, ValueError):
+        return None, "Quantity, price and fees must be valid numbers"
+    if not symbol or side not in ("buy", "sell"):
+        return None, "Symbol and a side of buy or sell are required"
+    if not all(math.isfinite(v) for v in (quantity, price, fees)) or quantity <= 0 or price < 0 or fees < 0:
+        return None, "Quantity must be positive; price and fees must not be negative"
+    traded_at = payload.get("traded_at")
+    if traded_at is not None:
+        try:
+            traded_at = datetime.fromtimestamp(parse_traded_at(traded_at), timezone.utc).isoformat()
+        except (TypeError, ValueError, OverflowError, OSError):
+            return None, "traded_at must be an ISO-8601 timestamp or epoch seconds"
+    return {"symbol": symbol, "side": side, "quantity": quantity, "price": price,
+            "fees": fees, "traded_at": traded_at}, None
+
+
+class Trade(NamedTuple):
+    time: float
+    id: str
+    side: int
+    quantity: float
+    price: float
+    fees: float
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "Trade":
+        return cls(parse_traded_at(row["traded_at"]), str(row["id"]), BUY if row["side"] == "buy" else SELL,
+                   float(row["quantity"]), float(row["price"]), float(row.get("fees") or 0))
+
+
+class LotQueue:
+    """
+    FIFO tax lots in parallel arrays (quantity, unit cost including buy fees,
+    acquisition time). Sells consume from a moving head; the consumed prefix is
+    dropped once it is more than half of the queue.
+    """
+
+    __slots__ = ("qty", "cost", "acquired", "head")
+
+    def __init__(self):
+        self.qty, self.cost, self.acquired = array("d"), array("d"), array("d")
+        self.head = 0
+
+    def copy(self) -> "LotQueue":
+        lots = LotQueue()
+        lots.qty, lots.cost, lots.acquired = self.qty[self.head:], self.cost[self.head:], self.acquired[self.head:]
+        return lots
+
+    def push(self, quantity: float, unit_cost: float, when: float) -> None:
+        self.qty.append(quantity)
+        self.cost.append(unit_cost)
+        self.acquired.append(when)
+
+    def consume(self, quantity: float, price: float, when: float) -> Tuple[float, float, float, float]:
+        """Matches a sell oldest lot first; returns (unmatched, gain, short-term gain, cost basis)."""
+        qty, cost, acquired = self.qty, self.cost, self.acquired
+        head, end = self.head, len(qty)
+        remaining = quantity
+        gain = short = basis = 0.0
+        while remaining > EPSILON and head < end:
+            lot = qty[head]
+            take = lot if lot <= remaining + EPSILON else remaining
+            lot_gain = take * (price - cost[head])
+            gain += lot_gain
+            basis += take * cost[head]
+            if when - acquired[head] < LONG_TERM_SECONDS:
+                short += lot_gain
+            if take >= lot:
+                head += 1
+            else:
+                qty[head] = lot - take
+            remaining -= take
+        self.head = head
+        if head > 64 and head * 2 > end:
+            del qty[:head], cost[:head], acquired[:head]
+            self.head = 0
+        return max(remaining, 0.0), gain, short, basis
+
+    def open_lots(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Zero-copy views of the remaining lots: (quantity, unit cost, acquired)."""
+        views = [np.frombuffer(a, dtype=np.float64)[self.head:] if len(a) else np.empty(0)
+                 for a in (self.qty, self.cost, self.acquired)]
+        return views[0], views[1], views[2]
+
+
+class AverageLots:
+    """One pooled position per symbol: every sell is matched at the running average cost."""
+
+    __slots__ = ("quantity", "total_cost")
+
+    def __init__(self):
+        self.quantity = 0.0
+        self.total_cost = 0.0
+
+    def copy(self) -> "AverageLots":
+        lots = AverageLots()
+        lots.quantity, lots.total_cost = self.quantity, self.total_cost
+        return lots
+
+    def push(self, quantity: float, unit_cost: float, when: float) -> None:
+        self.quantity += quantity
+        self.total_cost += quantity * unit_cost
+
+    def consume(self, quantity: float, price: float, when: float) -> Tuple[float, float, float, float]:
+        take = min(quantity, self.quantity)
+        average = self.total_cost / self.quantity if self.quantity > EPSILON else 0.0
+        basis = take * average
+        self.quantity -= take
+        self.total_cost = self.total_cost - basis if self.quantity > EPSILON else 0.0
+        if self.quantity <= EPSILON:
+            self.quantity = 0.0
+        return max(quantity - take, 0.0), take * price - basis, 0.0, basis
+
+    def open_lots(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if self.quantity <= EPSILON:
+            return np.empty(0), np.empty(0), np.empty(0)
+        return (np.array([self.quantity]), np.array([self.total_cost / self.quantity]), np.array([np.nan]))
+
+
+Lots = Union[LotQueue, AverageLots]
+
+
+class BookState:
+    """
+    Lots and realized gains after replaying a prefix of a symbol's trades.
+    Realized gains are also kept per sell as running sums, so the gain between
+    two dates is the difference of two bisected entries.
+    """
+
+    __slots__ = ("lots", "sold_quantity", "proceeds", "cost_sold", "unmatched",
+                 "sell_times", "cum_gain", "cum_short")
+
+    def __init__(self, lots: Lots):
+        self.lots = lots
+        self.sold_quantity = self.proceeds = self.cost_sold = self.unmatched = 0.0
+        self.sell_times, self.cum_gain, self.cum_short = array("d"), array("d"), array("d")
+
+    def copy(self) -> "BookState":
+        state = BookState(self.lots.copy())
+        state.sold_quantity, state.proceeds = self.sold_quantity, self.proceeds
+        state.cost_sold, state.unmatched = self.cost_sold, self.unmatched
+        state.sell_times, state.cum_gain, state.cum_short = self.sell_times[:], self.cum_gain[:], self.cum_short[:]
+        return state
+
+    @property
+    def realized(self) -> float:
+        return self.cum_gain[-1] if self.cum_gain else 0.0
+
+    @property
+    def short_term(self) -> float:
+        return self.cum_short[-1] if self.cum_short else 0.0
+
+    def apply(self, trade: Trade, strict: bool) -> None:
+        if trade.side == BUY:
+            self.lots.push(trade.quantity, trade.price + trade.fees / trade.quantity, trade.time)
+            return
+        # Sell fees reduce the proceeds of every unit sold
+        net_price = trade.price - trade.fees / trade.quantity
+        unmatched, gain, short, basis = self.lots.consume(trade.quantity, net_price, trade.time)
+        if strict and unmatched > EPSILON:
+            # Only ever raised while deriving a new book, so the half-applied state is discarded
+            raise OversoldError(f"Sell of {trade.quantity:g} exceeds the {trade.quantity - unmatched:g} held at the time")
+        self.unmatched += unmatched
+        matched = trade.quantity - unmatched
+        self.sold_quantity += matched
+        self.proceeds += matched * net_price
+        self.cost_sold += basis
+        self.sell_times.append(trade.time)
+        self.cum_gain.append(self.realized + gain)
+        self.cum_short.append(self.short_term + short)
+
+    def realized_between(self, start: Optional[float], end: Optional[float]) -> Tuple[float, float]:
+        """(gain, short-term gain) from sells with start <= time <= end."""
+        lo = bisect.bisect_left(self.sell_times, start) if start is not None else 0
+        hi = bisect.bisect_right(self.sell_times, end) if end is not None else len(self.sell_times)
+        if hi <= lo:
+            return 0.0, 0.0
+        before_gain = self.cum_gain[lo - 1] if lo else 0.0
+        before_short = self.cum_short[lo - 1] if lo else 0.0
+        return self.cum_gain[hi - 1] - before_gain, self.cum_short[hi - 1] - before_short
+
+
+class SymbolBook:
+    """
+    One symbol's trades in (traded_at, id) order, the state after all of them
+    and checkpoints: snapshots of the state before every `interval`-th trade,
+    keeping the latest `max_checkpoints`. Books are immutable once built; a
+    write builds a new book by replaying from the latest checkpoint at or
+    before the changed position (or from the current state for an append).
+    """
+
+    __slots__ = ("symbol", "method", "trades", "keys", "state", "checkpoints", "interval", "max_checkpoints")
+
+    def __init__(self, symbol: str, method: str, interval: int = 1000, max_checkpoints: int = 8):
+        self.symbol = symbol
+        self.method = method
+        self.trades: List[Trade] = []
+        self.keys: List[Tuple[float, str]] = []
+        self.state = BookState(LotQueue() if method == FIFO else AverageLots())
+        self.checkpoints: List[Tuple[int, BookState]] = []
+        self.interval = interval
+        self.max_checkpoints = max_checkpoints
+
+    @classmethod
+    def build(cls, symbol: str, method: str, trades: Iterable[Trade], interval: int = 1000,
+              max_checkpoints: int = 8) -> "SymbolBook":
+        """Replays stored trades; sells beyond the position are recorded as unmatched rather than rejected."""
+        book = cls(symbol, method, interval, max_checkpoints)
+        book.trades = sorted(trades, key=lambda t: (t.time, t.id))
+        book.keys = [(t.time, t.id) for t in book.trades]
+        book._replay(book.state, 0, strict=False)
+        return book
+
+    def _derive(self, trades: List[Trade], keys: List[Tuple[float, str]], position: int,
+                strict: bool) -> "SymbolBook":
+        book = SymbolBook(self.symbol, self.method, self.interval, self.max_checkpoints)
+        book.trades, book.keys = trades, keys
+        if position >= len(self.trades):
+            start, state = len(self.trades), self.state.copy()
+            book.checkpoints = list(self.checkpoints)
+        else:
+            index = bisect.bisect_right([c[0] for c in self.checkpoints], position) - 1
+            if index >= 0:
+                start, snapshot = self.checkpoints[index]
+                state = snapshot.copy()
+                book.checkpoints = self.checkpoints[:index + 1]
+            else:
+                start, state = 0, BookState(LotQueue() if self.method == FIFO else AverageLots())
+        book.state = state
+        book._replay(state, start, strict)
+        return book
+
+    def _replay(self, state: BookState, start: int, strict: bool) -> None:
+        interval, trades = self.interval, self.trades
+        for i in range(start, len(trades)):
+            if i and i % interval == 0 and (not self.checkpoints or self.checkpoints[-1][0] < i):
+                self.checkpoints.append((i, state.copy()))
+                if len(self.checkpoints) > self.max_checkpoints:
+                    del self.checkpoints[0]
+            state.apply(trades[i], strict)
+
+    def with_trade(self, trade: Trade, strict: bool = True) -> "SymbolBook":
+        key = (trade.time, trade.id)
+        position = bisect.bisect_right(self.keys, key)
+        trades, keys = self.trades[:], self.keys[:]
+        trades.insert(position, trade)
+        keys.insert(position, key)
+        return self._derive(trades, keys, position, strict)
+
+    def without_trade(self, trade_id: str, strict: bool = True) -> Optional["SymbolBook"]:
+        position = next((i for i in range(len(self.trades) - 1, -1, -1) if self.trades[i].id == trade_id), None)
+        if position is None:
+            return None
+        trades, keys = self.trades[:], self.keys[:]
+        del trades[position], keys[position]
+        return self._derive(trades, keys, position, strict)
+
+    @property
+    def position(self) -> float:
+        return float(self.state.lots.open_lots()[0].sum())
+
+
+class PortfolioLedger:
+    """
+    Symbol books for one portfolio and cost method. Each write swaps in a new
+    book for its symbol, so readers never see a half-applied trade; writers
+    serialize on LedgerCache.write_lock.
+    """
+
+    def __init__(self, method: str = FIFO, interval: int = 1000, max_checkpoints: int = 8):
+        self.method = method
+        self.interval = interval
+        self.max_checkpoints = max_checkpoints
+        self.books: Dict[str, SymbolBook] = {}
+        self.symbol_of: Dict[str, str] = {}  # transaction id -> symbol
+
+    @classmethod
+    def load(cls, rows: Iterable[Dict[str, Any]], method: str = FIFO, interval: int = 1000,
+             max_checkpoints: int = 8) -> "PortfolioLedger":
+        ledger = cls(method, interval, max_checkpoints)
+        by_symbol: Dict[str, List[Trade]] = {}
+        for row in rows:
+            symbol = row["symbol"].upper()
+            by_symbol.setdefault(symbol, []).append(Trade.from_row(row))
+            ledger.symbol_of[str(row["id"])] = symbol
+        for symbol, trades in by_symbol.items():
+            ledger.books[symbol] = SymbolBook.build(symbol, method, trades, interval, max_checkpoints)
+        return ledger
+
+    def _book(self, symbol: str) -> SymbolBook:
+        return self.books.get(symbol) or SymbolBook(symbol, self.method, self.interval, self.max_checkpoints)
+
+    def check(self, fields: Dict[str, Any]) -> None:
+        """Raises OversoldError if a new trade (validate_transaction fields) cannot be matched."""
+        if fields["side"] == "sell":
+            when = parse_traded_at(fields["traded_at"]) if fields.get("traded_at") else time.time()
+            self._book(fields["symbol"]).with_trade(
+                Trade(when, "", SELL, fields["quantity"], fields["price"], fields["fees"]))
+
+    def add(self, row: Dict[str, Any]) -> None:
+        symbol = row["symbol"].upper()
+        self.books[symbol] = self._book(symbol).with_trade(Trade.from_row(row), strict=False)
+        self.symbol_of[str(row["id"])] = symbol
+
+    def check_removal(self, transaction_id: str) -> bool:
+        """False if the trade is unknown; raises OversoldError if removing it strands later sells."""
+        symbol = self.symbol_of.get(transaction_id)
+        if symbol is None:
+            return False
+        self.books[symbol].without_trade(transaction_id)
+        return True
+
+    def remove(self, transaction_id: str) -> None:
+        symbol = self.symbol_of.pop(transaction_id, None)
+        if symbol is not None:
+            book = self.books[symbol].without_trade(transaction_id, strict=False)
+            if book is not None:
+                self.books[symbol] = book
+
+    def realized(self, start: Optional[float] = None, end: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Realized P&L per symbol and in total. Without a date range the full
+        proceeds and cost of what was sold are included; with one, only gains.
+        """
+        rows, total, total_short = [], 0.0, 0.0
+        ranged = start is not None or end is not None
+        for symbol, book in sorted(self.books.items()):
+            state = book.state
+            if not state.sell_times:
+                continue
+            gain, short = state.realized_between(start, end) if ranged else (state.realized, state.short_term)
+            if ranged and gain == 0.0 and short == 0.0:
+                continue
+            row = {"symbol": symbol, "realized_pnl": round(gain, 2)}
+            if self.method == FIFO:
+                row.update(short_term=round(short, 2), long_term=round(gain - short, 2))
+            if not ranged:
+                row.update(quantity_sold=round(state.sold_quantity, 6), proceeds=round(state.proceeds, 2),
+                           cost_basis=round(state.cost_sold, 2))
+            if state.unmatched > EPSILON:
+                row["unmatched_quantity"] = round(state.unmatched, 6)
+            rows.append(row)
+            total += gain
+            total_short += short
+        totals = {"realized_pnl": round(total, 2), "count": len(rows)}
+        if self.method == FIFO:
+            totals.update(short_term=round(total_short, 2), long_term=round(total - total_short, 2))
+        return {"method": self.method, "symbols": rows, "totals": totals}
+
+    def open_symbols(self) -> List[str]:
+        return [s for s, book in sorted(self.books.items()) if book.position > EPSILON]
+
+    def unrealized(self, quotes: Dict[str, Dict[str, Any]], include_lots: bool = False,
+                   now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Open positions valued against `quotes` (upper-cased symbol -> quote);
+        positions without a quote are valued at cost. Lot arithmetic is
+        vectorized over the array-backed queues.
+        """
+        now = time.time() if now is None else now
+        rows = []
+        total_value = total_cost = 0.0
+        for symbol, book in sorted(self.books.items()):
+            qty, unit_cost, acquired = book.state.lots.open_lots()
+            quantity = float(qty.sum())
+            if quantity <= EPSILON:
+                continue
+            cost_basis = float(qty @ unit_cost)
+            price = (quotes.get(symbol) or {}).get("price") or None
+            has_quote = price is not None
+            market_value = quantity * float(price) if has_quote else cost_basis
+            pnl = market_value - cost_basis
+            row = {"symbol": symbol, "quantity": round(quantity, 6),
+                   "average_cost": round(cost_basis / quantity, 4), "cost_basis": round(cost_basis, 2),
+                   "current_price": float(price) if has_quote else None, "market_value": round(market_value, 2),
+                   "unrealized_pnl": round(pnl, 2),
+                   "pnl_percent": round(pnl / cost_basis * 100.0, 2) if cost_basis else 0.0,
+                   "has_quote": has_quote}
+            if self.method == FIFO:
+                # Long-term portion: lots held for more than LONG_TERM_SECONDS
+                long_mask = now - acquired >= LONG_TERM_SECONDS
+                lot_pnl = qty * ((float(price) if has_quote else unit_cost) - unit_cost)
+                row["long_term"] = round(float(lot_pnl[long_mask].sum()), 2)
+                row["short_term"] = round(float(lot_pnl[~long_mask].sum()), 2)
+                if include_lots:
+                    row["lots"] = [{"quantity": q, "unit_cost": round(c, 4),
+                                    "acquired_at": datetime.fromtimestamp(a, timezone.utc).isoformat()}
+                                   for q, c, a in zip(qty.tolist(), unit_cost.tolist(), acquired.tolist())]
+            rows.append(row)
+            total_value += market_value
+            total_cost += cost_basis
+        pnl = total_value - total_cost
+        return {"method": self.method, "positions": rows, "totals": {
+            "market_value": round(total_value, 2), "cost_basis": round(total_cost, 2),
+            "unrealized_pnl": round(pnl, 2),
+            "pnl_percent": round(pnl / total_cost * 100.0, 2) if total_cost else 0.0,
+            "count": len(rows)}}
+
+    def stats(self) -> Dict[str, int]:
+        return {"symbols": len(self.books), "trades": len(self.symbol_of),
+                "checkpoints": sum(len(b.checkpoints) for b in self.books.values())}
+
+
+class LedgerCache:
+    """
+    Built ledgers per (portfolio, method), LRU with a TTL. `write_lock`
+    serializes a portfolio's check-insert-apply sequences across methods
+    within this process; the transaction RPCs repeat the position check under
+    a row lock, which covers writes from other processes.
+
+    With `signal_dir`, writes are counted per portfolio in WriteSignals files
+    there and a ledger is served only while no other process has written to
+    its portfolio since it was loaded. Otherwise, and for other hosts, the
+    TTL bounds how long such writes go unseen.
+    """
+
+    def __init__(self, ttl: float = 300.0, max_size: int = 64, signal_dir: Optional[str] = None):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.signals = WriteSignals(signal_dir, "ledger cache")
+        # (portfolio, method) -> (expires, portfolio version when loaded, ledger)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, int, PortfolioLedger]]" = OrderedDict()
+        self._write_locks: Dict[str, threading.RLock] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def version(self, portfolio_id: str) -> int:
+        """Taken before reading a portfolio's transactions and handed to set()."""
+        return self.signals.version(portfolio_id)
+
+    def get(self, portfolio_id: str, method: str) -> Optional[PortfolioLedger]:
+        version = self.signals.version(portfolio_id)
+        with self._lock:
+            entry = self._entries.get((portfolio_id, method))
+            if entry is None or entry[0] < time.monotonic() or entry[1] != version:
+                if entry is not None:
+                    del self._entries[(portfolio_id, method)]
+                self.misses += 1
+                return None
+            self._entries.move_to_end((portfolio_id, method))
+            self.hits += 1
+            return entry[2]
+
+    def set(self, portfolio_id: str, method: str, ledger: PortfolioLedger, version: int = 0) -> None:
+        if self.ttl <= 0 or version < 0:
+            return
+        with self._lock:
+            self._entries[(portfolio_id, method)] = (time.monotonic() + self.ttl, version, ledger)
+            self._entries.move_to_end((portfolio_id, method))
+            while len(self._entries) > self.max_size:
+                (evicted, _), _ = self._entries.popitem(last=False)
+                if not any(k[0] == evicted for k in self._entries):
+                    self._write_locks.pop(evicted, None)
+
+    def wrote(self, portfolio_id: str, apply: Callable[[PortfolioLedger], None]) -> None:
+        """
+        Records a write that Supabase accepted: announces it to other processes
+        and applies it with `apply` to each live ledger of the portfolio. With
+        signals, a ledger that missed another process's write is dropped instead.
+        """
+        version = self.signals.signal(portfolio_id)
+        with self._lock:
+            now, ledgers = time.monotonic(), []
+            for key, (expires, seen, ledger) in list(self._entries.items()):
+                if key[0] != portfolio_id:
+                    continue
+                if expires < now or (version is not None and seen != version - 1):
+                    del self._entries[key]
+                    continue
+                self._entries[key] = (expires, seen if version is None else version, ledger)
+                ledgers.append(ledger)
+        for ledger in ledgers:
+            apply(ledger)
+
+    def write_lock(self, portfolio_id: str) -> threading.RLock:
+        with self._lock:
+            return self._write_locks.setdefault(portfolio_id, threading.RLock())
+
+    def invalidate(self, portfolio_id: str) -> None:
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == portfolio_id]:
+                del self._entries[key]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,27 @@
+from datetime import datetime, time as dtime, timedelta, timezone
+from typing import Optional
+
+# India has no daylight saving, so a fixed offset avoids a tzdata dependency
+IST = timezone(timedelta(hours=5, minutes=30), "IST")
+# NSE regular session, as shown by the dashboard's market status (updateMarketStatus)
+MARKET_OPEN = dtime(9, 15)
+MARKET_CLOSE = dtime(15, 30)
+
+
+def _ist(now: Optional[datetime]) -> datetime:
+    return now.astimezone(IST) if now is not None else datetime.now(IST)
+
+
+def is_market_open(now: Optional[datetime] = None) -> bool:
+    """True during the NSE session, Monday to Friday 09:15-15:30 IST. Exchange holidays are not known."""
+    now = _ist(now)
+    return now.weekday() < 5 and MARKET_OPEN <= now.time() < MARKET_CLOSE
+
+
+def seconds_until_open(now: Optional[datetime] = None) -> float:
+    """Seconds until the next session opens (the next one, if the market is open now)."""
+    now = _ist(now)
+    opens = datetime.combine(now.date(), MARKET_OPEN, IST)
+    while opens <= now or opens.weekday() >= 5:
+        opens += timedelta(days=1)
+    return (opens - now).total_seconds()
@@ -0,0 +1,181 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+# Upper bounds (seconds) of every latency histogram
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+HELP = {
+    "tradefolio_request_duration_seconds": "Time to produce a response, by route and status.",
+    "tradefolio_phase_duration_seconds": "Time spent in auth, upstream and Supabase calls, by route.",
+    "tradefolio_upstream_requests_total": "RapidAPI calls by host and outcome.",
+    "tradefolio_cache_hits_total": "Cache hits by cache.",
+    "tradefolio_cache_misses_total": "Cache misses by cache.",
+    "tradefolio_cache_stale_hits_total": "Entries served past their freshness, by cache.",
+    "tradefolio_cache_entries": "Entries currently held, by cache.",
+    "tradefolio_upstream_coalesced_total": "Upstream calls answered by an identical in-flight call.",
+    "tradefolio_rate_governor_total": "Rate governor decisions by outcome.",
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# Phases of the request being served on this thread or task (None outside requests)
+_current: "contextvars.ContextVar[Optional[RequestTimings]]" = contextvars.ContextVar(
+    "request_timings", default=None)
+
+
+class RequestTimings:
+    """Phase durations collected while serving one request."""
+
+    def __init__(self, route: str):
+        self.route = route
+        self.started = time.perf_counter()
+        self.phases: List[Tuple[str, float]] = []
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        """Server-Timing header value: one entry per phase (summed over calls) plus the total."""
+        totals: Dict[str, List[float]] = {}
+        for phase, seconds in list(self.phases):
+            entry = totals.setdefault(phase, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += 1
+        parts = [f'{phase};dur={seconds * 1000:.1f}' + (f';desc="{calls} calls"' if calls > 1 else "")
+                 for phase, (seconds, calls) in totals.items()]
+        parts.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(parts)
+
+
+def _labels(labels: Mapping[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in labels)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + "}"
+
+
+class Metrics:
+    """
+    In-process registry of latency histograms and counters, rendered in the
+    Prometheus text format. Each worker process keeps its own numbers.
+    """
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        # name -> labels -> [count per bucket..., +Inf count, sum]
+        self._histograms: Dict[str, Dict[Labels, List[float]]] = {}
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, seconds: float, **labels: Any) -> None:
+        key = _labels(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {}).get(key)
+            if series is None:
+                series = self._histograms[name][key] = [0.0] * (len(self.buckets) + 2)
+            series[bisect.bisect_left(self.buckets, seconds)] += 1
+            series[-1] += seconds
+
+    def inc(self, name: str, amount: float = 1.0, **labels: Any) -> None:
+        key = _labels(labels)
+        with self._lock:
+            counters = self._counters.setdefault(name, {})
+            counters[key] = counters.get(key, 0.0) + amount
+
+    @contextmanager
+    def timed(self, phase: str) -> Iterator[None]:
+        """
+        Times the enclosed block as `phase` of the current request (labelled with
+        its route, or "background" outside one) and adds it to its Server-Timing.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            timings = _current.get()
+            self.observe("tradefolio_phase_duration_seconds", seconds,
+                         phase=phase, route=timings.route if timings else "background")
+            if timings is not None:
+                timings.phases.append((phase, seconds))
+
+    def begin_request(self, route: str) -> contextvars.Token:
+        return _current.set(RequestTimings(route))
+
+    def current_request(self) -> Optional[RequestTimings]:
+        return _current.get()
+
+    def end_request(self, method: str, status: int) -> Optional[RequestTimings]:
+        """Records the request's total duration; returns its timings for the Server-Timing header."""
+        timings = _current.get()
+        if timings is not None:
+            self.observe("tradefolio_request_duration_seconds", timings.elapsed(),
+                         method=method, route=timings.route, status=status)
+        return timings
+
+    @staticmethod
+    def reset_request(token: contextvars.Token) -> None:
+        try:
+            _current.reset(token)
+        except ValueError:
+            # Token from another context (e.g. a handler that switched threads)
+            _current.set(None)
+
+    def render(self, gauges: Sequence[Tuple[str, str, Labels, float]] = ()) -> str:
+        """
+        Prometheus exposition of every series, followed by `gauges`: point-in-time
+        (name, type, labels, value) samples such as cache counters read at scrape time.
+        """
+        with self._lock:
+            histograms = {name: {k: list(v) for k, v in series.items()}
+                          for name, series in self._histograms.items()}
+            counters = {name: dict(series) for name, series in self._counters.items()}
+
+        lines: List[str] = []
+        for name, series in sorted(histograms.items()):
+            lines += [f"# HELP {name} {HELP.get(name, name)}", f"# TYPE {name} histogram"]
+            for labels, values in sorted(series.items()):
+                cumulative = 0.0
+                for bound, count in zip(self.buckets + (float("inf"),), values):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative:g}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {values[-1]:.6f}")
+                lines.append(f"{name}_count{_format_labels(labels)} {cumulative:g}")
+        for name, series in sorted(counters.items()):
+            lines += [f"# HELP {name} {HELP.get(name, name)}", f"# TYPE {name} counter"]
+            lines += [f"{name}{_format_labels(labels)} {value:g}" for labels, value in sorted(series.items())]
+
+        described = set()
+        for name, kind, labels, value in sorted(gauges, key=lambda sample: sample[0]):
+            if name not in described:
+                described.add(name)
+                lines += [f"# HELP {name} {HELP.get(name, name)}", f"# TYPE {name} {kind}"]
+            lines.append(f"{name}{_format_labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+def cache_samples(caches: Mapping[str, Optional[Dict[str, Any]]]) -> List[Tuple[str, str, Labels, float]]:
+    """Turns the stats() of named caches into hit/miss/stale/size samples for Metrics.render."""
+    samples = []
+    for cache, stats in caches.items():
+        if not stats:
+            continue
+        labels = (("cache", cache),)
+        for field, name, kind in (("hits", "tradefolio_cache_hits_total", "counter"),
+                                  ("misses", "tradefolio_cache_misses_total", "counter"),
+                                  ("stale_hits", "tradefolio_cache_stale_hits_total", "counter"),
+                                  ("size", "tradefolio_cache_entries", "gauge")):
+            if field in stats:
+                samples.append((name, kind, labels, float(stats[field])))
+    return samples
@@ -0,0 +1,132 @@
+import base64
+import bisect
+import hashlib
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def normalize_article(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {"article_title": item.get("title"), "article_url": item.get("link"),
+            "article_photo_url": item.get("photo_url"), "source": item.get("source_name"),
+            "post_time_utc": item.get("published_datetime_utc")}
+
+
+def encode_cursor(key: Tuple[str, str]) -> str:
+    return base64.urlsafe_b64encode("\n".join(key).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+    post_time, url = raw.split("\n", 1)
+    return post_time, url
+
+
+class NewsStore:
+    """
+    In-memory business-news feed, refreshed from upstream on a background thread.
+    Articles are deduplicated by URL and kept newest-first, so pages can be
+    served by cursor without touching RapidAPI.
+    """
+
+    def __init__(self, fetch: Callable[[], Dict[str, Any]], refresh_interval: float = 300.0,
+                 max_items: int = 1000):
+        self.fetch = fetch
+        self.refresh_interval = refresh_interval
+        self.max_items = max_items
+        self._articles: List[Dict[str, Any]] = []
+        # Ascending sort keys matching _articles (newest first), for bisecting cursors
+        self._keys: List[Tuple[str, str]] = []
+        self.version = ""
+        self.last_refresh = 0.0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @staticmethod
+    def _sort_key(post_time: str, url: str) -> Tuple[str, str]:
+        # ISO-8601 UTC timestamps sort lexically; invert them so newest comes first.
+        # Undated articles sort after everything else.
+        return "".join(chr(0x10FFFF - ord(c)) for c in post_time or "0"), url
+
+    @staticmethod
+    def _cursor_fields(article: Dict[str, Any]) -> Tuple[str, str]:
+        return article.get("post_time_utc") or "", article.get("article_url") or ""
+
+    def refresh(self) -> bool:
+        """Fetches the upstream feed and merges it in. Returns False if the fetch failed."""
+        with self._refresh_lock:
+            result = self.fetch()
+            if result.get("status") != "OK" or not isinstance(result.get("data"), list):
+                print(f"News refresh failed: {result.get('message', result.get('status'))}")
+                return False
+
+            with self._lock:
+                by_url = {a["article_url"]: a for a in self._articles}
+            for item in result["data"]:
+                article = normalize_article(item)
+                if article["article_url"]:
+                    by_url[article["article_url"]] = article
+
+            articles = sorted(by_url.values(),
+                              key=lambda a: self._sort_key(*self._cursor_fields(a)))[:self.max_items]
+            keys = [self._sort_key(*self._cursor_fields(a)) for a in articles]
+            version = hashlib.sha1("\n".join(k[1] for k in keys).encode("utf-8")).hexdigest()[:16]
+            with self._lock:
+                self._articles, self._keys, self.version = articles, keys, version
+                self.last_refresh = time.time()
+            return True
+
+    def start(self) -> None:
+        """Starts the background refresher once; the first load happens inline."""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="news-refresh", daemon=True)
+        if not self._articles:
+            self.refresh()
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"News refresh error: {e}")
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def discard(self) -> None:
+        """
+        Forgets the parent's refresher in a forked child, whose copy of the thread
+        never runs, so the next start() begins its own. The locks are replaced in
+        case that thread held one at the fork.
+        """
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def page(self, limit: int, cursor: Optional[str] = None,
+             offset: int = 0) -> Dict[str, Any]:
+        """Returns up to `limit` articles after `cursor` (or from `offset`) plus the next cursor."""
+        with self._lock:
+            articles, keys, version = self._articles, self._keys, self.version
+        if cursor:
+            start = bisect.bisect_right(keys, self._sort_key(*decode_cursor(cursor)))
+        else:
+            start = max(offset, 0)
+        items = articles[start:start + limit]
+        has_more = start + limit < len(articles)
+        return {
+            "status": "OK",
+            "data": items,
+            "has_more": has_more,
+            "next_cursor": encode_cursor(self._cursor_fields(items[-1])) if items and has_more else None,
+            "total": len(articles),
+            "version": version,
+        }
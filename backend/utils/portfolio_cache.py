@@ -0,0 +1,293 @@
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from backend.utils.write_signal import WriteSignals
+
+
+def _num(value: Any) -> Any:
+    # Running float sums drift (0.1 + 0.2); Supabase returns DECIMALs exactly
+    return round(value, 6) if isinstance(value, float) else value
+
+
+class PortfolioState:
+    """
+    One portfolio's row, its holdings (None until loaded) and a summary kept
+    up to date by every write: count, total quantity, total cost and the
+    symbol multiset (None while holdings are unknown).
+    """
+
+    __slots__ = ("row", "holdings", "holdings_count", "total_quantity", "total_cost", "symbols")
+
+    def __init__(self, row: Dict[str, Any], summary: Optional[Dict[str, Any]] = None,
+                 holdings: Optional[Iterable[Dict[str, Any]]] = None):
+        self.row = row
+        self.holdings: Optional[Dict[str, Dict[str, Any]]] = None
+        self.holdings_count, self.total_quantity, self.total_cost = 0, 0, 0
+        self.symbols: Optional[Counter] = None
+        if holdings is not None:
+            self.set_holdings(holdings)
+        elif summary is not None:
+            self.holdings_count = summary.get("holdings_count", 0)
+            self.total_quantity = summary.get("total_quantity", 0)
+            self.total_cost = summary.get("total_cost", 0)
+
+    def set_holdings(self, holdings: Iterable[Dict[str, Any]]) -> None:
+        self.holdings = {}
+        self.holdings_count, self.total_quantity, self.total_cost = 0, 0, 0
+        self.symbols = Counter()
+        for holding in holdings:
+            self.add(holding)
+
+    def add(self, holding: Dict[str, Any], known: bool = True) -> None:
+        """Adds a lot to the summary, and to the holdings when its id is `known`."""
+        self.holdings_count += 1
+        self.total_quantity += holding["quantity"]
+        self.total_cost += holding["quantity"] * holding["purchase_price"]
+        if self.symbols is not None:
+            self.symbols[holding["symbol"].upper()] += 1
+        if self.holdings is not None:
+            if known:
+                self.holdings[holding["id"]] = holding
+            else:
+                self.holdings = None
+
+    def remove(self, holding: Dict[str, Any]) -> None:
+        self.holdings_count -= 1
+        self.total_quantity -= holding["quantity"]
+        self.total_cost -= holding["quantity"] * holding["purchase_price"]
+        if self.symbols is not None:
+            symbol = holding["symbol"].upper()
+            self.symbols[symbol] -= 1
+            if self.symbols[symbol] <= 0:
+                del self.symbols[symbol]
+        if self.holdings is not None:
+            self.holdings.pop(holding["id"], None)
+
+    def summary(self) -> Dict[str, Any]:
+        return {"holdings_count": self.holdings_count, "total_quantity": _num(self.total_quantity),
+                "total_cost": _num(self.total_cost)}
+
+
+class _UserEntry:
+    __slots__ = ("portfolios", "complete", "expires", "version")
+
+    def __init__(self, expires: float, version: int):
+        self.portfolios: Dict[str, PortfolioState] = {}
+        self.complete = False  # every portfolio of the user is present
+        self.expires = expires
+        self.version = version  # the user's write signal when the entry was loaded
+
+
+class PortfolioCache:
+    """
+    Per-user portfolios and holdings, filled from Supabase on a miss and kept
+    current by the write routes, which apply their change under the lock right
+    after Supabase accepts it. A read that started before a write to the same
+    user is not cached (see `token`), so a slow load cannot undo the write.
+
+    With `signal_dir`, every write is also counted in the user's WriteSignals
+    file there, and an entry is dropped once another process has written to
+    the user since it was loaded, so such writes are seen on the next read.
+    Otherwise, and for other hosts, entries expire after `ttl` seconds, which
+    bounds how long such writes go unseen; a `ttl` of 0 disables the cache.
+    """
+
+    def __init__(self, ttl: float = 60.0, max_users: int = 1024, signal_dir: Optional[str] = None):
+        self.ttl = ttl
+        self.max_users = max_users
+        self.signals = WriteSignals(signal_dir, "portfolio cache")
+        self._users: "OrderedDict[str, _UserEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._seq = 0
+        # Sequence number of each user's last write; older ones are forgotten,
+        # and loads that started before the newest forgotten one are not cached
+        self._last_write: "OrderedDict[str, int]" = OrderedDict()
+        self._forgotten = 0
+        self.hits = 0
+        self.misses = 0
+
+    def token(self, user_id: str) -> Tuple[int, int]:
+        """Taken before reading the user's data from Supabase and handed to the load_* call."""
+        version = self.signals.version(user_id)
+        with self._lock:
+            return self._seq, version
+
+    def version(self, user_id: str) -> int:
+        """
+        The user's write count across processes (always 0 without a signal dir),
+        for caches derived from the user's portfolios to key on; -1 if unreadable.
+        """
+        return self.signals.version(user_id)
+
+    def _entry(self, user_id: str, version: int) -> Optional[_UserEntry]:
+        entry = self._users.get(user_id)
+        if entry is None or entry.expires < time.monotonic() or entry.version != version:
+            if entry is not None:
+                del self._users[user_id]
+            return None
+        self._users.move_to_end(user_id)
+        return entry
+
+    def _count(self, hit: bool) -> None:
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def _loadable(self, user_id: str, token: Tuple[int, int]) -> Optional[_UserEntry]:
+        """The user's entry (created if needed) if a load that began at `token` may be cached."""
+        seq, version = token
+        if self.ttl <= 0 or version < 0 or seq < self._last_write.get(user_id, self._forgotten):
+            return None
+        entry = self._entry(user_id, version)
+        if entry is None:
+            entry = self._users[user_id] = _UserEntry(time.monotonic() + self.ttl, version)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        return entry
+
+    def _wrote(self, user_id: str, version: Optional[int]) -> Optional[_UserEntry]:
+        """
+        Records a write and returns the entry to apply it to. With signals,
+        `version` is the user's version including this write, and the entry is
+        kept only if it had seen every earlier one.
+        """
+        self._seq += 1
+        self._last_write[user_id] = self._seq
+        self._last_write.move_to_end(user_id)
+        while len(self._last_write) > self.max_users * 4:
+            self._forgotten = max(self._forgotten, self._last_write.popitem(last=False)[1])
+        if version is None:
+            return self._entry(user_id, 0)
+        entry = self._entry(user_id, version - 1)
+        if entry is not None:
+            entry.version = version
+        return entry
+
+    # Reads: None means a miss
+
+    def owns(self, user_id: str, portfolio_id: str) -> Optional[bool]:
+        version = self.signals.version(user_id)
+        with self._lock:
+            entry = self._entry(user_id, version)
+            if entry is None or (portfolio_id not in entry.portfolios and not entry.complete):
+                return None
+            return portfolio_id in entry.portfolios
+
+    def listing(self, user_id: str) -> Optional[List[Dict[str, Any]]]:
+        """Portfolio rows with their summary fields, as GET /portfolios returns them."""
+        version = self.signals.version(user_id)
+        with self._lock:
+            entry = self._entry(user_id, version)
+            self._count(entry is not None and entry.complete)
+            if entry is None or not entry.complete:
+                return None
+            return [dict(state.row, **state.summary()) for state in entry.portfolios.values()]
+
+    def portfolio(self, user_id: str, portfolio_id: str) -> Optional[Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]]:
+        """(row, holdings) for a portfolio with loaded holdings; (None, []) if the user has no such portfolio."""
+        version = self.signals.version(user_id)
+        with self._lock:
+            entry = self._entry(user_id, version)
+            state = entry.portfolios.get(portfolio_id) if entry is not None else None
+            if state is None and entry is not None and entry.complete:
+                self._count(True)
+                return None, []
+            self._count(state is not None and state.holdings is not None)
+            if state is None or state.holdings is None:
+                return None
+            return state.row, list(state.holdings.values())
+
+    def portfolios(self, user_id: str) -> Optional[List[Tuple[Dict[str, Any], List[Dict[str, Any]], Counter]]]:
+        """(row, holdings, symbols) for every portfolio, oldest first, once all holdings are loaded."""
+        version = self.signals.version(user_id)
+        with self._lock:
+            entry = self._entry(user_id, version)
+            ready = entry is not None and entry.complete and all(
+                s.holdings is not None for s in entry.portfolios.values())
+            self._count(ready)
+            if not ready:
+                return None
+            states = sorted(entry.portfolios.values(), key=lambda s: s.row.get("created_at") or "")
+            return [(s.row, list(s.holdings.values()), Counter(s.symbols)) for s in states]
+
+    # Loads after a miss
+
+    def load_listing(self, user_id: str, token: Tuple[int, int], rows: List[Dict[str, Any]]) -> None:
+        """Rows carrying holdings_count, total_quantity and total_cost, from the summaries table."""
+        with self._lock:
+            entry = self._loadable(user_id, token)
+            if entry is None:
+                return
+            previous = entry.portfolios
+            entry.portfolios = {}
+            for row in rows:
+                summary = {k: row.get(k, 0) for k in ("holdings_count", "total_quantity", "total_cost")}
+                state = PortfolioState({k: v for k, v in row.items() if k not in summary}, summary)
+                old = previous.get(row["id"])
+                # Keep holdings loaded earlier when they still agree with the stored summary
+                if old is not None and old.holdings is not None and old.holdings_count == state.holdings_count:
+                    state = old
+                    state.row = {k: v for k, v in row.items() if k not in summary}
+                entry.portfolios[row["id"]] = state
+            entry.complete = True
+
+    def load_portfolio(self, user_id: str, token: Tuple[int, int], row: Dict[str, Any],
+                       holdings: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            entry = self._loadable(user_id, token)
+            if entry is not None:
+                entry.portfolios[row["id"]] = PortfolioState(row, holdings=holdings)
+
+    def load_all(self, user_id: str, token: Tuple[int, int], rows: List[Dict[str, Any]]) -> None:
+        """Every portfolio row of the user, each with its `holdings` list."""
+        with self._lock:
+            entry = self._loadable(user_id, token)
+            if entry is None:
+                return
+            entry.portfolios = {}
+            for row in rows:
+                row = dict(row)
+                entry.portfolios[row["id"]] = PortfolioState(row, holdings=row.pop("holdings") or [])
+            entry.complete = True
+
+    # Write-through, after Supabase has accepted the change
+
+    def add_portfolio(self, user_id: str, row: Dict[str, Any]) -> None:
+        version = self.signals.signal(user_id)
+        with self._lock:
+            entry = self._wrote(user_id, version)
+            if entry is not None:
+                entry.portfolios[row["id"]] = PortfolioState(row, holdings=[])
+
+    def remove_portfolio(self, user_id: str, portfolio_id: str) -> None:
+        version = self.signals.signal(user_id)
+        with self._lock:
+            entry = self._wrote(user_id, version)
+            if entry is not None:
+                entry.portfolios.pop(portfolio_id, None)
+
+    def add_holdings(self, user_id: str, portfolio_id: str, holdings: List[Dict[str, Any]],
+                     known: bool = True) -> None:
+        """`known` is False for rows inserted without returning their ids (bulk import)."""
+        version = self.signals.signal(user_id)
+        with self._lock:
+            entry = self._wrote(user_id, version)
+            state = entry.portfolios.get(portfolio_id) if entry is not None else None
+            if state is None:
+                return
+            for holding in holdings:
+                state.add(holding, known)
+
+    def remove_holding(self, user_id: str, holding: Dict[str, Any]) -> None:
+        version = self.signals.signal(user_id)
+        with self._lock:
+            entry = self._wrote(user_id, version)
+            state = entry.portfolios.get(holding["portfolio_id"]) if entry is not None else None
+            if state is not None:
+                state.remove(holding)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._users), "hits": self.hits, "misses": self.misses}
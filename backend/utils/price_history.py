@@ -0,0 +1,425 @@
+import os
+import shutil
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote as url_quote
+
+import numpy as np
+
+from backend.utils import fast_json
+from backend.utils.scheduler import LeaderLock
+
+# One little-endian file per column; a series is the same row index across them.
+COLUMNS = (("timestamp", "<i8"), ("open", "<f8"), ("high", "<f8"),
+           ("low", "<f8"), ("close", "<f8"), ("volume", "<f8"))
+ROW_BYTES = {name: np.dtype(dtype).itemsize for name, dtype in COLUMNS}
+
+# Symlink in a series directory naming the generation directory that holds its columns
+CURRENT = "current"
+
+# Stored resolutions: minute bars built from live quotes, and daily bars
+INTRADAY, DAILY = "intraday", "daily"
+
+# Query intervals in seconds; below a day they are read from the intraday series
+INTERVALS = {"1m": 60, "5m": 300, "15m": 900, "30m": 1800, "1h": 3600,
+             "1d": 86400, "1w": 7 * 86400}
+# Shift so weekly buckets start on Monday (the epoch was a Thursday)
+WEEK_OFFSET = 3 * 86400
+
+
+def parse_time(value: Any) -> Optional[int]:
+    """Epoch seconds from an int/float, a digit string or an ISO-8601 date/datetime (UTC if naive)."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)) or str(value).isdigit():
+        return int(value)
+    parsed = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def downsample(series: Dict[str, np.ndarray], step: int, offset: int = 0,
+               sum_volume: bool = False) -> Dict[str, np.ndarray]:
+    """
+    Aggregates bars into `step`-second buckets: first open, max high, min low,
+    last close. Volume is the last value (intraday bars carry the session's
+    running total) or, with `sum_volume`, the bucket total (daily bars).
+    """
+    ts = series["timestamp"]
+    if not len(ts):
+        return series
+    buckets = (ts + offset) // step
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(ts)] - 1
+    return {
+        "timestamp": buckets[starts] * step - offset,
+        "open": series["open"][starts],
+        "high": np.maximum.reduceat(series["high"], starts),
+        "low": np.minimum.reduceat(series["low"], starts),
+        "close": series["close"][ends],
+        "volume": np.add.reduceat(series["volume"], starts) if sum_volume else series["volume"][ends],
+    }
+
+
+# A live quote reduced to what the bars need: (symbol, time, price, volume, day open, day high, day low)
+Tick = Tuple[str, int, float, float, float, float, float]
+
+
+def to_tick(quote: Dict[str, Any], received: int) -> Optional[Tick]:
+    """The quote as a Tick, timed by its own timestamp or else `received`; None without a price."""
+    symbol, price = quote.get("symbol"), quote.get("price")
+    if not symbol or price is None:
+        return None
+    try:
+        ts = parse_time(quote.get("last_update_utc")) or received
+    except ValueError:
+        ts = received
+    price = float(price)
+    return (symbol.strip().upper(), ts, price, float(quote.get("volume") or 0),
+            float(quote.get("open") or price), float(quote.get("high") or price),
+            float(quote.get("low") or price))
+
+
+class PriceHistory:
+    """
+    On-disk OHLC time series per symbol in a columnar layout:
+    `<root>/<resolution>/<symbol>/gen-<n>/<column>.bin`, each a flat array of
+    8-byte values, with `<symbol>/current` linking to the live generation.
+    Reads memory-map the column files; writes append rows, or rewrite the last
+    row when it belongs to the same bar. Older rows (backfills) and pruning
+    rewrite the series into the next generation and switch `current` to it in
+    one rename, so a reader maps every column from the same generation.
+    Series written before generations keep their columns in `<symbol>/`
+    until their first rewrite.
+
+    Writes are serialized per process only. Live quotes reach the files through
+    HistoryRecorder, which writes from one process at a time under its lock;
+    other writers (backfills) take that lock too.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def _dir(self, resolution: str, symbol: str) -> str:
+        return os.path.join(self.root, resolution, url_quote(symbol.strip().upper(), safe=""))
+
+    def read(self, symbol: str, resolution: str, start: Optional[int] = None,
+             end: Optional[int] = None, columns: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+        """
+        Returns column arrays for bars with start <= timestamp <= end
+        (memory-mapped, read-only). `columns` limits which ones are mapped;
+        the timestamp is always included.
+        """
+        wanted = set(columns or ROW_BYTES) | {"timestamp"}
+        selected = [(name, dtype) for name, dtype in COLUMNS if name in wanted]
+        directory = self._dir(resolution, symbol)
+        for attempt in range(3):
+            try:
+                series = self._map(directory, self._generation(directory), selected)
+                break
+            except FileNotFoundError:
+                # A rewrite removed the generation after we resolved it; resolve again
+                if attempt == 2:
+                    raise
+        if series is None:
+            return {name: np.empty(0, dtype=dtype) for name, dtype in selected}
+        ts = series["timestamp"]
+        lo = 0 if start is None else int(np.searchsorted(ts, start, side="left"))
+        hi = len(ts) if end is None else int(np.searchsorted(ts, end, side="right"))
+        return {name: col[lo:hi] for name, col in series.items()}
+
+    @staticmethod
+    def _generation(directory: str) -> str:
+        """The directory holding the series' columns: its live generation, or itself before the first rewrite."""
+        try:
+            return os.path.join(directory, os.readlink(os.path.join(directory, CURRENT)))
+        except OSError:
+            return directory
+
+    @classmethod
+    def _map(cls, directory: str, generation: str,
+             selected: List[Tuple[str, str]]) -> Optional[Dict[str, np.memmap]]:
+        """Maps the `selected` columns of one generation, or None when the series is empty."""
+        paths = {name: os.path.join(generation, f"{name}.bin") for name, _ in selected}
+        # A crash mid-append can leave columns of different lengths; trust the shortest
+        rows = min((os.path.getsize(p) // ROW_BYTES[n] if os.path.exists(p) else 0)
+                   for n, p in paths.items())
+        if rows == 0:
+            if cls._generation(directory) != generation:
+                raise FileNotFoundError(generation)  # replaced while we looked
+            return None
+        return {name: np.memmap(paths[name], dtype=dtype, mode="r", shape=(rows,))
+                for name, dtype in selected}
+
+    def write_bars(self, symbol: str, resolution: str, bars: Dict[str, np.ndarray],
+                   live: bool = False) -> int:
+        """
+        Upserts bars (column arrays sorted by timestamp, one bar per timestamp).
+        Bars after the last stored one are appended and a first bar on the last
+        timestamp replaces it; anything older triggers a merge-and-rewrite. For
+        `live` bars built from ticks, a bar on the last timestamp is instead
+        folded into it (keeping its open, extending high/low) and bars older
+        than it are dropped. Returns rows written.
+        """
+        with self._lock:
+            directory = self._dir(resolution, symbol)
+            current = self.read(symbol, resolution)
+            rows = len(current["timestamp"])
+            last_ts = int(current["timestamp"][-1]) if rows else None
+            if live and last_ts is not None:
+                # A closed bar is not reopened by ticks that arrive after newer ones
+                keep = np.asarray(bars["timestamp"]) >= last_ts
+                bars = {name: np.asarray(bars[name])[keep] for name, _ in COLUMNS}
+            if not len(bars["timestamp"]):
+                return 0
+            first_new = int(bars["timestamp"][0])
+            generation = self._generation(directory)
+
+            if last_ts is None:
+                self._replace(directory, bars)
+            elif first_new > last_ts:
+                self._append(generation, bars)
+            elif first_new == last_ts and (len(bars["timestamp"]) == 1 or int(bars["timestamp"][1]) > last_ts):
+                bar = {name: np.asarray(bars[name])[:1].copy() for name, _ in COLUMNS}
+                if live:
+                    bar["open"][0] = current["open"][-1]
+                    bar["high"][0] = max(bar["high"][0], current["high"][-1])
+                    bar["low"][0] = min(bar["low"][0], current["low"][-1])
+                self._overwrite_row(generation, rows - 1, bar)
+                if len(bars["timestamp"]) > 1:
+                    self._append(generation, {name: np.asarray(bars[name])[1:] for name, _ in COLUMNS})
+            else:
+                self._rewrite(directory, current, bars)
+            return len(bars["timestamp"])
+
+    def prune(self, symbol: str, resolution: str, before: int) -> int:
+        """Drops bars older than `before` by rewriting the series. Returns rows dropped."""
+        with self._lock:
+            current = self.read(symbol, resolution)
+            drop = int(np.searchsorted(current["timestamp"], before, side="left"))
+            if drop:
+                self._replace(self._dir(resolution, symbol),
+                              {name: np.asarray(col[drop:]) for name, col in current.items()})
+            return drop
+
+    @staticmethod
+    def _append(directory: str, bars: Dict[str, np.ndarray]) -> None:
+        for name, dtype in COLUMNS:
+            with open(os.path.join(directory, f"{name}.bin"), "ab") as f:
+                f.write(np.ascontiguousarray(bars[name], dtype=dtype).tobytes())
+
+    @staticmethod
+    def _overwrite_row(directory: str, row: int, bar: Dict[str, np.ndarray]) -> None:
+        for name, dtype in COLUMNS:
+            with open(os.path.join(directory, f"{name}.bin"), "r+b") as f:
+                f.seek(row * ROW_BYTES[name])
+                f.write(np.asarray(bar[name][:1], dtype=dtype).tobytes())
+
+    @classmethod
+    def _rewrite(cls, directory: str, current: Dict[str, np.ndarray], bars: Dict[str, np.ndarray]) -> None:
+        # New bars win on equal timestamps: stable sort keeps them after the old
+        # ones, and the last occurrence of each timestamp is kept.
+        merged = {name: np.concatenate([np.asarray(current[name]), np.asarray(bars[name], dtype=dtype)])
+                  for name, dtype in COLUMNS}
+        order = np.argsort(merged["timestamp"], kind="stable")
+        ts = merged["timestamp"][order]
+        keep = order[np.r_[ts[1:] != ts[:-1], True]]
+        cls._replace(directory, {name: merged[name][keep] for name, _ in COLUMNS})
+
+    @classmethod
+    def _replace(cls, directory: str, series: Dict[str, np.ndarray]) -> None:
+        """Writes `series` as the next generation, switches `current` to it and removes the old one."""
+        old = cls._generation(directory)
+        number = int(os.path.basename(old)[len("gen-"):]) + 1 if old != directory else 1
+        generation = os.path.join(directory, f"gen-{number}")
+        shutil.rmtree(generation, ignore_errors=True)  # left by a rewrite that crashed before the switch
+        os.makedirs(generation)
+        for name, dtype in COLUMNS:
+            with open(os.path.join(generation, f"{name}.bin"), "wb") as f:
+                f.write(np.ascontiguousarray(series[name], dtype=dtype).tobytes())
+        link = os.path.join(directory, CURRENT + ".tmp")
+        if os.path.lexists(link):
+            os.remove(link)
+        os.symlink(os.path.basename(generation), link)
+        os.replace(link, os.path.join(directory, CURRENT))
+        # Memory maps held by readers keep the old files alive until released;
+        # a reader that resolved the old generation but has not mapped it yet retries
+        if old == directory:
+            for name, _ in COLUMNS:
+                if os.path.exists(path := os.path.join(directory, f"{name}.bin")):
+                    os.remove(path)
+        else:
+            shutil.rmtree(old, ignore_errors=True)
+
+    def record_ticks(self, ticks: Iterable[Tick]) -> List[str]:
+        """
+        Folds ticks into minute bars and the day's bar of each symbol, in
+        timestamp order, one write per series. Returns the symbols written.
+        """
+        by_symbol: Dict[str, List[Tick]] = {}
+        for tick in ticks:
+            by_symbol.setdefault(tick[0], []).append(tick)
+        for symbol, rows in by_symbol.items():
+            rows.sort(key=lambda t: t[1])
+            ts = np.array([t[1] for t in rows], dtype=np.int64)
+            price, volume = np.array([t[2] for t in rows]), np.array([t[3] for t in rows])
+            self.write_bars(symbol, INTRADAY, downsample(
+                {"timestamp": ts, "open": price, "high": price, "low": price, "close": price,
+                 "volume": volume}, 60), live=True)
+            self.write_bars(symbol, DAILY, downsample(
+                {"timestamp": ts, "open": np.array([t[4] for t in rows]),
+                 "high": np.maximum(np.array([t[5] for t in rows]), price),
+                 "low": np.minimum(np.array([t[6] for t in rows]), price),
+                 "close": price, "volume": volume}, 86400))
+        return list(by_symbol)
+
+    def record_quotes(self, quotes: Iterable[Dict[str, Any]]) -> int:
+        """
+        Writes live quotes straight into the series (see record_ticks). The
+        quote's own timestamp is used when present. Returns quotes recorded.
+        """
+        now = int(time.time())
+        ticks = [t for t in (to_tick(q, now) for q in quotes) if t is not None]
+        self.record_ticks(ticks)
+        return len(ticks)
+
+    def query(self, symbol: str, start: int, end: int, interval: Optional[str] = None,
+              max_points: int = 1000) -> Tuple[str, Dict[str, np.ndarray]]:
+        """
+        Returns (interval, bars) between start and end. Without an explicit
+        interval the finest one that fits in `max_points` bars is chosen; with
+        one, only the latest `max_points` bars are returned.
+        """
+        if interval is None:
+            span = max(end - start, 1)
+            interval = next((name for name, step in INTERVALS.items() if span / step <= max_points), "1w")
+        step = INTERVALS[interval]
+        resolution = INTRADAY if step < 86400 else DAILY
+        series = self.read(symbol, resolution, start, end)
+        if step > (60 if resolution == INTRADAY else 86400):
+            series = downsample(series, step, offset=WEEK_OFFSET if interval == "1w" else 0,
+                                sum_volume=resolution == DAILY)
+        return interval, {name: col[-max_points:] for name, col in series.items()}
+
+
+class HistoryRecorder:
+    """
+    Gets live quotes into a PriceHistory without file I/O on the request path
+    and with a single writer per host. record() only buffers ticks in memory; a
+    background thread in each process flushes them every `flush_interval`
+    seconds to an append-only segment under `<root>/pending/`, then, if no other
+    process holds `<root>/writer.lock`, takes it and folds every process's
+    segments into the series. The writer also drops intraday bars older than
+    `intraday_days`. Backfills hold the same lock while they write.
+    """
+
+    def __init__(self, history: PriceHistory, flush_interval: float = 5.0,
+                 intraday_days: float = 30.0, max_pending: int = 100_000):
+        self.history = history
+        self.flush_interval = flush_interval
+        self.intraday_days = intraday_days
+        self.pending_dir = os.path.join(history.root, "pending")
+        self.lock = LeaderLock(os.path.join(history.root, "writer.lock"))
+        self._pending: Deque[Tuple[int, Dict[str, Any]]] = deque(maxlen=max_pending)
+        self._segments = 0
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self.merged = 0
+        self.pruned = 0
+
+    def record(self, quotes: Iterable[Dict[str, Any]]) -> None:
+        """Buffers quotes for the next flush; the oldest are dropped past `max_pending`."""
+        received = int(time.time())
+        self._pending.extend((received, q) for q in quotes)
+        self.start()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval)
+
+    def discard(self) -> None:
+        """Forgets the parent's thread, lock and unflushed ticks in a forked child."""
+        self._pending.clear()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self.lock.discard()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Price history flush failed: {e}")
+
+    def flush(self) -> None:
+        """Writes buffered ticks to a new segment, then merges all segments unless another process is."""
+        ticks = []
+        while self._pending:
+            received, quote = self._pending.popleft()
+            tick = to_tick(quote, received)
+            if tick is not None:
+                ticks.append(tick)
+        if ticks:
+            self._write_segment(ticks)
+        if self.lock.try_acquire():
+            try:
+                self.merge()
+            finally:
+                self.lock.release()
+
+    def _write_segment(self, ticks: List[Tick]) -> None:
+        # Written aside and renamed into place, so the writer never reads half a segment
+        os.makedirs(self.pending_dir, exist_ok=True)
+        self._segments += 1
+        path = os.path.join(self.pending_dir, f"{time.time_ns()}-{os.getpid()}-{self._segments}.jsonl")
+        with open(path + ".tmp", "wb") as f:
+            f.write(b"".join(fast_json.dumps(tick) + b"\n" for tick in ticks))
+        os.replace(path + ".tmp", path)
+
+    def merge(self) -> int:
+        """Folds every complete segment into the series and deletes it. Returns ticks merged."""
+        try:
+            names = sorted(n for n in os.listdir(self.pending_dir) if n.endswith(".jsonl"))
+        except FileNotFoundError:
+            return 0
+        ticks: List[Tick] = []
+        for name in names:
+            with open(os.path.join(self.pending_dir, name), "rb") as f:
+                ticks.extend(tuple(fast_json.loads(line)) for line in f if line.strip())
+        if not ticks:
+            return 0
+        symbols = self.history.record_ticks(ticks)
+        # Only after the ticks are in: a failed merge is retried, and folding a tick twice is harmless
+        for name in names:
+            os.remove(os.path.join(self.pending_dir, name))
+        self.merged += len(ticks)
+        self._prune(symbols)
+        return len(ticks)
+
+    def _prune(self, symbols: List[str]) -> None:
+        cutoff = int(time.time() - self.intraday_days * 86400)
+        for symbol in symbols:
+            first = self.history.read(symbol, INTRADAY, columns=("timestamp",))["timestamp"][:1]
+            # A day's slack, so each series is rewritten about once a day rather than every merge
+            if len(first) and first[0] < cutoff - 86400:
+                self.pruned += self.history.prune(symbol, INTRADAY, cutoff)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"pending": len(self._pending), "merged": self.merged, "pruned": self.pruned}
@@ -0,0 +1,87 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+class QuoteCache:
+    """
+    Thread-safe per-symbol quote cache with TTL expiry and LRU eviction.
+    Expired quotes are kept for another `stale_ttl` seconds for get_stale().
+    """
+
+    def __init__(self, ttl: float = 30.0, max_size: int = 1024, stale_ttl: float = 0.0):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.stale_ttl = stale_ttl
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize(symbol: str) -> str:
+        return symbol.strip().upper()
+
+    def get(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Returns the cached quote for a symbol, or None if missing or expired."""
+        key = self.normalize(symbol)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None and entry[0] + self.stale_ttl < time.monotonic():
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, symbol: str, quote: Dict[str, Any]) -> None:
+        key = self.normalize(symbol)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, quote)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get_stale(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Returns the cached quote even if expired, as long as it is within the stale window."""
+        key = self.normalize(symbol)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] + self.stale_ttl < time.monotonic():
+                return None
+            return entry[1]
+
+    def get_many(self, symbols: Iterable[str]) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+        """Splits symbols into cached quotes and the list of misses, preserving order."""
+        found: Dict[str, Dict[str, Any]] = {}
+        missing: List[str] = []
+        for symbol in symbols:
+            key = self.normalize(symbol)
+            if key in found or key in missing:
+                continue
+            quote = self.get(key)
+            if quote is None:
+                missing.append(key)
+            else:
+                found[key] = quote
+        return found, missing
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
@@ -0,0 +1,167 @@
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+# Fields that define whether a quote changed enough to be re-sent
+CHANGE_FIELDS = ("price", "change", "change_percent", "volume", "last_update_utc")
+
+
+class SubscriberLimitReached(Exception):
+    pass
+
+
+class Subscriber:
+    """
+    Per-client mailbox. Pending updates are conflated by symbol, so a slow
+    client only ever holds the latest quote per symbol instead of a backlog.
+    """
+
+    def __init__(self, symbols: Tuple[str, ...] = (), notify: Optional[Callable[[], None]] = None):
+        self.symbols = symbols
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._cond = threading.Condition()
+        self.closed = False
+        self.dropped = 0
+        # Extra wake-up hook for consumers that do not block on take(), e.g. an event loop
+        self.notify = notify
+
+    def offer(self, quotes: Dict[str, Dict[str, Any]]) -> None:
+        with self._cond:
+            self.dropped += len(self._pending.keys() & quotes.keys())
+            self._pending.update(quotes)
+            self._cond.notify()
+        if self.notify is not None:
+            self.notify()
+
+    def take(self, timeout: float) -> List[Dict[str, Any]]:
+        """Waits up to `timeout` seconds and returns the pending quotes (possibly none)."""
+        with self._cond:
+            if not self._pending and not self.closed:
+                self._cond.wait(timeout)
+            pending, self._pending = self._pending, {}
+        return list(pending.values())
+
+    def close(self) -> None:
+        with self._cond:
+            self.closed = True
+            self._cond.notify()
+
+
+class QuoteBroadcaster:
+    """
+    Live quotes for all stream clients of this worker from one poll loop. Each
+    symbol is counted once however many clients watch it: every `interval`
+    seconds the loop fetches the union of subscribed symbols in one batched
+    call and hands each client the changed quotes it asked for. Symbols nobody
+    has seen yet are fetched as soon as they are subscribed. The loop runs only
+    while there are subscribers.
+    """
+
+    def __init__(self, fetch: Callable[[List[str]], Dict[str, Any]], interval: float = 15.0,
+                 max_subscribers: int = 500):
+        self.fetch = fetch
+        self.interval = interval
+        self.max_subscribers = max_subscribers
+        self._subscribers: Dict[str, List[Subscriber]] = {}  # symbol -> its subscribers
+        self._count = 0
+        self._new: Set[str] = set()  # subscribed symbols not fetched yet
+        self.last: Dict[str, Dict[str, Any]] = {}
+        self.polls = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self, symbols: List[str], notify: Optional[Callable[[], None]] = None) -> Subscriber:
+        subscriber = Subscriber(tuple(sorted({s.strip().upper() for s in symbols if s.strip()})), notify)
+        with self._lock:
+            if self._count >= self.max_subscribers:
+                raise SubscriberLimitReached(f"Stream limit of {self.max_subscribers} subscribers reached")
+            self._count += 1
+            for symbol in subscriber.symbols:
+                if symbol not in self._subscribers:
+                    self._new.add(symbol)
+                self._subscribers.setdefault(symbol, []).append(subscriber)
+            snapshot = {s: self.last[s] for s in subscriber.symbols if s in self.last}
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="quote-stream", daemon=True)
+                self._thread.start()
+        if snapshot:
+            subscriber.offer(snapshot)
+        if self._new:
+            self._wake.set()
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        subscriber.close()
+        with self._lock:
+            self._count -= 1
+            for symbol in subscriber.symbols:
+                watchers = self._subscribers.get(symbol)
+                if watchers is not None and subscriber in watchers:
+                    watchers.remove(subscriber)
+                    if not watchers:
+                        del self._subscribers[symbol]
+                        self.last.pop(symbol, None)
+                        self._new.discard(symbol)
+
+    def discard(self) -> None:
+        """Forgets the parent's loop and subscribers in a forked child; its clients are the parent's."""
+        self._subscribers, self._new, self.last, self._count = {}, set(), {}, 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def poll_once(self, symbols: List[str]) -> None:
+        result = self.fetch(symbols)
+        self.polls += 1
+        changed = {}
+        for quote in result.get("data") or []:
+            symbol = (quote.get("symbol") or "").upper()
+            previous = self.last.get(symbol)
+            if previous is None or any(previous.get(f) != quote.get(f) for f in CHANGE_FIELDS):
+                changed[symbol] = quote
+        with self._lock:
+            # Symbols unsubscribed while the fetch was in flight are not kept
+            changed = {s: q for s, q in changed.items() if s in self._subscribers}
+            self.last.update(changed)
+            deliveries: Dict[Subscriber, Dict[str, Dict[str, Any]]] = {}
+            for symbol, quote in changed.items():
+                for subscriber in self._subscribers[symbol]:
+                    deliveries.setdefault(subscriber, {})[symbol] = quote
+        for subscriber, quotes in deliveries.items():
+            subscriber.offer(quotes)
+
+    def _run(self) -> None:
+        next_full = 0.0
+        while True:
+            self._wake.clear()
+            now = time.monotonic()
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    return
+                if now >= next_full:
+                    symbols = sorted(self._subscribers)
+                    next_full = now + self.interval
+                else:
+                    symbols = sorted(self._new)
+                self._new = set()
+            if symbols:
+                try:
+                    self.poll_once(symbols)
+                except Exception as e:
+                    print(f"Quote stream poll failed for {len(symbols)} symbols: {e}")
+            self._wake.wait(max(next_full - time.monotonic(), 0.0))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"subscribers": self._count, "symbols": len(self._subscribers), "polls": self.polls}
+
+
+def format_event(event: str, data: Any, event_id: Optional[int] = None) -> str:
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
@@ -0,0 +1,249 @@
+import asyncio
+import hashlib
+import heapq
+import itertools
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+# Priority classes, most important first
+PRIORITY_PORTFOLIO = 0   # valuations and the dashboard
+PRIORITY_MARKET = 1      # popular stocks, quote lookups, market trends, streams
+PRIORITY_BACKGROUND = 2  # search, news, backfills
+
+# Longest sleep between budget checks while queued
+POLL_INTERVAL = 0.05
+
+
+class TokenBucket:
+    """In-process token bucket refilled continuously at `rate` tokens per second up to `burst`."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_take(self, floor: float = 0.0) -> Tuple[bool, float]:
+        """
+        Takes one token if at least `floor` remain afterwards. Returns
+        (taken, seconds until one could be taken).
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + max(now - self.updated, 0.0) * self.rate)
+            self.updated = max(now, self.updated)
+            if self.tokens >= floor + 1.0:
+                self.tokens -= 1.0
+                return True, 0.0
+            return False, (floor + 1.0 - self.tokens) / self.rate
+
+    def pause(self, seconds: float) -> None:
+        """Empties the bucket and stops refilling for `seconds` (after an upstream 429)."""
+        with self._lock:
+            self.tokens = 0.0
+            self.updated = time.monotonic() + seconds
+
+    def level(self) -> float:
+        with self._lock:
+            return round(self.tokens, 2)
+
+
+class SQLiteTokenBucket:
+    """
+    Token bucket whose state lives in a SQLite row, so every worker process
+    sharing `path` draws from one budget. Uses wall-clock time; each take is
+    one short IMMEDIATE transaction.
+    """
+
+    def __init__(self, path: str, key: str, rate: float, burst: float):
+        self.key = key
+        self.rate = rate
+        self.burst = burst
+        self._conn = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS token_buckets "
+                           "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)")
+        self._conn.execute("INSERT OR IGNORE INTO token_buckets VALUES (?, ?, ?)", (key, burst, time.time()))
+        self._lock = threading.Lock()
+
+    def _update(self, take: bool, floor: float = 0.0, pause: float = 0.0) -> Tuple[bool, float]:
+        """Refills and optionally takes or pauses; returns (taken, wait) or, without take, (False, tokens)."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                tokens, updated = self._conn.execute(
+                    "SELECT tokens, updated FROM token_buckets WHERE key = ?", (self.key,)).fetchone()
+                now = time.time()
+                tokens = min(self.burst, tokens + max(now - updated, 0.0) * self.rate)
+                updated = max(now, updated)
+                taken, wait = False, 0.0
+                if pause:
+                    tokens, updated = 0.0, now + pause
+                elif take and tokens >= floor + 1.0:
+                    tokens -= 1.0
+                    taken = True
+                elif take:
+                    wait = (floor + 1.0 - tokens) / self.rate
+                self._conn.execute("UPDATE token_buckets SET tokens = ?, updated = ? WHERE key = ?",
+                                   (tokens, updated, self.key))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            return taken, tokens if not take else wait
+
+    def try_take(self, floor: float = 0.0) -> Tuple[bool, float]:
+        return self._update(take=True, floor=floor)
+
+    def pause(self, seconds: float) -> None:
+        self._update(take=False, pause=seconds)
+
+    def level(self) -> float:
+        return round(self._update(take=False)[1], 2)
+
+
+class RateGovernor:
+    """
+    Budgets upstream calls per (host, API key) with a token bucket and admits
+    queued callers in priority order. Lower classes must leave `reserve` tokens
+    per class step in the bucket, so a burst of searches cannot spend the budget
+    portfolio quotes need. Callers give up at their deadline; the last good
+    response per endpoint is kept so they can be answered stale instead.
+
+    The queue is per process; with `state_path` the bucket itself is shared
+    across processes through SQLite.
+    """
+
+    def __init__(self, rate: float, burst: float, reserve: float = 0.0, max_wait: float = 2.0,
+                 cooldown: float = 30.0, state_path: Optional[str] = None, stale_size: int = 512):
+        self.rate = rate
+        self.burst = burst
+        self.reserve = reserve
+        self.max_wait = max_wait
+        self.cooldown = cooldown
+        self.state_path = state_path
+        self._buckets: Dict[Hashable, Any] = {}
+        self._waiters: Dict[Hashable, List[Tuple[int, int]]] = {}
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._stale: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self.stale_size = stale_size
+        self.admitted = 0
+        self.rejected = 0
+        self.stale_served = 0
+        self.throttled = 0
+
+    @staticmethod
+    def _key(host: str, api_key: str) -> str:
+        # Bucket names end up on disk in shared mode; never store the key itself.
+        # An unset key (RAPIDAPI_NEWS_KEY is optional) gets its own bucket
+        return f"{host}:{hashlib.sha1((api_key or '').encode('utf-8')).hexdigest()[:12]}"
+
+    def _bucket(self, key: str):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = (SQLiteTokenBucket(self.state_path, key, self.rate, self.burst) if self.state_path
+                      else TokenBucket(self.rate, self.burst))
+            self._buckets[key] = bucket
+        return bucket
+
+    def _enqueue(self, key: str, priority: int) -> Tuple[int, int]:
+        ticket = (priority, next(self._seq))
+        with self._lock:
+            heapq.heappush(self._waiters.setdefault(key, []), ticket)
+            self._bucket(key)
+        return ticket
+
+    def _leave(self, key: str, ticket: Tuple[int, int], admitted: bool) -> None:
+        with self._lock:
+            queue = self._waiters[key]
+            queue.remove(ticket)
+            heapq.heapify(queue)
+            if admitted:
+                self.admitted += 1
+            else:
+                self.rejected += 1
+
+    def _attempt(self, key: str, ticket: Tuple[int, int]) -> Tuple[bool, Optional[float]]:
+        """
+        Takes a token if `ticket` is at the head of its queue. Otherwise returns
+        the wait until one could be taken, or None while others are ahead.
+        """
+        with self._lock:
+            if self._waiters[key][0] != ticket:
+                return False, None
+            bucket = self._buckets[key]
+        return bucket.try_take(floor=self.reserve * ticket[0])
+
+    def acquire(self, host: str, api_key: str, priority: int = PRIORITY_MARKET,
+                timeout: Optional[float] = None) -> bool:
+        """Blocks until a call may go upstream; returns False once the deadline passes."""
+        key = self._key(host, api_key)
+        deadline = time.monotonic() + (self.max_wait if timeout is None else timeout)
+        ticket = self._enqueue(key, priority)
+        admitted = False
+        try:
+            while True:
+                admitted, wait = self._attempt(key, ticket)
+                remaining = deadline - time.monotonic()
+                # At the head, a refill that lands after the deadline (e.g. a 429 pause) is final
+                if admitted or remaining <= 0 or (wait is not None and wait > remaining):
+                    return admitted
+                time.sleep(min(wait or POLL_INTERVAL, remaining, POLL_INTERVAL))
+        finally:
+            self._leave(key, ticket, admitted)
+
+    async def acquire_async(self, host: str, api_key: str, priority: int = PRIORITY_MARKET,
+                            timeout: Optional[float] = None) -> bool:
+        """acquire() for the event loop: waits with asyncio.sleep instead of blocking."""
+        key = self._key(host, api_key)
+        deadline = time.monotonic() + (self.max_wait if timeout is None else timeout)
+        ticket = self._enqueue(key, priority)
+        admitted = False
+        try:
+            while True:
+                admitted, wait = self._attempt(key, ticket)
+                remaining = deadline - time.monotonic()
+                if admitted or remaining <= 0 or (wait is not None and wait > remaining):
+                    return admitted
+                await asyncio.sleep(min(wait or POLL_INTERVAL, remaining, POLL_INTERVAL))
+        finally:
+            self._leave(key, ticket, admitted)
+
+    def throttle(self, host: str, api_key: str, seconds: Optional[float] = None) -> None:
+        """Pauses the budget after upstream answered 429."""
+        key = self._key(host, api_key)
+        with self._lock:
+            bucket = self._bucket(key)
+            self.throttled += 1
+        bucket.pause(self.cooldown if seconds is None else seconds)
+
+    def remember(self, host: str, endpoint: str, result: Dict[str, Any]) -> None:
+        """Keeps a successful response as the stale fallback for its endpoint."""
+        with self._lock:
+            self._stale[(host, endpoint)] = result
+            self._stale.move_to_end((host, endpoint))
+            while len(self._stale) > self.stale_size:
+                self._stale.popitem(last=False)
+
+    def stale(self, host: str, endpoint: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            result = self._stale.get((host, endpoint))
+            if result is not None:
+                self.stale_served += 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            buckets = dict(self._buckets)
+            waiting = sum(len(q) for q in self._waiters.values())
+            counters = {"admitted": self.admitted, "rejected": self.rejected,
+                        "stale_served": self.stale_served, "throttled": self.throttled}
+        return {"rate": self.rate, "burst": self.burst, "waiting": waiting,
+                "shared": bool(self.state_path), **counters,
+                "tokens": {key.split(":")[0]: bucket.level() for key, bucket in buckets.items()}}
@@ -0,0 +1,164 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, NamedTuple, Optional, Set, Tuple
+from backend.utils import fast_json
+
+
+class CachedPayload(NamedTuple):
+    body: bytes
+    mimetype: str
+    etag: str
+    stored_at: float  # wall clock, for Last-Modified and Age
+
+    @property
+    def age(self) -> float:
+        return max(time.time() - self.stored_at, 0.0)
+
+
+def is_cacheable(status: int, mimetype: str, body: bytes) -> bool:
+    """Only successful JSON payloads that are neither errors nor stale fallbacks are kept."""
+    if status != 200 or mimetype != "application/json":
+        return False
+    try:
+        data = fast_json.loads(body)
+    except ValueError:
+        return False
+    if isinstance(data, dict):
+        return not (data.get("error") or data.get("errors") or data.get("stale")
+                    or data.get("status") == "error")
+    return True
+
+
+class ResponseCache:
+    """
+    Last good payload per public URL (path and query string), with a strong
+    ETag from its SHA-256. Entries past their freshness are served while one
+    background refresh per URL runs on a small dedicated pool.
+    """
+
+    def __init__(self, max_entries: int = 512, refresh_workers: int = 4):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CachedPayload]" = OrderedDict()
+        self._refreshing: Set[str] = set()
+        self._lock = threading.Lock()
+        self.refresh_workers = refresh_workers
+        self._executor = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="swr-refresh")
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def get(self, key: str) -> Optional[CachedPayload]:
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+            return payload
+
+    def store(self, key: str, status: int, mimetype: str, body: bytes,
+              stored_at: Optional[float] = None) -> Optional[CachedPayload]:
+        """
+        Keeps the payload if cacheable and returns it; returns None otherwise.
+        `stored_at` backdates a payload rendered elsewhere (a warm snapshot).
+        """
+        if not is_cacheable(status, mimetype, body):
+            return None
+        payload = CachedPayload(body, mimetype, hashlib.sha256(body).hexdigest()[:32],
+                                time.time() if stored_at is None else stored_at)
+        with self._lock:
+            self._entries[key] = payload
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return payload
+
+    def touch(self, key: str) -> Optional[CachedPayload]:
+        """Marks an entry as just stored, for payloads known not to have changed since."""
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                payload = self._entries[key] = payload._replace(stored_at=time.time())
+            return payload
+
+    def lookup(self, key: str, max_age: float, swr: float) -> Tuple[Optional[CachedPayload], bool]:
+        """
+        Returns (payload, needs_refresh). The payload is None when there is nothing
+        servable; needs_refresh is True for the one caller that should revalidate it.
+        """
+        payload = self.get(key)
+        if payload is None or payload.age >= max_age + swr:
+            with self._lock:
+                self.misses += 1
+            return None, False
+        if payload.age < max_age:
+            with self._lock:
+                self.hits += 1
+            return payload, False
+        with self._lock:
+            self.stale_hits += 1
+            if key in self._refreshing:
+                return payload, False
+            self._refreshing.add(key)
+            self.refreshes += 1
+        return payload, True
+
+    def refresh_done(self, key: str) -> None:
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def submit(self, fn: Callable[[], None]) -> None:
+        self._executor.submit(fn)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+    def discard(self) -> None:
+        """
+        Replaces the refresh pool and locks in a forked child: the inherited pool's
+        threads only ran in the parent, and refreshes it had in flight never finish.
+        """
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.refresh_workers, thread_name_prefix="swr-refresh")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "stale_hits": self.stale_hits,
+                    "misses": self.misses, "refreshes": self.refreshes}
+
+
+class CompressedCache:
+    """
+    Compressed bodies keyed by (ETag, encoding). Responses with a strong ETag
+    from the response cache repeat byte for byte, so they are compressed once.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, etag: str, encoding: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._entries.get((etag, encoding))
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((etag, encoding))
+            self.hits += 1
+            return data
+
+    def set(self, etag: str, encoding: str, data: bytes) -> None:
+        with self._lock:
+            self._entries[(etag, encoding)] = data
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,23 @@
+from typing import Any, Dict, Iterable, List, Sequence
+
+# Fields each payload type keeps, in output order. Upstream objects carry many
+# more (pre/post-market prices, exchange hours, time zone, Google ids) that no
+# client reads; everything not listed is dropped before caching or serializing.
+QUOTE_FIELDS = ("symbol", "name", "type", "price", "open", "high", "low", "volume", "previous_close",
+                "change", "change_percent", "currency", "exchange", "last_update_utc")
+SEARCH_FIELDS = ("symbol", "name", "type", "exchange", "price", "change", "change_percent")
+HOLDING_FIELDS = ("id", "portfolio_id", "symbol", "quantity", "purchase_price", "created_at")
+
+
+def project(item: Dict[str, Any], fields: Sequence[str]) -> Dict[str, Any]:
+    """Copies only `fields` (those present) from `item`."""
+    return {f: item[f] for f in fields if f in item}
+
+
+def project_all(items: Iterable[Any], fields: Sequence[str]) -> List[Dict[str, Any]]:
+    return [project(item, fields) for item in items if isinstance(item, dict)]
+
+
+def select_columns(fields: Sequence[str]) -> str:
+    """PostgREST column list for a schema, so Supabase only sends what is returned."""
+    return ", ".join(fields)
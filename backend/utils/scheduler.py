@@ -0,0 +1,236 @@
+import hashlib
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+from backend.utils.market_hours import is_market_open, seconds_until_open
+from backend.utils.response_cache import ResponseCache
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows: every process warms on its own
+    fcntl = None
+
+
+class WarmJob(NamedTuple):
+    name: str
+    path: str  # path and query string, exactly as clients request it
+    market_hours: bool  # follows NSE hours; otherwise refreshed at the open-market rate all day
+
+    @property
+    def key(self) -> str:
+        """The response cache key: request.full_path, which keeps the "?" even without a query."""
+        return self.path if "?" in self.path else self.path + "?"
+
+
+class LeaderLock:
+    """
+    Non-blocking exclusive flock on a local file. At most one process on the host
+    holds it; the kernel releases it when the holder exits, so another worker
+    takes over on its next attempt.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file: Optional[Any] = None
+
+    @property
+    def held(self) -> bool:
+        return self._file is not None
+
+    def try_acquire(self) -> bool:
+        if self._file is not None:
+            return True
+        if fcntl is None:
+            self._file = True
+            return True
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        f = open(self.path, "a+")
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        f.truncate(0)
+        f.write(f"{os.getpid()}\n")
+        f.flush()
+        self._file = f
+        return True
+
+    def release(self) -> None:
+        if self._file is not None and fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+        self._file = None
+
+    def discard(self) -> None:
+        """
+        Forgets a handle inherited across fork without unlocking it: the flock is
+        on the open file shared with the parent, so LOCK_UN would release the
+        parent's lock, while closing the child's descriptor leaves it held.
+        """
+        if self._file is not None and fcntl is not None:
+            self._file.close()
+        self._file = None
+
+
+class MarketScheduler:
+    """
+    Keeps the response cache warm for the public market datasets, so the first
+    visitor after a quiet spell does not wait on RapidAPI. The process holding
+    `lock_path` renders each job every `open_interval` seconds while NSE is open
+    and every `closed_interval` seconds otherwise, plus once at the open. After
+    the close, market-bound entries are re-stamped between fetches instead of
+    re-fetched, since prices do not move. The leader also writes every payload
+    to `snapshot_dir`; other workers load new snapshots into their own caches.
+    """
+
+    def __init__(self, render: Callable[[str], Tuple[int, str, bytes]], cache: ResponseCache,
+                 jobs: List[WarmJob], lock_path: str, snapshot_dir: str, open_interval: float = 30.0,
+                 closed_interval: float = 1800.0, tick: float = 5.0,
+                 market_open: Callable[[], bool] = is_market_open):
+        self.render = render
+        self.cache = cache
+        self.jobs = jobs
+        self.lock = LeaderLock(lock_path)
+        self.snapshot_dir = snapshot_dir
+        self.open_interval = open_interval
+        self.closed_interval = closed_interval
+        self.tick_interval = tick
+        self.market_open = market_open
+        self._next_run: Dict[str, float] = {}
+        self._loaded: Dict[str, float] = {}  # snapshot file -> mtime loaded
+        self._was_open: Optional[bool] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self.refreshes = 0
+        self.failures = 0
+        self.snapshots_loaded = 0
+
+    def start(self) -> None:
+        """Starts the scheduler thread once; called concurrently by the first requests of a worker."""
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+            self._thread = threading.Thread(target=self._run, name="market-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.tick_interval)
+        self.lock.release()
+
+    def discard(self) -> None:
+        """Forgets the parent's thread and lock in a forked child, so start() runs a fresh one."""
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self.lock.discard()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"Market scheduler tick failed: {e}")
+            self._stop.wait(self.tick_interval)
+
+    def tick(self) -> None:
+        market_open = self.market_open()
+        was_leader = self.lock.held
+        if not self.lock.try_acquire():
+            self._load_snapshots()
+        else:
+            if not was_leader:
+                # Pick up where the previous leader left off rather than refetching everything
+                self._load_snapshots()
+            now = time.time()
+            for job in self.jobs:
+                opened = job.market_hours and market_open and self._was_open is False
+                if opened or now >= self._next_run.get(job.name, 0.0):
+                    self._refresh(job, market_open)
+                elif job.market_hours and not market_open:
+                    self._hold(job)
+        self._was_open = market_open
+
+    def _interval(self, job: WarmJob, market_open: bool) -> float:
+        if market_open or not job.market_hours:
+            return self.open_interval
+        return min(self.closed_interval, seconds_until_open())
+
+    def _refresh(self, job: WarmJob, market_open: bool) -> None:
+        self._next_run[job.name] = time.time() + self._interval(job, market_open)
+        try:
+            status, mimetype, body = self.render(job.path)
+        except Exception as e:
+            self.failures += 1
+            print(f"Warming {job.name} failed: {e}")
+            return
+        payload = self.cache.store(job.key, status, mimetype, body)
+        if payload is None:
+            # Error or stale fallback: keep serving the previous payload and retry sooner
+            self.failures += 1
+            self._next_run[job.name] = time.time() + self.open_interval
+            return
+        self.refreshes += 1
+        self._write_snapshot(job.key, payload.body, payload.stored_at)
+
+    def _hold(self, job: WarmJob) -> None:
+        payload = self.cache.touch(job.key)
+        if payload is not None:
+            path = self._snapshot_path(job.key)
+            if os.path.exists(path):
+                os.utime(path, (payload.stored_at, payload.stored_at))
+                self._loaded[os.path.basename(path)] = payload.stored_at
+
+    def _snapshot_path(self, key: str) -> str:
+        return os.path.join(self.snapshot_dir, hashlib.sha1(key.encode("utf-8")).hexdigest()[:16] + ".json")
+
+    def _write_snapshot(self, key: str, body: bytes, stored_at: float) -> None:
+        """Body file headed by its cache key; the mtime carries the payload's stored_at."""
+        path = self._snapshot_path(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(key.encode("utf-8") + b"\n" + body)
+            os.utime(tmp, (stored_at, stored_at))
+            os.replace(tmp, path)
+            self._loaded[os.path.basename(path)] = stored_at
+        except OSError as e:
+            print(f"Could not write warm snapshot {path}: {e}")
+
+    def _load_snapshots(self) -> None:
+        try:
+            entries = [e for e in os.scandir(self.snapshot_dir) if e.name.endswith(".json")]
+        except FileNotFoundError:
+            return
+        for entry in entries:
+            try:
+                mtime = entry.stat().st_mtime
+                if self._loaded.get(entry.name) == mtime:
+                    continue
+                with open(entry.path, "rb") as f:
+                    key, _, body = f.read().partition(b"\n")
+            except OSError:
+                continue
+            key = key.decode("utf-8")
+            self._loaded[entry.name] = mtime
+            current = self.cache.get(key)
+            if current is None or current.stored_at < mtime:
+                if self.cache.store(key, 200, "application/json", body, stored_at=mtime) is not None:
+                    self.snapshots_loaded += 1
+            # A follower that becomes leader schedules from the snapshot's age
+            for job in self.jobs:
+                if job.key == key:
+                    self._next_run[job.name] = mtime + self._interval(job, self.market_open())
+
+    def stats(self) -> Dict[str, Any]:
+        return {"leader": self.lock.held, "market_open": self.market_open(),
+                "refreshes": self.refreshes, "failures": self.failures,
+                "snapshots_loaded": self.snapshots_loaded,
+                "next_run_in": {name: max(round(at - time.time(), 1), 0.0) for name, at in self._next_run.items()}}
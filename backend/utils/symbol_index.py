@@ -0,0 +1,164 @@
+import bisect
+import csv
+import re
+import threading
+from array import array
+from collections import defaultdict
+from difflib import SequenceMatcher
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+# Match tiers, best first; fuzzy matches score below every prefix tier.
+EXACT_TICKER, TICKER_PREFIX, NAME_PREFIX, WORD_PREFIX = 4.0, 3.0, 2.0, 1.5
+# Trigram candidates re-scored by edit similarity
+FUZZY_CANDIDATES = 50
+# Shorter queries prefix-match too many entries to answer locally, bar an exact ticker
+CONFIDENT_MIN_LENGTH = 3
+
+
+def normalize(text: str) -> str:
+    return _NON_ALNUM.sub(" ", (text or "").lower()).strip()
+
+
+def trigrams(text: str) -> List[str]:
+    padded = f"  {text} "
+    return sorted({padded[i:i + 3] for i in range(len(padded) - 2)})
+
+
+class SymbolIndex:
+    """
+    In-memory autocomplete index over tickers and company names.
+
+    Prefix lookups bisect a sorted key array (ticker, full name and every name
+    suffix starting at a word boundary) with entry ids in a parallel int array.
+    Typo-tolerant lookups take candidates from a trigram inverted index and
+    score them by the better of trigram coverage and edit similarity to the
+    ticker or a name word run cut to the query's length, so one swapped or
+    missing letter still scores high.
+    New entries are buffered and folded in by a rebuild on the next search.
+    """
+
+    def __init__(self, min_score: float = 0.5, confident_score: float = 0.8):
+        self.min_score = min_score
+        self.confident_score = confident_score
+        self._entries: List[Dict[str, str]] = []
+        self._by_symbol: Dict[str, int] = {}
+        self._keys: List[str] = []
+        self._key_ids = array("i")
+        self._key_tiers = array("b")
+        self._grams: Dict[str, array] = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def load_csv(self, path: str) -> int:
+        with open(path, newline="", encoding="utf-8") as f:
+            return self.add(csv.DictReader(f))
+
+    def add(self, items: Iterable[Dict[str, Any]]) -> int:
+        """Adds or updates entries (dicts with symbol, name, exchange, type). Returns new entries."""
+        added = 0
+        with self._lock:
+            for item in items:
+                symbol = (item.get("symbol") or "").strip().upper()
+                if not symbol:
+                    continue
+                entry = {"symbol": symbol, "name": item.get("name") or symbol,
+                         "exchange": item.get("exchange") or symbol.partition(":")[2],
+                         "type": item.get("type") or "stock"}
+                if symbol in self._by_symbol:
+                    self._entries[self._by_symbol[symbol]] = entry
+                else:
+                    self._by_symbol[symbol] = len(self._entries)
+                    self._entries.append(entry)
+                    added += 1
+                self._dirty = True
+        return added
+
+    def _rebuild(self) -> None:
+        keyed: List[Tuple[str, int, int]] = []
+        grams: Dict[str, List[int]] = defaultdict(list)
+        for i, entry in enumerate(self._entries):
+            ticker = normalize(entry["symbol"].partition(":")[0])
+            name = normalize(entry["name"])
+            keyed.append((ticker, i, 1))
+            words = name.split()
+            for w in range(len(words)):
+                keyed.append((" ".join(words[w:]), i, 2 if w == 0 else 3))
+            for g in set(trigrams(ticker)) | set(trigrams(name)):
+                grams[g].append(i)
+        keyed.sort()
+        self._keys = [k for k, _, _ in keyed]
+        self._key_ids = array("i", (i for _, i, _ in keyed))
+        self._key_tiers = array("b", (t for _, _, t in keyed))
+        self._grams = {g: array("i", ids) for g, ids in grams.items()}
+        self._dirty = False
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Returns up to `limit` entries ranked best-first, each with a `score`."""
+        q = normalize(query)
+        if not q:
+            return []
+        with self._lock:
+            if self._dirty:
+                self._rebuild()
+            keys, key_ids, key_tiers = self._keys, self._key_ids, self._key_tiers
+            grams, entries = self._grams, self._entries
+
+        scores: Dict[int, float] = {}
+        # Prefix matches: every key in [q, q + max char) shares the prefix
+        lo = bisect.bisect_left(keys, q)
+        hi = bisect.bisect_left(keys, q + "\x7f", lo)
+        for pos in range(lo, min(hi, lo + 200)):
+            i, tier = key_ids[pos], key_tiers[pos]
+            if tier == 1:
+                score = EXACT_TICKER if keys[pos] == q else TICKER_PREFIX
+            else:
+                score = NAME_PREFIX if tier == 2 else WORD_PREFIX
+            if score > scores.get(i, 0.0):
+                scores[i] = score
+
+        # Trigram overlap for typos, only if prefixes did not fill the page
+        if len(scores) < limit:
+            q_grams = trigrams(q)
+            shared: Dict[int, int] = defaultdict(int)
+            for g in q_grams:
+                for i in grams.get(g, ()):
+                    shared[i] += 1
+            candidates = sorted(((n / len(q_grams), i) for i, n in shared.items() if i not in scores),
+                                reverse=True)[:FUZZY_CANDIDATES]
+            for coverage, i in candidates:
+                score = max(coverage, self._similarity(q, entries[i]))
+                if score >= self.min_score:
+                    scores[i] = score
+
+        best = sorted(scores.items(), key=lambda kv: (
+            -kv[1], entries[kv[0]]["exchange"] != "NSE", entries[kv[0]]["symbol"]))[:limit]
+        return [dict(entries[i], score=round(score, 3)) for i, score in best]
+
+    @staticmethod
+    def _similarity(q: str, entry: Dict[str, str]) -> float:
+        ticker = normalize(entry["symbol"].partition(":")[0])
+        words = normalize(entry["name"]).split()
+        targets = [ticker] + [" ".join(words[w:]) for w in range(len(words))]
+        return max(SequenceMatcher(None, q, t[:len(q)]).ratio() for t in targets)
+
+    def is_confident(self, query: str, results: List[Dict[str, Any]]) -> bool:
+        """
+        An exact ticker match, or a top score of at least confident_score for a
+        query of CONFIDENT_MIN_LENGTH or more characters.
+        """
+        if not results:
+            return False
+        if results[0]["score"] >= EXACT_TICKER:
+            return True
+        return (len(normalize(query).replace(" ", "")) >= CONFIDENT_MIN_LENGTH
+                and results[0]["score"] >= self.confident_score)
+
+    def lookup(self, query: str, limit: int = 10) -> Optional[List[Dict[str, Any]]]:
+        """Returns results when the index has a confident match, else None."""
+        results = self.search(query, limit)
+        return results if self.is_confident(query, results) else None
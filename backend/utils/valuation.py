@@ -0,0 +1,88 @@
+from typing import Any, Dict, List, Mapping
+import numpy as np
+
+
+def value_holdings(holdings: List[Dict[str, Any]], quotes: Mapping[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Computes market value, cost basis, P&L and weights for every holding in one
+    vectorized pass. `quotes` maps upper-cased symbol to its quote; holdings
+    without a quote are valued at their purchase price, as the dashboard does.
+    """
+    if not holdings:
+        return {"holdings": [], "totals": {"market_value": 0.0, "cost_basis": 0.0, "pnl": 0.0,
+                                           "pnl_percent": 0.0, "day_change": 0.0, "count": 0}}
+
+    n = len(holdings)
+    quantity = np.fromiter((float(h["quantity"]) for h in holdings), dtype=np.float64, count=n)
+    cost = np.fromiter((float(h["purchase_price"]) for h in holdings), dtype=np.float64, count=n)
+    symbols = [h["symbol"].upper() for h in holdings]
+
+    # Look each distinct symbol up once, then broadcast back to the lots
+    unique, inverse = np.unique(np.array(symbols, dtype=object), return_inverse=True)
+    unique_quotes = [quotes.get(s) or {} for s in unique]
+    unique_price = np.array([q.get("price") or np.nan for q in unique_quotes], dtype=np.float64)
+    unique_change = np.array([q.get("change") or 0.0 for q in unique_quotes], dtype=np.float64)
+    has_quote = ~np.isnan(unique_price)[inverse]
+    price = np.where(has_quote, unique_price[inverse], cost)
+
+    market_value = quantity * price
+    cost_basis = quantity * cost
+    pnl = market_value - cost_basis
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pnl_percent = np.where(cost_basis > 0, pnl / cost_basis * 100.0, 0.0)
+    total_value = float(market_value.sum())
+    total_cost = float(cost_basis.sum())
+    weight = market_value / total_value * 100.0 if total_value else np.zeros(n)
+    day_change = quantity * np.where(has_quote, unique_change[inverse], 0.0)
+
+    columns = zip(market_value.round(2).tolist(), cost_basis.round(2).tolist(), pnl.round(2).tolist(),
+                  pnl_percent.round(2).tolist(), weight.round(2).tolist(), price.tolist(),
+                  has_quote.tolist())
+    rows = []
+    for h, symbol, (mv, cb, p, pp, w, px, quoted) in zip(holdings, symbols, columns):
+        rows.append({
+            "id": h.get("id"),
+            "symbol": symbol,
+            "name": (quotes.get(symbol) or {}).get("name") or symbol,
+            "quantity": float(h["quantity"]),
+            "purchase_price": float(h["purchase_price"]),
+            "current_price": px,
+            "market_value": mv,
+            "cost_basis": cb,
+            "pnl": p,
+            "pnl_percent": pp,
+            "weight": w,
+            "has_quote": quoted,
+        })
+
+    total_pnl = total_value - total_cost
+    return {
+        "holdings": rows,
+        "totals": {
+            "market_value": round(total_value, 2),
+            "cost_basis": round(total_cost, 2),
+            "pnl": round(total_pnl, 2),
+            "pnl_percent": round(total_pnl / total_cost * 100.0, 2) if total_cost else 0.0,
+            "day_change": round(float(day_change.sum()), 2),
+            "count": n,
+        },
+    }
+
+
+def value_portfolios(portfolios: List[Dict[str, Any]], quotes: Mapping[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Values each portfolio (dicts with a `holdings` list) against one shared
+    quote map and sums the per-portfolio totals into a net-worth total.
+    """
+    valued = []
+    for portfolio in portfolios:
+        holdings = portfolio.get("holdings") or []
+        valued.append({**portfolio, **value_holdings(holdings, quotes), "holdings_count": len(holdings)})
+
+    keys = ("market_value", "cost_basis", "pnl", "day_change")
+    sums = {k: sum(p["totals"][k] for p in valued) for k in keys}
+    totals = {k: round(v, 2) for k, v in sums.items()}
+    totals["pnl_percent"] = round(sums["pnl"] / sums["cost_basis"] * 100.0, 2) if sums["cost_basis"] else 0.0
+    totals["count"] = sum(p["totals"]["count"] for p in valued)
+    totals["portfolios"] = len(valued)
+    return {"portfolios": valued, "totals": totals}
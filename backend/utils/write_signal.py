@@ -0,0 +1,53 @@
+import hashlib
+import os
+from typing import Optional
+
+
+class WriteSignals:
+    """
+    Per-key write counts shared by the worker processes of a host. Each write
+    appends one byte to the key's file in `directory`, so the file's size is
+    the key's version. A cache entry remembers the version it was loaded at and
+    is stale once the file has grown past it, at the cost of one stat per read.
+    Without a directory every version is 0 and writes are not announced.
+    """
+
+    def __init__(self, directory: Optional[str], name: str = "cache"):
+        self.directory = directory
+        self.name = name
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha1(key.encode("utf-8")).hexdigest()[:20])
+
+    def version(self, key: str) -> int:
+        """The number of writes to `key` by any process; -1 if it cannot be read."""
+        if not self.directory:
+            return 0
+        try:
+            return os.stat(self._path(key)).st_size
+        except FileNotFoundError:
+            return 0
+        except OSError as e:
+            print(f"Could not read {self.name} signal: {e}")
+            return -1  # matches no entry, so nothing that could be stale is served
+
+    def signal(self, key: str) -> Optional[int]:
+        """
+        Announces a write to other processes and returns the key's version
+        including it: None without a directory, -1 if the signal failed.
+        """
+        if not self.directory:
+            return None
+        try:
+            fd = os.open(self._path(key), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, b".")
+                # O_APPEND writes are atomic, so the offset is where this write's byte ended
+                return os.lseek(fd, 0, os.SEEK_CUR)
+            finally:
+                os.close(fd)
+        except OSError as e:
+            print(f"Could not signal {self.name} write: {e}")
+            return -1
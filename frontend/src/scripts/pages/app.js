@@ -15,6 +15,7 @@ const App = {
     timers: {
         autoRefresh: null,
         marketStatus: null,
+        quoteStream: null,
         lastActivity: Date.now()
     },
     isInitialized: false,
@@ -26,7 +27,7 @@ const App = {
         portfolios: { data: [], lastUpdated: null },
         currentPortfolio: null,
         marketData: { trends: null, popular: null, lastUpdated: null },
-        newsData: { items: [], offset: 0, hasMore: true, lastUpdated: null },
+        newsData: { items: [], offset: 0, cursor: null, hasMore: true, lastUpdated: null },
         searchCache: new Map(),
         isOnline: navigator.onLine,
         stockSelectionModal: {
@@ -97,9 +98,11 @@ const App = {
         if (this.loadingStates.has('market-data') || (!force && !this.isDataStale(this.state.marketData.lastUpdated))) return;
         this.loadingStates.add('market-data');
         try {
+            // Popular stock prices arrive over the quote stream while it is open
+            const streaming = this.timers.quoteStream?.readyState === EventSource.OPEN;
             const [trends, popular] = await Promise.all([
                 this.apiCall('/market-trends'),
-                this.apiCall('/popular-stocks')
+                streaming ? this.state.marketData.popular : this.apiCall('/popular-stocks')
             ]);
             this.state.marketData = { trends, popular, lastUpdated: Date.now() };
             this.renderMarketData();
@@ -114,7 +117,7 @@ const App = {
         if (this.loadingStates.has('news-data')) return;
 
         if (reset) {
-            this.state.newsData = { items: [], offset: 0, hasMore: true, lastUpdated: null };
+            this.state.newsData = { items: [], offset: 0, cursor: null, hasMore: true, lastUpdated: null };
         }
 
         if (buttonEl) {
@@ -124,7 +127,9 @@ const App = {
 
         this.loadingStates.add('news-data');
         try {
-            const result = await this.apiCall(`/business-news?limit=${this.config.newsLimit}&offset=${this.state.newsData.offset}`);
+            const { cursor } = this.state.newsData;
+            const pageParam = cursor ? `cursor=${encodeURIComponent(cursor)}` : `offset=${this.state.newsData.offset}`;
+            const result = await this.apiCall(`/business-news?limit=${this.config.newsLimit}&${pageParam}`);
 
             if (result?.status === 'OK' && result.data?.length > 0) {
                 const existingUrls = new Set(this.state.newsData.items.map(item => item.article_url));
@@ -140,6 +145,7 @@ const App = {
 
                 this.state.newsData.hasMore = result.has_more || false;
                 this.state.newsData.offset = this.state.newsData.items.length;
+                this.state.newsData.cursor = result.next_cursor || null;
                 this.state.newsData.lastUpdated = Date.now();
             } else {
                 this.state.newsData.hasMore = false;
@@ -162,10 +168,37 @@ const App = {
                 this.refreshMarketData();
             }
         }, this.config.autoRefreshInterval);
+        this.startQuoteStream();
     },
 
     stopAutoRefresh() {
         clearInterval(this.timers.autoRefresh);
+        this.stopQuoteStream();
+    },
+
+    startQuoteStream() {
+        const stocks = this.state.marketData.popular?.data;
+        if (this.timers.quoteStream || !window.EventSource || !stocks?.length) return;
+
+        const symbols = stocks.map(stock => stock.symbol).join(',');
+        const stream = new EventSource(`${this.config.backendUrl}/stream/quotes?symbols=${encodeURIComponent(symbols)}`);
+        stream.addEventListener('quotes', (event) => {
+            const updates = new Map(JSON.parse(event.data).map(quote => [quote.symbol, quote]));
+            const popular = this.state.marketData.popular;
+            if (!popular?.data) return;
+            popular.data = popular.data.map(stock => updates.get(stock.symbol) || stock);
+            this.renderPopularStocks(popular.data);
+        });
+        stream.onerror = () => {
+            // The browser retries on its own; a refused stream (e.g. 503) closes for good and polling takes over
+            if (stream.readyState === EventSource.CLOSED) this.timers.quoteStream = null;
+        };
+        this.timers.quoteStream = stream;
+    },
+
+    stopQuoteStream() {
+        this.timers.quoteStream?.close();
+        this.timers.quoteStream = null;
     },
 
     startMarketStatusClock() {
@@ -410,9 +443,10 @@ const App = {
         if (this.loadingStates.has('portfolios')) return;
         
         this.loadingStates.add('portfolios');
-        const portfolios = await this.apiCall('/portfolios');
-        if (portfolios) {
-            this.state.portfolios = { data: portfolios, lastUpdated: Date.now() };
+        // One call returns every portfolio with valued holdings and net-worth totals
+        const dashboard = await this.apiCall('/dashboard');
+        if (dashboard) {
+            this.state.portfolios = { data: dashboard.portfolios, totals: dashboard.totals, lastUpdated: Date.now() };
             this.renderPortfolioList();
         }
         this.loadingStates.delete('portfolios');
@@ -472,7 +506,7 @@ const App = {
         }
     },
 
-    async getPortfolioDetails(id) {
+    async getPortfolioDetails(id, refresh = false) {
         this.showView('portfolio-detail-view');
         this.showLoading(true);
 
@@ -483,19 +517,14 @@ const App = {
             return;
         }
 
-        const holdings = await this.apiCall(`/holdings/${id}`);
-        this.state.currentPortfolio = { ...portfolio, holdings: [] };
-
-        if (holdings?.length > 0) {
-            const symbols = holdings.map(h => h.symbol).join(',');
-            const quotes = await this.apiCall(`/quote?symbols=${encodeURIComponent(symbols)}`);
-            const quotesData = Array.isArray(quotes?.data) ? quotes.data : (quotes?.data ? [quotes.data] : []);
-            
-            this.state.currentPortfolio.holdings = holdings.map(h => ({
-                ...h,
-                quote: quotesData.find(q => q && q.symbol === h.symbol) || {}
-            }));
-        }
+        // Reuse the dashboard's valuation unless it is stale or holdings just changed
+        const fresh = !refresh && portfolio.totals && !this.isDataStale(this.state.portfolios.lastUpdated);
+        const valuation = fresh ? portfolio : await this.apiCall(`/portfolios/${id}/valuation`);
+        this.state.currentPortfolio = {
+            ...portfolio,
+            holdings: valuation?.holdings || [],
+            totals: valuation?.totals || null
+        };
 
         this.renderPortfolioDetail();
         this.showLoading(false);
@@ -506,7 +535,8 @@ const App = {
 
         const result = await this.apiCall(`/holdings/${id}`, { method: 'DELETE' });
         if (result && this.state.currentPortfolio) {
-            await this.getPortfolioDetails(this.state.currentPortfolio.id);
+            await this.getPortfolioDetails(this.state.currentPortfolio.id, true);
+            this.state.portfolios.lastUpdated = null;
             this.showNotification('Holding removed successfully.', 'success');
         }
     },
@@ -627,7 +657,7 @@ const App = {
 
         if (newHolding) {
             this.hideModal('stock-selection-modal');
-            await this.getPortfolioDetails(targetPortfolioId);
+            await this.getPortfolioDetails(targetPortfolioId, true);
             await this.getPortfolios(); 
             this.showNotification('Stock added successfully!', 'success');
         }
@@ -893,6 +923,10 @@ const App = {
                             <label>Holdings</label>
                             <div class="value">${p.holdings_count !== undefined ? p.holdings_count : 0}</div>
                         </div>
+                        <div class="stat">
+                            <label>Value</label>
+                            <div class="value">${this.formatCurrency(p.totals?.market_value || 0)}</div>
+                        </div>
                     </div>
                 </div>
             `).join('');
@@ -913,16 +947,11 @@ const App = {
         const detailView = document.getElementById('portfolio-detail-view');
         if (!detailView || !this.state.currentPortfolio) return;
 
-        const { id, name, holdings } = this.state.currentPortfolio;
-        let totalInvestment = 0, currentValue = 0;
-
-        holdings?.forEach(h => {
-            totalInvestment += h.purchase_price * h.quantity;
-            currentValue += (h.quote?.price || h.purchase_price) * h.quantity;
-        });
-
-        const totalGainLoss = currentValue - totalInvestment;
-        const totalGainLossPercent = totalInvestment > 0 ? (totalGainLoss / totalInvestment) * 100 : 0;
+        const { id, name, holdings, totals } = this.state.currentPortfolio;
+        const currentValue = totals?.market_value || 0;
+        const totalInvestment = totals?.cost_basis || 0;
+        const totalGainLoss = totals?.pnl || 0;
+        const totalGainLossPercent = totals?.pnl_percent || 0;
 
         detailView.innerHTML = `
             <div class="portfolio-detail-header">
@@ -1020,18 +1049,19 @@ const App = {
     },
 
     createHoldingRowHTML(holding) {
-        const { quote, quantity, purchase_price } = holding;
-        const currentPrice = quote?.price || purchase_price;
-        const currentValue = currentPrice * quantity;
-        const totalCost = purchase_price * quantity;
-        const gainLoss = currentValue - totalCost;
-        const gainLossPercent = totalCost > 0 ? (gainLoss / totalCost) * 100 : 0;
+        const {
+            name, quantity, purchase_price,
+            current_price: currentPrice,
+            market_value: currentValue,
+            pnl: gainLoss,
+            pnl_percent: gainLossPercent
+        } = holding;
         const isPositive = gainLoss >= 0;
 
         return `
             <div class="holding-row">
                 <div data-label="Stock">
-                    <div class="stock-name">${quote?.name || holding.symbol}</div>
+                    <div class="stock-name">${name || holding.symbol}</div>
                     <div class="stock-symbol">${holding.symbol}</div>
                 </div>
                 <div data-label="Quantity">${quantity.toLocaleString()}</div>
@@ -0,0 +1,188 @@
+-- Migration for databases created from an earlier supabase_setup.sql:
+-- adds the ownership/lookup indexes, the trigger-maintained
+-- portfolio_summaries table (backfilled from existing holdings) and rewrites
+-- the RLS policies so auth.uid() is evaluated once per statement.
+-- Safe to re-run. Fresh installs get all of this from supabase_setup.sql.
+
+BEGIN;
+
+CREATE INDEX IF NOT EXISTS portfolios_user_id_idx ON portfolios (user_id);
+CREATE INDEX IF NOT EXISTS holdings_portfolio_id_idx ON holdings (portfolio_id, symbol);
+
+CREATE TABLE IF NOT EXISTS portfolio_summaries (
+  portfolio_id UUID PRIMARY KEY REFERENCES portfolios(id) ON DELETE CASCADE,
+  holdings_count INTEGER NOT NULL DEFAULT 0,
+  total_quantity DECIMAL NOT NULL DEFAULT 0,
+  total_cost DECIMAL NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE OR REPLACE FUNCTION create_portfolio_summary()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  INSERT INTO portfolio_summaries (portfolio_id)
+  SELECT id FROM new_rows
+  ON CONFLICT (portfolio_id) DO NOTHING;
+  RETURN NULL;
+END;
+$$;
+
+-- Statement-level triggers with transition tables: a multi-row insert from the
+-- bulk import touches each summary row once, not once per holding.
+CREATE OR REPLACE FUNCTION holdings_summary_after_insert()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  UPDATE portfolio_summaries s
+  SET holdings_count = s.holdings_count + d.n,
+      total_quantity = s.total_quantity + d.qty,
+      total_cost = s.total_cost + d.cost,
+      updated_at = NOW()
+  FROM (
+    SELECT portfolio_id, COUNT(*) AS n, SUM(quantity) AS qty,
+           SUM(quantity * purchase_price) AS cost
+    FROM new_rows
+    GROUP BY portfolio_id
+  ) d
+  WHERE s.portfolio_id = d.portfolio_id;
+  RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION holdings_summary_after_delete()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  UPDATE portfolio_summaries s
+  SET holdings_count = s.holdings_count - d.n,
+      total_quantity = s.total_quantity - d.qty,
+      total_cost = s.total_cost - d.cost,
+      updated_at = NOW()
+  FROM (
+    SELECT portfolio_id, COUNT(*) AS n, SUM(quantity) AS qty,
+           SUM(quantity * purchase_price) AS cost
+    FROM old_rows
+    GROUP BY portfolio_id
+  ) d
+  WHERE s.portfolio_id = d.portfolio_id;
+  RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION holdings_summary_after_update()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  UPDATE portfolio_summaries s
+  SET holdings_count = s.holdings_count + d.n,
+      total_quantity = s.total_quantity + d.qty,
+      total_cost = s.total_cost + d.cost,
+      updated_at = NOW()
+  FROM (
+    SELECT portfolio_id, SUM(n) AS n, SUM(qty) AS qty, SUM(cost) AS cost
+    FROM (
+      SELECT portfolio_id, 1 AS n, quantity AS qty, quantity * purchase_price AS cost
+      FROM new_rows
+      UNION ALL
+      SELECT portfolio_id, -1, -quantity, -(quantity * purchase_price)
+      FROM old_rows
+    ) changes
+    GROUP BY portfolio_id
+  ) d
+  WHERE s.portfolio_id = d.portfolio_id;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS portfolios_create_summary ON portfolios;
+DROP TRIGGER IF EXISTS holdings_summary_insert ON holdings;
+DROP TRIGGER IF EXISTS holdings_summary_update ON holdings;
+DROP TRIGGER IF EXISTS holdings_summary_delete ON holdings;
+
+CREATE TRIGGER portfolios_create_summary
+AFTER INSERT ON portfolios
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION create_portfolio_summary();
+
+CREATE TRIGGER holdings_summary_insert
+AFTER INSERT ON holdings
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION holdings_summary_after_insert();
+
+CREATE TRIGGER holdings_summary_update
+AFTER UPDATE ON holdings
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION holdings_summary_after_update();
+
+CREATE TRIGGER holdings_summary_delete
+AFTER DELETE ON holdings
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION holdings_summary_after_delete();
+
+-- Backfill (holdings are locked so no write slips between backfill and triggers)
+LOCK TABLE holdings IN SHARE ROW EXCLUSIVE MODE;
+
+INSERT INTO portfolio_summaries (portfolio_id, holdings_count, total_quantity, total_cost)
+SELECT p.id, COUNT(h.id), COALESCE(SUM(h.quantity), 0),
+       COALESCE(SUM(h.quantity * h.purchase_price), 0)
+FROM portfolios p
+LEFT JOIN holdings h ON h.portfolio_id = p.id
+GROUP BY p.id
+ON CONFLICT (portfolio_id) DO UPDATE
+SET holdings_count = EXCLUDED.holdings_count,
+    total_quantity = EXCLUDED.total_quantity,
+    total_cost = EXCLUDED.total_cost,
+    updated_at = NOW();
+
+ALTER TABLE portfolio_summaries ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Users can view own portfolio summaries" ON portfolio_summaries;
+CREATE POLICY "Users can view own portfolio summaries" ON portfolio_summaries
+FOR SELECT TO authenticated
+USING (
+  EXISTS (
+    SELECT 1 FROM portfolios
+    WHERE portfolios.id = portfolio_summaries.portfolio_id
+    AND portfolios.user_id = (SELECT auth.uid())
+  )
+);
+
+ALTER POLICY "Users can insert own portfolios" ON portfolios
+WITH CHECK ((SELECT auth.uid()) = user_id);
+ALTER POLICY "Users can view own portfolios" ON portfolios
+USING ((SELECT auth.uid()) = user_id);
+ALTER POLICY "Users can update own portfolios" ON portfolios
+USING ((SELECT auth.uid()) = user_id)
+WITH CHECK ((SELECT auth.uid()) = user_id);
+ALTER POLICY "Users can delete own portfolios" ON portfolios
+USING ((SELECT auth.uid()) = user_id);
+
+ALTER POLICY "Users can insert own holdings" ON holdings
+WITH CHECK (EXISTS (SELECT 1 FROM portfolios
+  WHERE portfolios.id = holdings.portfolio_id AND portfolios.user_id = (SELECT auth.uid())));
+ALTER POLICY "Users can view own holdings" ON holdings
+USING (EXISTS (SELECT 1 FROM portfolios
+  WHERE portfolios.id = holdings.portfolio_id AND portfolios.user_id = (SELECT auth.uid())));
+ALTER POLICY "Users can update own holdings" ON holdings
+USING (EXISTS (SELECT 1 FROM portfolios
+  WHERE portfolios.id = holdings.portfolio_id AND portfolios.user_id = (SELECT auth.uid())))
+WITH CHECK (EXISTS (SELECT 1 FROM portfolios
+  WHERE portfolios.id = holdings.portfolio_id AND portfolios.user_id = (SELECT auth.uid())));
+ALTER POLICY "Users can delete own holdings" ON holdings
+USING (EXISTS (SELECT 1 FROM portfolios
+  WHERE portfolios.id = holdings.portfolio_id AND portfolios.user_id = (SELECT auth.uid())));
+
+COMMIT;
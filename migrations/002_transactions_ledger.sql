@@ -0,0 +1,97 @@
+-- Migration for databases created before the transaction ledger: adds the
+-- transactions table, its RLS policies and the ownership-checked RPCs.
+-- Safe to re-run. Fresh installs get all of this from supabase_setup.sql.
+
+BEGIN;
+
+-- Trade history replayed by the ledger (backend/utils/ledger.py) into FIFO or
+-- average-cost lots. Rows are immutable: a wrong trade is deleted and re-entered.
+CREATE TABLE IF NOT EXISTS transactions (
+  id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+  portfolio_id UUID REFERENCES portfolios(id) ON DELETE CASCADE NOT NULL,
+  symbol TEXT NOT NULL,
+  side TEXT NOT NULL CHECK (side IN ('buy', 'sell')),
+  quantity DECIMAL NOT NULL CHECK (quantity > 0),
+  price DECIMAL NOT NULL CHECK (price >= 0),
+  fees DECIMAL NOT NULL DEFAULT 0 CHECK (fees >= 0),
+  traded_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Replay order: the ledger pages through a portfolio's trades by (traded_at, id)
+CREATE INDEX IF NOT EXISTS transactions_portfolio_traded_idx ON transactions (portfolio_id, traded_at, id);
+
+ALTER TABLE transactions ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Users can insert own transactions" ON transactions;
+CREATE POLICY "Users can insert own transactions" ON transactions
+FOR INSERT TO authenticated
+WITH CHECK (
+  EXISTS (
+    SELECT 1 FROM portfolios
+    WHERE portfolios.id = transactions.portfolio_id
+    AND portfolios.user_id = (SELECT auth.uid())
+  )
+);
+
+DROP POLICY IF EXISTS "Users can view own transactions" ON transactions;
+CREATE POLICY "Users can view own transactions" ON transactions
+FOR SELECT TO authenticated
+USING (
+  EXISTS (
+    SELECT 1 FROM portfolios
+    WHERE portfolios.id = transactions.portfolio_id
+    AND portfolios.user_id = (SELECT auth.uid())
+  )
+);
+
+DROP POLICY IF EXISTS "Users can delete own transactions" ON transactions;
+CREATE POLICY "Users can delete own transactions" ON transactions
+FOR DELETE TO authenticated
+USING (
+  EXISTS (
+    SELECT 1 FROM portfolios
+    WHERE portfolios.id = transactions.portfolio_id
+    AND portfolios.user_id = (SELECT auth.uid())
+  )
+);
+
+CREATE OR REPLACE FUNCTION add_transaction_for_user(
+  p_user_id UUID,
+  p_portfolio_id UUID,
+  p_symbol TEXT,
+  p_side TEXT,
+  p_quantity DECIMAL,
+  p_price DECIMAL,
+  p_fees DECIMAL,
+  p_traded_at TIMESTAMP WITH TIME ZONE
+)
+RETURNS SETOF transactions
+LANGUAGE sql
+AS $$
+  INSERT INTO transactions (portfolio_id, symbol, side, quantity, price, fees, traded_at)
+  SELECT p.id, p_symbol, p_side, p_quantity, p_price, p_fees, COALESCE(p_traded_at, NOW())
+  FROM portfolios p
+  WHERE p.id = p_portfolio_id
+    AND p.user_id = p_user_id
+  RETURNING *;
+$$;
+
+CREATE OR REPLACE FUNCTION delete_transaction_for_user(
+  p_user_id UUID,
+  p_portfolio_id UUID,
+  p_transaction_id UUID
+)
+RETURNS SETOF transactions
+LANGUAGE sql
+AS $$
+  DELETE FROM transactions t
+  USING portfolios p
+  WHERE t.id = p_transaction_id
+    AND t.portfolio_id = p_portfolio_id
+    AND p.id = t.portfolio_id
+    AND p.user_id = p_user_id
+  RETURNING t.*;
+$$;
+
+COMMIT;
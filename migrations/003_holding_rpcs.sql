@@ -0,0 +1,43 @@
+-- Migration for databases created before the single-round-trip holding routes:
+-- adds the ownership-checked RPCs that POST /api/holdings/<portfolio_id> and
+-- DELETE /api/holdings/<holding_id> call.
+-- Safe to re-run. Fresh installs get all of this from supabase_setup.sql.
+
+BEGIN;
+
+-- Ownership-checked writes in a single round trip. Both functions run with the
+-- caller's privileges (SECURITY INVOKER), so RLS still applies.
+CREATE OR REPLACE FUNCTION add_holding_for_user(
+  p_user_id UUID,
+  p_portfolio_id UUID,
+  p_symbol TEXT,
+  p_quantity DECIMAL,
+  p_purchase_price DECIMAL
+)
+RETURNS SETOF holdings
+LANGUAGE sql
+AS $$
+  INSERT INTO holdings (portfolio_id, symbol, quantity, purchase_price)
+  SELECT p.id, p_symbol, p_quantity, p_purchase_price
+  FROM portfolios p
+  WHERE p.id = p_portfolio_id
+    AND p.user_id = p_user_id
+  RETURNING *;
+$$;
+
+CREATE OR REPLACE FUNCTION delete_holding_for_user(
+  p_user_id UUID,
+  p_holding_id UUID
+)
+RETURNS SETOF holdings
+LANGUAGE sql
+AS $$
+  DELETE FROM holdings h
+  USING portfolios p
+  WHERE h.id = p_holding_id
+    AND p.id = h.portfolio_id
+    AND p.user_id = p_user_id
+  RETURNING h.*;
+$$;
+
+COMMIT;
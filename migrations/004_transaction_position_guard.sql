@@ -0,0 +1,116 @@
+-- Migration for databases created before the transaction RPCs checked
+-- positions: redefines add_transaction_for_user and delete_transaction_for_user
+-- to lock the portfolio row and reject writes that would oversell.
+-- Safe to re-run. Fresh installs get all of this from supabase_setup.sql.
+
+BEGIN;
+
+-- Trade writes check ownership and the position in one round trip. Each locks
+-- its portfolio row first, so concurrent writes to a portfolio (from any API
+-- worker) run one at a time and every position check sees the trades committed
+-- before it. A write that would leave a sell without shares to match raises
+-- SQLSTATE PT409, which PostgREST returns as 409 Conflict.
+CREATE OR REPLACE FUNCTION add_transaction_for_user(
+  p_user_id UUID,
+  p_portfolio_id UUID,
+  p_symbol TEXT,
+  p_side TEXT,
+  p_quantity DECIMAL,
+  p_price DECIMAL,
+  p_fees DECIMAL,
+  p_traded_at TIMESTAMP WITH TIME ZONE
+)
+RETURNS SETOF transactions
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_id UUID := gen_random_uuid();
+  v_at TIMESTAMP WITH TIME ZONE := COALESCE(p_traded_at, NOW());
+BEGIN
+  PERFORM 1 FROM portfolios
+  WHERE id = p_portfolio_id AND user_id = p_user_id
+  FOR NO KEY UPDATE;
+  IF NOT FOUND THEN
+    RETURN;
+  END IF;
+
+  -- A sell, backdated or not, must not take the running position in its symbol
+  -- below zero at or after its own place in (traded_at, id) order
+  IF p_side = 'sell' AND EXISTS (
+    SELECT 1
+    FROM (
+      SELECT t.traded_at, t.id,
+             SUM(CASE t.side WHEN 'buy' THEN t.quantity ELSE -t.quantity END)
+               OVER (ORDER BY t.traded_at, t.id) AS held
+      FROM (
+        SELECT traded_at, id, side, quantity FROM transactions
+        WHERE portfolio_id = p_portfolio_id AND upper(symbol) = upper(p_symbol)
+        UNION ALL
+        SELECT v_at, v_id, p_side, p_quantity
+      ) t
+    ) running
+    WHERE (running.traded_at, running.id) >= (v_at, v_id)
+      AND running.held < -1e-9
+  ) THEN
+    RAISE EXCEPTION 'Sell of % % exceeds the position held at the time', p_quantity, upper(p_symbol)
+      USING ERRCODE = 'PT409';
+  END IF;
+
+  RETURN QUERY
+  INSERT INTO transactions (id, portfolio_id, symbol, side, quantity, price, fees, traded_at)
+  VALUES (v_id, p_portfolio_id, p_symbol, p_side, p_quantity, p_price, p_fees, v_at)
+  RETURNING *;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION delete_transaction_for_user(
+  p_user_id UUID,
+  p_portfolio_id UUID,
+  p_transaction_id UUID
+)
+RETURNS SETOF transactions
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_trade transactions%ROWTYPE;
+BEGIN
+  PERFORM 1 FROM portfolios
+  WHERE id = p_portfolio_id AND user_id = p_user_id
+  FOR NO KEY UPDATE;
+  IF NOT FOUND THEN
+    RETURN;
+  END IF;
+
+  SELECT * INTO v_trade FROM transactions
+  WHERE id = p_transaction_id AND portfolio_id = p_portfolio_id;
+  IF NOT FOUND THEN
+    RETURN;
+  END IF;
+
+  -- Removing a buy must leave enough shares for every later sell of the symbol
+  IF v_trade.side = 'buy' AND EXISTS (
+    SELECT 1
+    FROM (
+      SELECT traded_at, id,
+             SUM(CASE side WHEN 'buy' THEN quantity ELSE -quantity END)
+               OVER (ORDER BY traded_at, id) AS held
+      FROM transactions
+      WHERE portfolio_id = p_portfolio_id
+        AND upper(symbol) = upper(v_trade.symbol)
+        AND id <> v_trade.id
+    ) running
+    WHERE (running.traded_at, running.id) > (v_trade.traded_at, v_trade.id)
+      AND running.held < -1e-9
+  ) THEN
+    RAISE EXCEPTION 'Removing this buy of % % leaves later sells without shares to match',
+      v_trade.quantity, upper(v_trade.symbol)
+      USING ERRCODE = 'PT409';
+  END IF;
+
+  RETURN QUERY
+  DELETE FROM transactions WHERE id = v_trade.id
+  RETURNING *;
+END;
+$$;
+
+COMMIT;
@@ -1,4 +1,6 @@
 -- Drop existing tables (this will remove all data and policies)
+DROP TABLE IF EXISTS transactions CASCADE;
+DROP TABLE IF EXISTS portfolio_summaries CASCADE;
 DROP TABLE IF EXISTS holdings CASCADE;
 DROP TABLE IF EXISTS portfolios CASCADE;
 
@@ -23,27 +25,153 @@ CREATE TABLE holdings (
   updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
--- Enable RLS on both tables
+-- Indexes backing the per-user listing, the holdings lookups and the RLS
+-- ownership subqueries
+CREATE INDEX portfolios_user_id_idx ON portfolios (user_id);
+CREATE INDEX holdings_portfolio_id_idx ON holdings (portfolio_id, symbol);
+
+-- Per-portfolio aggregates maintained by triggers, so listing portfolios does
+-- not count holdings on every request
+CREATE TABLE portfolio_summaries (
+  portfolio_id UUID PRIMARY KEY REFERENCES portfolios(id) ON DELETE CASCADE,
+  holdings_count INTEGER NOT NULL DEFAULT 0,
+  total_quantity DECIMAL NOT NULL DEFAULT 0,
+  total_cost DECIMAL NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE OR REPLACE FUNCTION create_portfolio_summary()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  INSERT INTO portfolio_summaries (portfolio_id)
+  SELECT id FROM new_rows
+  ON CONFLICT (portfolio_id) DO NOTHING;
+  RETURN NULL;
+END;
+$$;
+
+-- Statement-level triggers with transition tables: a multi-row insert from the
+-- bulk import touches each summary row once, not once per holding.
+CREATE OR REPLACE FUNCTION holdings_summary_after_insert()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  UPDATE portfolio_summaries s
+  SET holdings_count = s.holdings_count + d.n,
+      total_quantity = s.total_quantity + d.qty,
+      total_cost = s.total_cost + d.cost,
+      updated_at = NOW()
+  FROM (
+    SELECT portfolio_id, COUNT(*) AS n, SUM(quantity) AS qty,
+           SUM(quantity * purchase_price) AS cost
+    FROM new_rows
+    GROUP BY portfolio_id
+  ) d
+  WHERE s.portfolio_id = d.portfolio_id;
+  RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION holdings_summary_after_delete()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  UPDATE portfolio_summaries s
+  SET holdings_count = s.holdings_count - d.n,
+      total_quantity = s.total_quantity - d.qty,
+      total_cost = s.total_cost - d.cost,
+      updated_at = NOW()
+  FROM (
+    SELECT portfolio_id, COUNT(*) AS n, SUM(quantity) AS qty,
+           SUM(quantity * purchase_price) AS cost
+    FROM old_rows
+    GROUP BY portfolio_id
+  ) d
+  WHERE s.portfolio_id = d.portfolio_id;
+  RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION holdings_summary_after_update()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  UPDATE portfolio_summaries s
+  SET holdings_count = s.holdings_count + d.n,
+      total_quantity = s.total_quantity + d.qty,
+      total_cost = s.total_cost + d.cost,
+      updated_at = NOW()
+  FROM (
+    SELECT portfolio_id, SUM(n) AS n, SUM(qty) AS qty, SUM(cost) AS cost
+    FROM (
+      SELECT portfolio_id, 1 AS n, quantity AS qty, quantity * purchase_price AS cost
+      FROM new_rows
+      UNION ALL
+      SELECT portfolio_id, -1, -quantity, -(quantity * purchase_price)
+      FROM old_rows
+    ) changes
+    GROUP BY portfolio_id
+  ) d
+  WHERE s.portfolio_id = d.portfolio_id;
+  RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER portfolios_create_summary
+AFTER INSERT ON portfolios
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION create_portfolio_summary();
+
+CREATE TRIGGER holdings_summary_insert
+AFTER INSERT ON holdings
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION holdings_summary_after_insert();
+
+CREATE TRIGGER holdings_summary_update
+AFTER UPDATE ON holdings
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION holdings_summary_after_update();
+
+CREATE TRIGGER holdings_summary_delete
+AFTER DELETE ON holdings
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION holdings_summary_after_delete();
+
+-- Enable RLS on all tables
 ALTER TABLE portfolios ENABLE ROW LEVEL SECURITY;
 ALTER TABLE holdings ENABLE ROW LEVEL SECURITY;
+ALTER TABLE portfolio_summaries ENABLE ROW LEVEL SECURITY;
 
 -- Create RLS policies for portfolios table
 CREATE POLICY "Users can insert own portfolios" ON portfolios
 FOR INSERT TO authenticated
-WITH CHECK (auth.uid() = user_id);
+WITH CHECK ((SELECT auth.uid()) = user_id);
 
 CREATE POLICY "Users can view own portfolios" ON portfolios
 FOR SELECT TO authenticated
-USING (auth.uid() = user_id);
+USING ((SELECT auth.uid()) = user_id);
 
 CREATE POLICY "Users can update own portfolios" ON portfolios
 FOR UPDATE TO authenticated
-USING (auth.uid() = user_id)
-WITH CHECK (auth.uid() = user_id);
+USING ((SELECT auth.uid()) = user_id)
+WITH CHECK ((SELECT auth.uid()) = user_id);
 
 CREATE POLICY "Users can delete own portfolios" ON portfolios
 FOR DELETE TO authenticated
-USING (auth.uid() = user_id);
+USING ((SELECT auth.uid()) = user_id);
 
 -- Create RLS policies for holdings table
 CREATE POLICY "Users can insert own holdings" ON holdings
@@ -52,7 +180,7 @@ WITH CHECK (
   EXISTS (
     SELECT 1 FROM portfolios
     WHERE portfolios.id = holdings.portfolio_id
-    AND portfolios.user_id = auth.uid()
+    AND portfolios.user_id = (SELECT auth.uid())
   )
 );
 
@@ -62,7 +190,7 @@ USING (
   EXISTS (
     SELECT 1 FROM portfolios
     WHERE portfolios.id = holdings.portfolio_id
-    AND portfolios.user_id = auth.uid()
+    AND portfolios.user_id = (SELECT auth.uid())
   )
 );
 
@@ -72,14 +200,14 @@ USING (
   EXISTS (
     SELECT 1 FROM portfolios
     WHERE portfolios.id = holdings.portfolio_id
-    AND portfolios.user_id = auth.uid()
+    AND portfolios.user_id = (SELECT auth.uid())
   )
 )
 WITH CHECK (
   EXISTS (
     SELECT 1 FROM portfolios
     WHERE portfolios.id = holdings.portfolio_id
-    AND portfolios.user_id = auth.uid()
+    AND portfolios.user_id = (SELECT auth.uid())
   )
 );
 
@@ -89,6 +217,209 @@ USING (
   EXISTS (
     SELECT 1 FROM portfolios
     WHERE portfolios.id = holdings.portfolio_id
-    AND portfolios.user_id = auth.uid()
+    AND portfolios.user_id = (SELECT auth.uid())
+  )
+);
+
+-- Summaries are written only by the triggers above
+CREATE POLICY "Users can view own portfolio summaries" ON portfolio_summaries
+FOR SELECT TO authenticated
+USING (
+  EXISTS (
+    SELECT 1 FROM portfolios
+    WHERE portfolios.id = portfolio_summaries.portfolio_id
+    AND portfolios.user_id = (SELECT auth.uid())
+  )
+);
+
+-- Ownership-checked writes in a single round trip. Both functions run with the
+-- caller's privileges (SECURITY INVOKER), so RLS still applies.
+CREATE OR REPLACE FUNCTION add_holding_for_user(
+  p_user_id UUID,
+  p_portfolio_id UUID,
+  p_symbol TEXT,
+  p_quantity DECIMAL,
+  p_purchase_price DECIMAL
+)
+RETURNS SETOF holdings
+LANGUAGE sql
+AS $$
+  INSERT INTO holdings (portfolio_id, symbol, quantity, purchase_price)
+  SELECT p.id, p_symbol, p_quantity, p_purchase_price
+  FROM portfolios p
+  WHERE p.id = p_portfolio_id
+    AND p.user_id = p_user_id
+  RETURNING *;
+$$;
+
+CREATE OR REPLACE FUNCTION delete_holding_for_user(
+  p_user_id UUID,
+  p_holding_id UUID
+)
+RETURNS SETOF holdings
+LANGUAGE sql
+AS $$
+  DELETE FROM holdings h
+  USING portfolios p
+  WHERE h.id = p_holding_id
+    AND p.id = h.portfolio_id
+    AND p.user_id = p_user_id
+  RETURNING h.*;
+$$;
+
+-- Trade history replayed by the ledger (backend/utils/ledger.py) into FIFO or
+-- average-cost lots. Rows are immutable: a wrong trade is deleted and re-entered.
+CREATE TABLE transactions (
+  id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+  portfolio_id UUID REFERENCES portfolios(id) ON DELETE CASCADE NOT NULL,
+  symbol TEXT NOT NULL,
+  side TEXT NOT NULL CHECK (side IN ('buy', 'sell')),
+  quantity DECIMAL NOT NULL CHECK (quantity > 0),
+  price DECIMAL NOT NULL CHECK (price >= 0),
+  fees DECIMAL NOT NULL DEFAULT 0 CHECK (fees >= 0),
+  traded_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Replay order: the ledger pages through a portfolio's trades by (traded_at, id)
+CREATE INDEX transactions_portfolio_traded_idx ON transactions (portfolio_id, traded_at, id);
+
+ALTER TABLE transactions ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can insert own transactions" ON transactions
+FOR INSERT TO authenticated
+WITH CHECK (
+  EXISTS (
+    SELECT 1 FROM portfolios
+    WHERE portfolios.id = transactions.portfolio_id
+    AND portfolios.user_id = (SELECT auth.uid())
+  )
+);
+
+CREATE POLICY "Users can view own transactions" ON transactions
+FOR SELECT TO authenticated
+USING (
+  EXISTS (
+    SELECT 1 FROM portfolios
+    WHERE portfolios.id = transactions.portfolio_id
+    AND portfolios.user_id = (SELECT auth.uid())
+  )
+);
+
+CREATE POLICY "Users can delete own transactions" ON transactions
+FOR DELETE TO authenticated
+USING (
+  EXISTS (
+    SELECT 1 FROM portfolios
+    WHERE portfolios.id = transactions.portfolio_id
+    AND portfolios.user_id = (SELECT auth.uid())
   )
 );
+
+-- Trade writes check ownership and the position in one round trip. Each locks
+-- its portfolio row first, so concurrent writes to a portfolio (from any API
+-- worker) run one at a time and every position check sees the trades committed
+-- before it. A write that would leave a sell without shares to match raises
+-- SQLSTATE PT409, which PostgREST returns as 409 Conflict.
+CREATE OR REPLACE FUNCTION add_transaction_for_user(
+  p_user_id UUID,
+  p_portfolio_id UUID,
+  p_symbol TEXT,
+  p_side TEXT,
+  p_quantity DECIMAL,
+  p_price DECIMAL,
+  p_fees DECIMAL,
+  p_traded_at TIMESTAMP WITH TIME ZONE
+)
+RETURNS SETOF transactions
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_id UUID := gen_random_uuid();
+  v_at TIMESTAMP WITH TIME ZONE := COALESCE(p_traded_at, NOW());
+BEGIN
+  PERFORM 1 FROM portfolios
+  WHERE id = p_portfolio_id AND user_id = p_user_id
+  FOR NO KEY UPDATE;
+  IF NOT FOUND THEN
+    RETURN;
+  END IF;
+
+  -- A sell, backdated or not, must not take the running position in its symbol
+  -- below zero at or after its own place in (traded_at, id) order
+  IF p_side = 'sell' AND EXISTS (
+    SELECT 1
+    FROM (
+      SELECT t.traded_at, t.id,
+             SUM(CASE t.side WHEN 'buy' THEN t.quantity ELSE -t.quantity END)
+               OVER (ORDER BY t.traded_at, t.id) AS held
+      FROM (
+        SELECT traded_at, id, side, quantity FROM transactions
+        WHERE portfolio_id = p_portfolio_id AND upper(symbol) = upper(p_symbol)
+        UNION ALL
+        SELECT v_at, v_id, p_side, p_quantity
+      ) t
+    ) running
+    WHERE (running.traded_at, running.id) >= (v_at, v_id)
+      AND running.held < -1e-9
+  ) THEN
+    RAISE EXCEPTION 'Sell of % % exceeds the position held at the time', p_quantity, upper(p_symbol)
+      USING ERRCODE = 'PT409';
+  END IF;
+
+  RETURN QUERY
+  INSERT INTO transactions (id, portfolio_id, symbol, side, quantity, price, fees, traded_at)
+  VALUES (v_id, p_portfolio_id, p_symbol, p_side, p_quantity, p_price, p_fees, v_at)
+  RETURNING *;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION delete_transaction_for_user(
+  p_user_id UUID,
+  p_portfolio_id UUID,
+  p_transaction_id UUID
+)
+RETURNS SETOF transactions
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_trade transactions%ROWTYPE;
+BEGIN
+  PERFORM 1 FROM portfolios
+  WHERE id = p_portfolio_id AND user_id = p_user_id
+  FOR NO KEY UPDATE;
+  IF NOT FOUND THEN
+    RETURN;
+  END IF;
+
+  SELECT * INTO v_trade FROM transactions
+  WHERE id = p_transaction_id AND portfolio_id = p_portfolio_id;
+  IF NOT FOUND THEN
+    RETURN;
+  END IF;
+
+  -- Removing a buy must leave enough shares for every later sell of the symbol
+  IF v_trade.side = 'buy' AND EXISTS (
+    SELECT 1
+    FROM (
+      SELECT traded_at, id,
+             SUM(CASE side WHEN 'buy' THEN quantity ELSE -quantity END)
+               OVER (ORDER BY traded_at, id) AS held
+      FROM transactions
+      WHERE portfolio_id = p_portfolio_id
+        AND upper(symbol) = upper(v_trade.symbol)
+        AND id <> v_trade.id
+    ) running
+    WHERE (running.traded_at, running.id) > (v_trade.traded_at, v_trade.id)
+      AND running.held < -1e-9
+  ) THEN
+    RAISE EXCEPTION 'Removing this buy of % % leaves later sells without shares to match',
+      v_trade.quantity, upper(v_trade.symbol)
+      USING ERRCODE = 'PT409';
+  END IF;
+
+  RETURN QUERY
+  DELETE FROM transactions WHERE id = v_trade.id
+  RETURNING *;
+END;
+$$;
@@ -0,0 +1,157 @@
+import os
+import sys
+import time
+import uuid
+from types import SimpleNamespace
+
+import jwt
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Config refuses to load without these; tests never reach the real services
+for name, value in {"RAPIDAPI_KEY": "test", "RAPIDAPINEWS_KEY": "test",
+                    "VITE_SUPABASE_URL": "http://127.0.0.1:9", "VITE_SUPABASE_KEY": "test",
+                    "SCHEDULER_ENABLED": "false"}.items():
+    os.environ.setdefault(name, value)
+
+from backend import create_app  # noqa: E402
+from backend.config import Config  # noqa: E402
+import backend.extensions as ext  # noqa: E402
+
+JWT_SECRET = "test-secret-test-secret-test-secret"
+
+
+def mint_token(sub=None, secret=JWT_SECRET, ttl=3600, audience="authenticated", algorithm="HS256", **claims):
+    now = int(time.time())
+    payload = {"sub": sub or str(uuid.uuid4()), "aud": audience, "role": "authenticated",
+               "email": "test@example.com", "iat": now, "exp": now + ttl, **claims}
+    return jwt.encode(payload, secret, algorithm=algorithm)
+
+
+class TestConfig(Config):
+    RAPIDAPI_STOCK_HOST = "127.0.0.1:9"
+    RAPIDAPI_NEWS_HOST = "127.0.0.1:9"
+    AUTH_MODE = "local"
+    SUPABASE_JWT_SECRET = JWT_SECRET
+    SUPABASE_JWKS_URL = None
+    AUTH_REMOTE_FALLBACK = False
+    RATE_LIMIT_PER_SECOND = 0
+    SCHEDULER_ENABLED = False
+    HISTORY_DIR = ""
+    PORTFOLIO_CACHE_SIGNAL_DIR = ""
+    LEDGER_CACHE_SIGNAL_DIR = ""
+
+
+class FakeQuery:
+    """The slice of the PostgREST query builder the routes use, over in-memory tables."""
+
+    def __init__(self, db, table):
+        self.db, self.table = db, table
+        self.op, self.columns, self.filters, self.payload = "select", "*", {}, None
+
+    def select(self, columns="*", **kwargs):
+        self.columns = columns
+        return self
+
+    def eq(self, column, value):
+        self.filters[column] = value
+        return self
+
+    def match(self, filters):
+        self.filters.update(filters)
+        return self
+
+    def order(self, *args, **kwargs):
+        return self
+
+    def range(self, start, end):
+        return self
+
+    def insert(self, rows, **kwargs):
+        self.op, self.payload = "insert", rows
+        return self
+
+    def delete(self):
+        self.op = "delete"
+        return self
+
+    def execute(self):
+        self.db.calls.append((self.table, self.op))
+        rows = [r for r in self.db.tables.setdefault(self.table, [])
+                if all(str(r.get(k)) == str(v) for k, v in self.filters.items())]
+        if self.op == "insert":
+            new = [dict(r, id=r.get("id") or str(uuid.uuid4())) for r in
+                   (self.payload if isinstance(self.payload, list) else [self.payload])]
+            self.db.tables[self.table].extend(new)
+            return SimpleNamespace(data=new)
+        if self.op == "delete":
+            for r in rows:
+                self.db.tables[self.table].remove(r)
+            return SimpleNamespace(data=rows)
+        if self.table == "portfolios" and "holdings(" in self.columns:
+            rows = [dict(r, holdings=[h for h in self.db.tables.get("holdings", [])
+                                      if h["portfolio_id"] == r["id"]]) for r in rows]
+        return SimpleNamespace(data=[dict(r) for r in rows])
+
+
+class FakeRPC:
+    def __init__(self, db, name, params):
+        self.db, self.name, self.params = db, name, params
+
+    def execute(self):
+        self.db.calls.append(("rpc", self.name))
+        p, tables = self.params, self.db.tables
+        owned = {r["id"] for r in tables.get("portfolios", []) if r["user_id"] == p["p_user_id"]}
+        if self.name == "add_holding_for_user":
+            if p["p_portfolio_id"] not in owned:
+                return SimpleNamespace(data=[])
+            row = {"id": str(uuid.uuid4()), "portfolio_id": p["p_portfolio_id"], "symbol": p["p_symbol"],
+                   "quantity": p["p_quantity"], "purchase_price": p["p_purchase_price"]}
+            tables.setdefault("holdings", []).append(row)
+            return SimpleNamespace(data=[dict(row)])
+        if self.name == "delete_holding_for_user":
+            rows = [h for h in tables.get("holdings", [])
+                    if h["id"] == p["p_holding_id"] and h["portfolio_id"] in owned]
+            for row in rows:
+                tables["holdings"].remove(row)
+            return SimpleNamespace(data=rows)
+        raise NotImplementedError(self.name)
+
+
+class FakeSupabase:
+    """Stands in for the Supabase client and records every round trip in `calls`."""
+
+    def __init__(self):
+        self.tables = {}
+        self.calls = []
+        self.auth = SimpleNamespace(get_user=self._get_user)
+        self.remote_users = {}  # token -> user id accepted by the fake /auth/v1/user
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def rpc(self, name, params):
+        return FakeRPC(self, name, params)
+
+    def _get_user(self, token):
+        self.calls.append(("auth", "get_user"))
+        if token not in self.remote_users:
+            raise ValueError("invalid JWT")
+        return SimpleNamespace(user=SimpleNamespace(id=self.remote_users[token]))
+
+
+@pytest.fixture
+def app():
+    return create_app(TestConfig)
+
+
+@pytest.fixture
+def supabase(app):
+    fake = FakeSupabase()
+    ext.supabase = ext.supabase_service = fake
+    return fake
+
+
+@pytest.fixture
+def client(app, supabase):
+    return app.test_client()
@@ -0,0 +1,99 @@
+import math
+import uuid
+
+import numpy as np
+import pytest
+
+import backend.extensions as ext
+from backend.utils.analytics import TRADING_DAYS, compute_analytics, portfolio_analytics
+from backend.utils.portfolio_cache import PortfolioCache
+from backend.utils.price_history import DAILY, PriceHistory
+from conftest import mint_token
+
+DAY = 86400
+T0 = 20000 * DAY  # a UTC midnight
+DATES = np.array([T0 + i * DAY for i in range(4)])
+# Daily returns of +10%, -10%, +10%; the benchmark moves half as much
+CLOSES = [100.0, 110.0, 99.0, 108.9]
+BENCHMARK = [100.0, 105.0, 99.75, 104.7375]
+
+
+def write_closes(history, symbol, closes, dates=DATES):
+    closes = np.array(closes, dtype=np.float64)
+    history.write_bars(symbol, DAILY, {"timestamp": np.asarray(dates), "open": closes, "high": closes,
+                                       "low": closes, "close": closes, "volume": np.ones(len(closes))})
+
+
+def test_returns_risk_and_beta_on_a_known_series():
+    result = compute_analytics(DATES, np.array(CLOSES)[:, None], np.array([3.0]), np.array(BENCHMARK))
+
+    assert result["observations"] == 3
+    assert result["time_weighted_return"] == pytest.approx(1.1 * 0.9 * 1.1 - 1)
+    assert result["annualized_return"] == pytest.approx((1.1 * 0.9 * 1.1) ** (TRADING_DAYS / 3) - 1, rel=1e-5)
+    returns = [0.1, -0.1, 0.1]
+    mean = sum(returns) / 3
+    volatility = math.sqrt(sum((r - mean) ** 2 for r in returns) / 2) * math.sqrt(TRADING_DAYS)
+    assert result["annualized_volatility"] == pytest.approx(volatility, rel=1e-5)
+    # Peak after the first day's gain, trough after the next day's loss
+    assert result["max_drawdown"] == {"value": pytest.approx(-0.1), "peak": int(DATES[1]), "trough": int(DATES[2])}
+    assert result["beta"] == pytest.approx(2.0)
+
+
+def test_a_holding_entering_mid_window_is_not_a_gain():
+    prices = np.array([[100.0, np.nan], [110.0, 50.0], [121.0, 100.0]])
+    result = compute_analytics(DATES[:3], prices, np.array([1.0, 1.0]))
+
+    # Day one counts only the first holding; day two weights both by the previous close
+    second = (110.0 * 0.1 + 50.0 * 1.0) / 160.0
+    assert result["time_weighted_return"] == pytest.approx(1.1 * (1 + second) - 1)
+    assert result["max_drawdown"]["value"] == 0.0
+    assert result["beta"] is None
+
+
+def test_portfolio_analytics_reads_stored_bars(tmp_path):
+    history = PriceHistory(str(tmp_path))
+    write_closes(history, "TCS:NSE", CLOSES)
+    write_closes(history, "INFY:NSE", [c * 2 for c in CLOSES])
+    write_closes(history, "NIFTY", BENCHMARK)
+    holdings = [{"symbol": "tcs:nse", "quantity": 1}, {"symbol": "TCS:NSE", "quantity": 2},
+                {"symbol": "INFY:NSE", "quantity": 1}, {"symbol": "WIPRO:NSE", "quantity": 1}]
+
+    result = portfolio_analytics(history, holdings, T0, T0 + 10 * DAY, "NIFTY")
+
+    assert result["time_weighted_return"] == pytest.approx(1.1 * 0.9 * 1.1 - 1)
+    assert result["beta"] == pytest.approx(2.0) and result["benchmark"] == "NIFTY"
+    assert result["correlation"]["symbols"] == ["TCS:NSE", "INFY:NSE", "WIPRO:NSE"]
+    assert result["correlation"]["matrix"][0][:2] == [1.0, 1.0]
+    assert result["correlation"]["matrix"][2] == [None, None, None]
+    assert result["missing_history"] == ["WIPRO:NSE"]
+
+
+def test_cached_analytics_follow_holdings_written_by_another_worker(client, supabase, tmp_path, monkeypatch):
+    history = PriceHistory(str(tmp_path / "history"))
+    write_closes(history, "TCS:NSE", CLOSES)
+    write_closes(history, "INFY:NSE", CLOSES[::-1])
+    monkeypatch.setattr(ext, "price_history", history)
+    monkeypatch.setattr(ext, "portfolio_cache", PortfolioCache(signal_dir=str(tmp_path / "signals")))
+    other_worker = PortfolioCache(signal_dir=str(tmp_path / "signals"))
+
+    user_id, portfolio_id = str(uuid.uuid4()), str(uuid.uuid4())
+    supabase.tables = {
+        "portfolios": [{"id": portfolio_id, "user_id": user_id, "name": "Main", "created_at": "2026-01-01"}],
+        "holdings": [{"id": "h1", "portfolio_id": portfolio_id, "symbol": "TCS:NSE",
+                      "quantity": 1, "purchase_price": 100.0}]}
+    url = f"/api/portfolios/{portfolio_id}/analytics?from={T0}&to={T0 + 3 * DAY}"
+    headers = {"Authorization": f"Bearer {mint_token(user_id)}"}
+
+    def symbols():
+        res = client.get(url, headers=headers)
+        assert res.status_code == 200
+        return res.json["correlation"]["symbols"]
+
+    assert symbols() == ["TCS:NSE"]
+    assert symbols() == ["TCS:NSE"]
+    assert ext.analytics_cache.stats()["hits"] == 1
+
+    added = {"id": "h2", "portfolio_id": portfolio_id, "symbol": "INFY:NSE", "quantity": 1, "purchase_price": 50.0}
+    supabase.tables["holdings"].append(added)
+    other_worker.add_holdings(user_id, portfolio_id, [added])
+    assert symbols() == ["TCS:NSE", "INFY:NSE"]
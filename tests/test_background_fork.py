@@ -0,0 +1,93 @@
+import json
+import os
+import threading
+
+import pytest
+
+import backend.extensions as ext
+from backend import create_app
+from backend.utils.response_cache import ResponseCache
+from backend.utils.scheduler import LeaderLock, MarketScheduler
+from conftest import TestConfig
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork()")
+
+
+def in_child(fn):
+    """Runs `fn` in a forked child and returns what it returned (JSON-encodable)."""
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            result = fn()
+        except BaseException as e:
+            result = {"error": repr(e)}
+        os.write(write_end, json.dumps(result).encode())
+        os._exit(0)
+    os.close(write_end)
+    with os.fdopen(read_end) as f:
+        result = json.load(f)
+    os.waitpid(pid, 0)
+    return result
+
+
+def make_scheduler(tmp_path):
+    return MarketScheduler(lambda path: (200, "application/json", b"{}"), ResponseCache(), [],
+                           lock_path=str(tmp_path / "scheduler.lock"), snapshot_dir=str(tmp_path / "warm"),
+                           tick=0.05, market_open=lambda: True)
+
+
+def test_forked_child_does_not_inherit_leadership_or_thread(tmp_path):
+    scheduler = make_scheduler(tmp_path)
+    ext.scheduler = scheduler
+    scheduler.start()
+    try:
+        scheduler.tick()
+        assert scheduler.lock.held
+
+        def child():
+            before = {"leader": scheduler.lock.held, "thread": scheduler._thread is not None}
+            scheduler.start()
+            scheduler.tick()
+            return {**before, "running": scheduler._thread.is_alive(), "leader_after_tick": scheduler.lock.held}
+
+        assert in_child(child) == {"leader": False, "thread": False, "running": True, "leader_after_tick": False}
+        # The child exiting left the parent's flock in place
+        assert not LeaderLock(str(tmp_path / "scheduler.lock")).try_acquire()
+        assert scheduler.lock.held
+    finally:
+        scheduler.stop()
+        ext.scheduler = None
+
+
+def test_scheduler_starts_with_the_first_request_not_create_app(tmp_path):
+    class Config(TestConfig):
+        SCHEDULER_ENABLED = True
+        SCHEDULER_LOCK_PATH = str(tmp_path / "scheduler.lock")
+        SCHEDULER_SNAPSHOT_DIR = str(tmp_path / "warm")
+
+    app = create_app(Config)
+    try:
+        assert ext.scheduler._thread is None
+        assert "market-scheduler" not in {t.name for t in threading.enumerate()}
+        app.test_client().get("/api/health")
+        assert ext.scheduler._thread.is_alive()
+    finally:
+        ext.scheduler.stop()
+        ext.scheduler = None
+
+
+def test_news_store_refreshes_in_a_forked_child(app):
+    calls = []
+    ext.news_store.fetch = lambda: calls.append(os.getpid()) or {"status": "OK", "data": []}
+    ext.news_store.refresh_interval = 0.01
+    ext.news_store.start()
+    try:
+        def child():
+            ext.news_store.start()
+            ext.news_store._thread.join(0.2)
+            return sorted(set(calls) - {os.getppid()}) == [os.getpid()]
+
+        assert in_child(child) is True
+    finally:
+        ext.news_store.stop()
@@ -0,0 +1,28 @@
+import time
+
+import pytest
+
+from backend.utils.fanout import FanOut
+
+
+def slow():
+    time.sleep(0.5)
+    return {"status": "OK"}
+
+
+@pytest.mark.parametrize("calls", [1, 2], ids=["single", "batch"])
+def test_every_call_is_held_to_the_deadline(calls):
+    fanout = FanOut(max_workers=4, timeout=0.1)
+    started = time.monotonic()
+    results = fanout.run({i: slow for i in range(calls)})
+    assert time.monotonic() - started < 0.4
+    assert all(r == {"status": "error", "message": "Upstream request timed out"} for r in results.values())
+    fanout.shutdown()
+
+
+def test_failures_become_error_results():
+    fanout = FanOut(timeout=1)
+    results = fanout.run({"ok": lambda: {"status": "OK"}, "bad": lambda: 1 / 0})
+    assert results["ok"] == {"status": "OK"}
+    assert results["bad"]["status"] == "error"
+    fanout.shutdown()
@@ -0,0 +1,128 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+
+import backend.async_extensions as aext
+import backend.extensions as ext
+from backend.routes.portfolio_routes import valuation_flow
+from backend.routes.public_routes import business_news_flow
+from backend.utils import api_helpers, async_api_helpers
+from backend.utils.api_helpers import Blocking, Upstream
+
+
+class AsyncQuery:
+    """Wraps a FakeQuery or FakeRPC so execute() is awaited, like the async Supabase client."""
+
+    def __init__(self, query):
+        self.query = query
+
+    def __getattr__(self, name):
+        attr = getattr(self.query, name)
+        if name == "execute":
+            async def execute():
+                return attr()
+            return execute
+        return lambda *args, **kwargs: AsyncQuery(attr(*args, **kwargs))
+
+
+class AsyncSupabase:
+    def __init__(self, fake):
+        self.fake = fake
+
+    def table(self, name):
+        return AsyncQuery(self.fake.table(name))
+
+    def rpc(self, name, params):
+        return AsyncQuery(self.fake.rpc(name, params))
+
+
+def drive_both(make_flow):
+    """Runs a fresh flow from `make_flow(async_mode)` under each driver."""
+    return api_helpers.run_flow(make_flow(False)), asyncio.run(async_api_helpers.run_flow(make_flow(True)))
+
+
+def test_drivers_send_results_and_throw_failures(monkeypatch):
+    upstream = lambda host, key, endpoint, priority=None: {"status": "OK", "endpoint": endpoint}
+
+    async def async_upstream(*args, **kwargs):
+        return upstream(*args, **kwargs)
+
+    monkeypatch.setattr(api_helpers, "make_api_request", upstream)
+    monkeypatch.setattr(async_api_helpers, "make_api_request", async_upstream)
+    monkeypatch.setattr(aext, "call_timeout", 1.0)
+
+    def flow(_async_mode):
+        results = yield {name: Upstream("host", "key", f"/{name}") for name in ("a", "b")}
+        doubled = yield Blocking(lambda x: x * 2, (21,))
+        try:
+            yield Blocking(lambda: 1 / 0)
+        except ZeroDivisionError:
+            return {name: r["endpoint"] for name, r in results.items()}, doubled
+        return None
+
+    sync_result, async_result = drive_both(flow)
+    assert sync_result == async_result == ({"a": "/a", "b": "/b"}, 42)
+
+
+def test_business_news_starts_the_store_under_both_drivers(app, monkeypatch):
+    # A forked worker inherits last_refresh but not the refresher thread;
+    # both apps must call start() so the worker's own refresher begins
+    starts = []
+    store = SimpleNamespace(last_refresh=123.0, start=lambda: starts.append(1), refresh=lambda: True,
+                            page=lambda limit, cursor=None, offset=0: {"status": "OK", "limit": limit})
+    monkeypatch.setattr(ext, "news_store", store)
+    args = SimpleNamespace(get=lambda name, default=None, type=None: default)
+
+    assert drive_both(lambda _: business_news_flow(args)) == (({"status": "OK", "limit": 8}, 200),) * 2
+    assert len(starts) == 2
+
+
+def test_valuation_flow_is_shared_by_both_clients(client, supabase, monkeypatch):
+    user_id = "u1"
+    supabase.tables = {"portfolios": [{"id": "p1", "user_id": user_id, "name": "Main", "description": ""}],
+                       "holdings": [{"id": "h1", "portfolio_id": "p1", "symbol": "tcs:nse",
+                                     "quantity": 2, "purchase_price": 100.0}]}
+    quote = {"status": "OK", "data": [{"symbol": "TCS:NSE", "price": 150.0}]}
+
+    async def async_quotes(*args, **kwargs):
+        return quote
+
+    monkeypatch.setattr(api_helpers, "fetch_quotes", lambda *args, **kwargs: quote)
+    monkeypatch.setattr(async_api_helpers, "fetch_quotes", async_quotes)
+    config = client.application.config
+
+    def flow(async_mode):
+        ext.portfolio_cache.remove_portfolio(user_id, "p1")  # every run reads through its own client
+        return valuation_flow(AsyncSupabase(supabase) if async_mode else supabase, config, user_id, "p1")
+
+    sync_result, async_result = drive_both(flow)
+    assert sync_result == async_result
+    payload, status = sync_result
+    assert status == 200 and payload["portfolio"]["name"] == "Main"
+    assert supabase.calls.count(("portfolios", "select")) == 2
+
+
+def test_async_upstream_requests_go_through_the_http_client(app, monkeypatch):
+    seen = []
+
+    def handler(request):
+        seen.append((str(request.url), request.headers["x-rapidapi-host"]))
+        if request.url.path == "/limited":
+            return httpx.Response(429)
+        return httpx.Response(200, json={"status": "OK", "data": []})
+
+    async def run():
+        aext.http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            ok = await async_api_helpers.make_api_request("api.test", "key", "/stock-quote?symbol=TCS%3ANSE")
+            limited = await async_api_helpers.make_api_request("api.test", "key", "/limited", stale_ok=False)
+            return ok, limited
+        finally:
+            await aext.http_client.aclose()
+
+    monkeypatch.setattr(aext, "http_client", None)
+    ok, limited = asyncio.run(run())
+    assert ok == {"status": "OK", "data": []}
+    assert limited["rate_limited"] is True
+    assert seen[0] == ("https://api.test/stock-quote?symbol=TCS%3ANSE", "api.test")
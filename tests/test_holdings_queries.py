@@ -0,0 +1,93 @@
+import uuid
+
+import backend.extensions as ext
+from backend.utils.portfolio_cache import PortfolioCache
+from conftest import mint_token
+
+
+def setup_portfolio(supabase, user_id, holdings=()):
+    portfolio_id = str(uuid.uuid4())
+    supabase.tables.setdefault("portfolios", []).append(
+        {"id": portfolio_id, "user_id": user_id, "name": "Test", "description": "", "created_at": "2026-01-01"})
+    supabase.tables.setdefault("holdings", []).extend(
+        {"id": str(uuid.uuid4()), "portfolio_id": portfolio_id, "symbol": symbol,
+         "quantity": quantity, "purchase_price": price} for symbol, quantity, price in holdings)
+    return portfolio_id
+
+
+def cold_cache():
+    # Every request below must reach Supabase, so none is answered from the portfolio cache
+    ext.portfolio_cache = PortfolioCache(ttl=0)
+
+
+def test_get_holdings_is_one_round_trip(client, supabase):
+    cold_cache()
+    user_id = str(uuid.uuid4())
+    portfolio_id = setup_portfolio(supabase, user_id, [("TCS:NSE", 2, 100.0), ("INFY:NSE", 1, 50.0)])
+
+    res = client.get(f"/api/holdings/{portfolio_id}", headers={"Authorization": f"Bearer {mint_token(user_id)}"})
+
+    assert res.status_code == 200
+    assert sorted(h["symbol"] for h in res.json) == ["INFY:NSE", "TCS:NSE"]
+    assert supabase.calls == [("portfolios", "select")]
+
+
+def test_get_holdings_of_another_user_is_one_round_trip(client, supabase):
+    cold_cache()
+    portfolio_id = setup_portfolio(supabase, str(uuid.uuid4()), [("TCS:NSE", 2, 100.0)])
+
+    res = client.get(f"/api/holdings/{portfolio_id}", headers={"Authorization": f"Bearer {mint_token()}"})
+
+    assert res.status_code == 403
+    assert supabase.calls == [("portfolios", "select")]
+
+
+def test_add_holding_is_one_round_trip(client, supabase):
+    cold_cache()
+    user_id = str(uuid.uuid4())
+    portfolio_id = setup_portfolio(supabase, user_id)
+    headers = {"Authorization": f"Bearer {mint_token(user_id)}"}
+
+    res = client.post(f"/api/holdings/{portfolio_id}", headers=headers,
+                      json={"symbol": "tcs:nse", "quantity": 3, "purchase_price": 120.5})
+
+    assert res.status_code == 201
+    assert res.json["symbol"] == "TCS:NSE"
+    assert supabase.calls == [("rpc", "add_holding_for_user")]
+
+
+def test_add_holding_to_another_users_portfolio_is_one_round_trip(client, supabase):
+    cold_cache()
+    portfolio_id = setup_portfolio(supabase, str(uuid.uuid4()))
+
+    res = client.post(f"/api/holdings/{portfolio_id}", headers={"Authorization": f"Bearer {mint_token()}"},
+                      json={"symbol": "TCS:NSE", "quantity": 3, "purchase_price": 120.5})
+
+    assert res.status_code == 403
+    assert supabase.calls == [("rpc", "add_holding_for_user")]
+    assert supabase.tables["holdings"] == []
+
+
+def test_delete_holding_is_one_round_trip(client, supabase):
+    cold_cache()
+    user_id = str(uuid.uuid4())
+    portfolio_id = setup_portfolio(supabase, user_id, [("TCS:NSE", 2, 100.0)])
+    holding_id = supabase.tables["holdings"][0]["id"]
+
+    res = client.delete(f"/api/holdings/{holding_id}", headers={"Authorization": f"Bearer {mint_token(user_id)}"})
+
+    assert res.status_code == 200
+    assert supabase.calls == [("rpc", "delete_holding_for_user")]
+    assert not [h for h in supabase.tables["holdings"] if h["portfolio_id"] == portfolio_id]
+
+
+def test_delete_holding_of_another_user_is_one_round_trip(client, supabase):
+    cold_cache()
+    setup_portfolio(supabase, str(uuid.uuid4()), [("TCS:NSE", 2, 100.0)])
+    holding_id = supabase.tables["holdings"][0]["id"]
+
+    res = client.delete(f"/api/holdings/{holding_id}", headers={"Authorization": f"Bearer {mint_token()}"})
+
+    assert res.status_code == 404
+    assert supabase.calls == [("rpc", "delete_holding_for_user")]
+    assert len(supabase.tables["holdings"]) == 1
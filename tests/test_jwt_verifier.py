@@ -0,0 +1,88 @@
+import uuid
+
+import jwt
+import pytest
+
+import backend.extensions as ext
+from backend import create_app
+from backend.utils.jwt_verifier import JWTVerifier, LocalVerificationUnavailable
+from conftest import JWT_SECRET, FakeSupabase, TestConfig, mint_token
+
+
+def test_valid_token_returns_claims():
+    user_id = str(uuid.uuid4())
+    claims = JWTVerifier(secret=JWT_SECRET).verify(mint_token(user_id))
+    assert claims["sub"] == user_id
+    assert claims["aud"] == "authenticated"
+
+
+def test_expired_token_is_rejected():
+    with pytest.raises(jwt.ExpiredSignatureError):
+        JWTVerifier(secret=JWT_SECRET).verify(mint_token(ttl=-60))
+
+
+def test_bad_signature_is_rejected():
+    with pytest.raises(jwt.InvalidSignatureError):
+        JWTVerifier(secret=JWT_SECRET).verify(mint_token(secret="another-secret-another-secret-1234"))
+
+
+def test_wrong_audience_is_rejected():
+    with pytest.raises(jwt.InvalidAudienceError):
+        JWTVerifier(secret=JWT_SECRET).verify(mint_token(audience="anon"))
+
+
+def test_token_without_a_local_key_is_unavailable_not_invalid():
+    with pytest.raises(LocalVerificationUnavailable):
+        JWTVerifier(secret=None).verify(mint_token())
+
+
+def client_with(**overrides):
+    """A test client for TestConfig with `overrides`, and the fake Supabase behind it."""
+    app = create_app(type("Config", (TestConfig,), overrides))
+    ext.supabase = supabase = FakeSupabase()
+    return app.test_client(), supabase
+
+
+def get_portfolios(client, token):
+    return client.get("/api/portfolios", headers={"Authorization": f"Bearer {token}"})
+
+
+def test_route_accepts_a_valid_token_without_calling_supabase_auth(client, supabase):
+    assert get_portfolios(client, mint_token()).status_code == 200
+    assert ("auth", "get_user") not in supabase.calls
+
+
+@pytest.mark.parametrize("token", [
+    mint_token(ttl=-60),
+    mint_token(secret="another-secret-another-secret-1234"),
+    mint_token(audience="anon"),
+], ids=["expired", "bad-signature", "wrong-audience"])
+def test_route_rejects_invalid_tokens_without_remote_fallback(token):
+    client, supabase = client_with(AUTH_REMOTE_FALLBACK=True)
+    supabase.remote_users[token] = str(uuid.uuid4())
+
+    # Invalid tokens stay invalid: only a missing key may defer to Supabase
+    assert get_portfolios(client, token).status_code == 401
+    assert supabase.calls == []
+
+
+def test_route_falls_back_to_remote_auth_when_no_local_key():
+    client, supabase = client_with(SUPABASE_JWT_SECRET=None, AUTH_REMOTE_FALLBACK=True)
+    user_id = str(uuid.uuid4())
+    token = mint_token(user_id)
+    supabase.remote_users[token] = user_id
+
+    assert get_portfolios(client, token).status_code == 200
+    assert supabase.calls.count(("auth", "get_user")) == 1
+    # The remotely verified user is cached until the token expires
+    assert get_portfolios(client, token).status_code == 200
+    assert supabase.calls.count(("auth", "get_user")) == 1
+
+
+def test_route_rejects_when_no_local_key_and_fallback_disabled():
+    client, supabase = client_with(SUPABASE_JWT_SECRET=None, AUTH_REMOTE_FALLBACK=False)
+    token = mint_token()
+    supabase.remote_users[token] = str(uuid.uuid4())
+
+    assert get_portfolios(client, token).status_code == 401
+    assert ("auth", "get_user") not in supabase.calls
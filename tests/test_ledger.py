@@ -0,0 +1,115 @@
+import pytest
+
+from backend.utils.ledger import (AVERAGE, FIFO, LONG_TERM_SECONDS, OVERSOLD_SQLSTATE, LedgerCache,
+                                  OversoldError, PortfolioLedger)
+
+DAY = 86400.0
+PID = "p1"
+
+
+def trade(id, side, quantity, price, time, symbol="TCS:NSE", fees=0.0):
+    return {"id": id, "symbol": symbol, "side": side, "quantity": quantity, "price": price,
+            "fees": fees, "traded_at": time}
+
+
+def sell(quantity, time, symbol="TCS:NSE"):
+    return {"symbol": symbol, "side": "sell", "quantity": quantity, "price": 1.0, "fees": 0.0,
+            "traded_at": time}
+
+
+ROWS = [trade("a", "buy", 10, 100.0, 0.0), trade("b", "buy", 10, 200.0, 10 * DAY),
+        trade("c", "sell", 10, 300.0, 20 * DAY)]
+
+
+def test_fifo_matches_the_oldest_lots_and_average_the_mean_cost():
+    fifo = PortfolioLedger.load(ROWS, FIFO).realized()
+    average = PortfolioLedger.load(ROWS, AVERAGE).realized()
+
+    assert fifo["totals"]["realized_pnl"] == 10 * (300.0 - 100.0)
+    assert average["totals"]["realized_pnl"] == 10 * (300.0 - 150.0)
+    assert "short_term" not in average["totals"]
+
+
+def test_fifo_splits_gains_at_the_long_term_boundary():
+    rows = [trade("a", "buy", 5, 100.0, 0.0), trade("b", "buy", 5, 100.0, 200 * DAY),
+            trade("c", "sell", 10, 110.0, LONG_TERM_SECONDS + 100 * DAY)]
+    totals = PortfolioLedger.load(rows, FIFO).realized()["totals"]
+
+    # The first lot was held past a year, the second was not
+    assert totals["long_term"] == 50.0
+    assert totals["short_term"] == 50.0
+
+
+def test_a_backdated_sell_is_checked_against_the_position_at_its_time():
+    ledger = PortfolioLedger.load(ROWS, FIFO)
+
+    ledger.check(sell(10, 15 * DAY))  # 20 held then, 10 of them sold later
+    with pytest.raises(OversoldError):
+        ledger.check(sell(11, 15 * DAY))
+    with pytest.raises(OversoldError):
+        ledger.check(sell(11, 5 * DAY))  # only the first lot held then
+    with pytest.raises(OversoldError):
+        ledger.check(sell(1, -DAY))
+
+
+def test_removing_a_buy_that_later_sells_depend_on_is_rejected():
+    ledger = PortfolioLedger.load(ROWS + [trade("d", "sell", 5, 250.0, 30 * DAY)], FIFO)
+
+    with pytest.raises(OversoldError):
+        ledger.check_removal("a")  # 15 of the 20 bought are sold later
+    assert ledger.check_removal("c") is True
+    assert ledger.check_removal("missing") is False
+
+
+def test_backdated_inserts_replayed_from_checkpoints_match_a_full_rebuild():
+    rows = [trade(f"t{i:03d}", "buy" if i % 3 else "sell", 1 + i % 4, 100.0 + i, i * DAY)
+            for i in range(1, 120)]
+    rows.insert(0, trade("t000", "buy", 500, 50.0, 0.0))
+    ledger = PortfolioLedger.load(rows, FIFO, interval=10, max_checkpoints=4)
+    late = [trade("x1", "buy", 3, 90.0, 95.5 * DAY), trade("x2", "sell", 7, 130.0, 60.5 * DAY),
+            trade("x3", "buy", 2, 80.0, 110.5 * DAY)]
+    for row in late:
+        ledger.check(row)
+        ledger.add(row)
+    ledger.remove("t050")
+
+    rebuilt = PortfolioLedger.load([r for r in rows + late if r["id"] != "t050"], FIFO)
+    assert ledger.stats()["checkpoints"] > 0
+    assert ledger.realized() == rebuilt.realized()
+    assert ledger.realized(30 * DAY, 90 * DAY) == rebuilt.realized(30 * DAY, 90 * DAY)
+    quotes = {"TCS:NSE": {"price": 150.0}}
+    assert ledger.unrealized(quotes, now=200 * DAY) == rebuilt.unrealized(quotes, now=200 * DAY)
+
+
+def test_database_oversold_errors_map_to_oversold_error():
+    class APIError(Exception):
+        def __init__(self, code, message):
+            super().__init__(message)
+            self.code, self.message = code, message
+
+    error = OversoldError.from_database(APIError(OVERSOLD_SQLSTATE, "Sell of 5 TCS:NSE exceeds the position"))
+    assert isinstance(error, OversoldError)
+    assert str(error) == "Sell of 5 TCS:NSE exceeds the position"
+    assert OversoldError.from_database(APIError("23505", "duplicate key")) is None
+    assert OversoldError.from_database(RuntimeError("connection reset")) is None
+
+
+def test_a_write_in_one_worker_drops_the_others_ledger(tmp_path):
+    a, b = LedgerCache(signal_dir=str(tmp_path)), LedgerCache(signal_dir=str(tmp_path))
+    for cache in (a, b):
+        cache.set(PID, FIFO, PortfolioLedger.load(ROWS, FIFO), cache.version(PID))
+    row = trade("d", "sell", 5, 250.0, 30 * DAY)
+    b.wrote(PID, lambda ledger: ledger.add(row))
+
+    assert a.get(PID, FIFO) is None
+    # The writer applied its own trade and keeps serving from memory
+    assert b.get(PID, FIFO).realized()["symbols"][0]["quantity_sold"] == 15
+
+
+def test_a_write_during_a_load_keeps_the_load_out_of_the_cache(tmp_path):
+    a, b = LedgerCache(signal_dir=str(tmp_path)), LedgerCache(signal_dir=str(tmp_path))
+    version = a.version(PID)  # a starts paging through the transactions
+    b.wrote(PID, lambda ledger: None)
+    a.set(PID, FIFO, PortfolioLedger.load(ROWS, FIFO), version)
+
+    assert a.get(PID, FIFO) is None
@@ -0,0 +1,52 @@
+from backend.utils.portfolio_cache import PortfolioCache
+
+USER = "user-1"
+ROW = {"id": "p1", "user_id": USER, "name": "Main", "created_at": "2026-01-01"}
+
+
+def workers(tmp_path):
+    """Two processes' caches sharing one signal directory."""
+    return PortfolioCache(signal_dir=str(tmp_path)), PortfolioCache(signal_dir=str(tmp_path))
+
+
+def load(cache, rows=(ROW,)):
+    token = cache.token(USER)
+    cache.load_all(USER, token, [dict(r, holdings=[]) for r in rows])
+
+
+def test_a_write_in_one_worker_drops_the_others_entry(tmp_path):
+    a, b = workers(tmp_path)
+    load(a)
+    load(b)
+    b.add_portfolio(USER, {"id": "p2", "user_id": USER, "name": "New", "created_at": "2026-02-01"})
+
+    assert a.listing(USER) is None
+    # The writer applied its own change and keeps serving from memory
+    assert [p["id"] for p in b.listing(USER)] == ["p1", "p2"]
+
+
+def test_a_write_during_a_load_keeps_the_load_out_of_the_cache(tmp_path):
+    a, b = workers(tmp_path)
+    token = a.token(USER)  # a starts reading Supabase
+    b.remove_portfolio(USER, "p1")
+    a.load_all(USER, token, [dict(ROW, holdings=[])])  # ... and gets the row b just deleted
+
+    assert a.listing(USER) is None
+
+
+def test_writing_over_an_unseen_write_drops_the_entry(tmp_path):
+    a, b = workers(tmp_path)
+    load(a)
+    b.remove_portfolio(USER, "p1")
+    a.add_holdings(USER, "p1", [{"id": "h1", "portfolio_id": "p1", "symbol": "TCS:NSE",
+                                 "quantity": 1, "purchase_price": 10.0}])
+
+    # a's entry never saw b's delete, so it is not kept
+    assert a.listing(USER) is None
+
+
+def test_without_signals_entries_live_for_the_ttl():
+    a, b = PortfolioCache(), PortfolioCache()
+    load(a)
+    b.remove_portfolio(USER, "p1")
+    assert [p["id"] for p in a.listing(USER)] == ["p1"]
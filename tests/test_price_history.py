@@ -0,0 +1,132 @@
+import os
+import time
+
+import numpy as np
+
+from backend.utils.price_history import DAILY, INTRADAY, HistoryRecorder, PriceHistory
+from backend.utils.scheduler import LeaderLock
+
+# 04:00 UTC yesterday: recent enough not to be pruned, and on a minute boundary
+T0 = int(time.time()) // 86400 * 86400 - 86400 + 4 * 3600
+
+
+def quote(price, ts, volume=100, symbol="tcs:nse"):
+    return {"symbol": symbol, "price": price, "volume": volume, "last_update_utc": ts,
+            "open": 90.0, "high": 120.0, "low": 80.0}
+
+
+def series(history, resolution, symbol="TCS:NSE"):
+    return {name: col.tolist() for name, col in history.read(symbol, resolution).items()}
+
+
+def test_record_only_buffers_until_flush(tmp_path):
+    recorder = HistoryRecorder(PriceHistory(str(tmp_path)), flush_interval=3600)
+    recorder.record([quote(100.0, T0)])
+    assert os.listdir(tmp_path) == []
+    recorder.flush()
+    assert series(recorder.history, INTRADAY)["close"] == [100.0]
+    recorder.stop()
+
+
+def test_ticks_from_several_processes_fold_into_one_bar_per_minute(tmp_path):
+    history = PriceHistory(str(tmp_path))
+    # Two workers' recorders: the first writes its segment while the second holds the lock
+    first, second = HistoryRecorder(history, 3600), HistoryRecorder(PriceHistory(str(tmp_path)), 3600)
+    first.record([quote(101.0, T0 + 5), quote(99.0, T0 + 70, volume=300)])
+    second.record([quote(104.0, T0 + 30, volume=200), quote(100.0, T0 + 20)])
+    assert second.lock.try_acquire()
+    first.flush()
+    assert series(history, INTRADAY)["timestamp"] == []
+    second.lock.release()
+    second.flush()
+
+    bars = series(history, INTRADAY)
+    assert bars["timestamp"] == [T0, T0 + 60]
+    assert bars["open"] == [101.0, 99.0] and bars["close"] == [104.0, 99.0]
+    assert bars["high"] == [104.0, 99.0] and bars["low"] == [100.0, 99.0]
+    assert bars["volume"] == [200.0, 300.0]
+    assert series(history, DAILY)["close"] == [99.0]
+    assert os.listdir(tmp_path / "pending") == []
+
+    # A later tick in the open minute extends it; one older than the last bar is dropped
+    first.record([quote(97.0, T0 + 80), quote(150.0, T0 + 10)])
+    first.flush()
+    bars = series(history, INTRADAY)
+    assert bars["open"] == [101.0, 99.0] and bars["low"] == [100.0, 97.0] and bars["close"] == [104.0, 97.0]
+    first.stop()
+    second.stop()
+
+
+def test_merge_prunes_old_intraday_bars(tmp_path):
+    history = PriceHistory(str(tmp_path))
+    now = int(time.time()) // 60 * 60
+    old = now - 40 * 86400
+    history.write_bars("TCS:NSE", INTRADAY, {
+        "timestamp": np.array([old, old + 60]), "open": np.ones(2), "high": np.ones(2),
+        "low": np.ones(2), "close": np.ones(2), "volume": np.ones(2)})
+    recorder = HistoryRecorder(history, 3600, intraday_days=30)
+    recorder.record([quote(100.0, now)])
+    recorder.flush()
+    assert series(history, INTRADAY)["timestamp"] == [now]
+    assert recorder.stats()["pruned"] == 2
+    recorder.stop()
+
+
+def test_writer_lock_is_released_after_each_merge(tmp_path):
+    recorder = HistoryRecorder(PriceHistory(str(tmp_path)), 3600)
+    recorder.record([quote(100.0, T0)])
+    recorder.flush()
+    lock = LeaderLock(str(tmp_path / "writer.lock"))
+    assert lock.try_acquire()
+    lock.release()
+
+
+def daily(timestamps, close):
+    n = len(timestamps)
+    return {"timestamp": np.array(timestamps, dtype=np.int64), "open": np.full(n, close),
+            "high": np.full(n, close), "low": np.full(n, close), "close": np.full(n, close),
+            "volume": np.ones(n)}
+
+
+def test_rewrites_switch_to_a_new_generation_in_one_step(tmp_path):
+    history = PriceHistory(str(tmp_path))
+    directory = tmp_path / DAILY / "TCS%3ANSE"
+    history.write_bars("TCS:NSE", DAILY, daily([T0, T0 + 86400], 1.0))
+    before = history.read("TCS:NSE", DAILY)
+
+    # A backfill older than the last bar rewrites the series
+    history.write_bars("TCS:NSE", DAILY, daily([T0 - 86400], 2.0))
+    assert sorted(os.listdir(directory)) == ["current", "gen-2"]
+    assert series(history, DAILY)["close"] == [2.0, 1.0, 1.0]
+    # Maps taken before the switch still see the old generation, every column alike
+    assert before["timestamp"].tolist() == [T0, T0 + 86400] and before["close"].tolist() == [1.0, 1.0]
+
+    history.prune("TCS:NSE", DAILY, T0)
+    assert sorted(os.listdir(directory)) == ["current", "gen-3"]
+    assert series(history, DAILY)["timestamp"] == [T0, T0 + 86400]
+
+
+def test_reader_resolves_again_when_its_generation_is_replaced(tmp_path, monkeypatch):
+    history = PriceHistory(str(tmp_path))
+    directory = str(tmp_path / DAILY / "TCS%3ANSE")
+    history.write_bars("TCS:NSE", DAILY, daily([T0], 1.0))
+    stale = PriceHistory._generation(directory)
+    history.write_bars("TCS:NSE", DAILY, daily([T0 - 86400], 2.0))
+
+    resolved = iter([stale])
+    current = PriceHistory._generation
+    monkeypatch.setattr(PriceHistory, "_generation", staticmethod(lambda d: next(resolved, None) or current(d)))
+    assert series(history, DAILY)["close"] == [2.0, 1.0]
+
+
+def test_series_from_before_generations_are_read_and_migrated(tmp_path):
+    directory = tmp_path / DAILY / "TCS%3ANSE"
+    directory.mkdir(parents=True)
+    for name, values in daily([T0], 1.0).items():
+        values.astype("<i8" if name == "timestamp" else "<f8").tofile(directory / f"{name}.bin")
+    history = PriceHistory(str(tmp_path))
+    assert series(history, DAILY)["close"] == [1.0]
+
+    history.write_bars("TCS:NSE", DAILY, daily([T0 - 86400], 2.0))
+    assert sorted(os.listdir(directory)) == ["current", "gen-1"]
+    assert series(history, DAILY)["close"] == [2.0, 1.0]
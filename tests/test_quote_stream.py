@@ -0,0 +1,83 @@
+import threading
+import time
+
+from backend.utils.quote_stream import QuoteBroadcaster
+
+
+class Upstream:
+    """Fake batched quote fetch that records each call's symbols."""
+
+    def __init__(self):
+        self.calls = []
+        self.prices = {}
+        self.lock = threading.Lock()
+
+    def __call__(self, symbols):
+        with self.lock:
+            self.calls.append(sorted(symbols))
+            return {"status": "OK", "data": [{"symbol": s, "price": self.prices.get(s, 100.0)} for s in symbols]}
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not (result := predicate()):
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+    return result
+
+
+def test_one_poll_covers_the_union_of_all_subscriptions():
+    upstream = Upstream()
+    broadcaster = QuoteBroadcaster(upstream, interval=0.2)
+    a = broadcaster.subscribe(["tcs:nse", "INFY:NSE"])
+    b = broadcaster.subscribe(["INFY:NSE", "TCS:NSE"])  # same set, other order
+    c = broadcaster.subscribe(["INFY:NSE", "WIPRO:NSE"])
+    wait_for(lambda: broadcaster.polls >= 2 and upstream.calls[-1] == ["INFY:NSE", "TCS:NSE", "WIPRO:NSE"])
+    assert broadcaster.stats()["symbols"] == 3
+
+    # Each client receives only the symbols it asked for
+    upstream.prices["INFY:NSE"] = 101.0
+    wait_for(lambda: any(q["price"] == 101.0 for q in c.take(0)))
+    assert {q["symbol"] for q in a.take(0)} <= {"TCS:NSE", "INFY:NSE"}
+    assert {q["symbol"] for q in b.take(0)} <= {"TCS:NSE", "INFY:NSE"}
+
+    # A symbol is polled until its last subscriber leaves
+    broadcaster.unsubscribe(c)
+    polls = broadcaster.polls
+    wait_for(lambda: broadcaster.polls > polls + 1)
+    assert upstream.calls[-1] == ["INFY:NSE", "TCS:NSE"]
+    broadcaster.unsubscribe(a)
+    broadcaster.unsubscribe(b)
+    wait_for(lambda: broadcaster._thread is None)
+    assert broadcaster.stats() == {"subscribers": 0, "symbols": 0, "polls": broadcaster.polls}
+
+
+def test_new_symbols_are_fetched_without_waiting_for_the_next_poll():
+    upstream = Upstream()
+    broadcaster = QuoteBroadcaster(upstream, interval=60)
+    first = broadcaster.subscribe(["TCS:NSE"])
+    wait_for(lambda: upstream.calls == [["TCS:NSE"]])
+    second = broadcaster.subscribe(["TCS:NSE", "INFY:NSE"])
+    # Only the new symbol is fetched early; the known one is sent from the last poll
+    wait_for(lambda: upstream.calls == [["TCS:NSE"], ["INFY:NSE"]])
+    wait_for(lambda: second.take(0) != [])
+    broadcaster.unsubscribe(first)
+    broadcaster.unsubscribe(second)
+
+
+def test_stream_polls_bypass_the_quote_cache(app):
+    import backend.extensions as ext
+    from backend.utils import api_helpers
+
+    ext.quote_cache.set("TCS:NSE", {"symbol": "TCS:NSE", "price": 1.0})
+    fetched = []
+    original = api_helpers.make_api_request
+    api_helpers.make_api_request = lambda host, key, endpoint, *args, **kwargs: fetched.append(endpoint) or {
+        "status": "OK", "data": [{"symbol": "TCS:NSE", "price": 2.0}]}
+    try:
+        assert api_helpers.fetch_quotes("host", "key", ["TCS:NSE"])["data"][0]["price"] == 1.0
+        assert fetched == []
+        assert api_helpers.fetch_quotes("host", "key", ["tcs:nse"], use_cache=False)["data"][0]["price"] == 2.0
+        assert len(fetched) == 1
+    finally:
+        api_helpers.make_api_request = original